@@ -0,0 +1,367 @@
+"""End-to-end latency and throughput of a mixed create/get/list/complete workload over REST and gRPC.
+
+Starts ``python -m src.main`` with the mock backends (or drives an already
+running service with ``--no-server``) and runs the workload either closed-loop
+at a fixed concurrency or open-loop at a fixed arrival rate:
+
+    python -m benchmarks.load_benchmark --protocol both --concurrency 50 --duration 20
+    python -m benchmarks.load_benchmark --protocol rest --rate 500 --duration 20 --repository-latency-ms 2
+
+Open-loop latencies are measured from when each request was due to start, so
+a server that falls behind shows up in the percentiles instead of slowing the
+load down.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import grpc
+
+from src.infrastructure.api import task_pb2, task_pb2_grpc
+
+OPERATIONS = ("create", "get", "list", "complete")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for entry in mix.split(","):
+        operation, _, weight = entry.partition("=")
+        if operation.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}; expected one of {', '.join(OPERATIONS)}")
+        weights[operation.strip()] = float(weight)
+    return weights
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class HttpError(Exception):
+    pass
+
+
+class RestClient:
+    """Minimal keep-alive HTTP/1.1 client: httpx spends more CPU per request than the service does,
+    which would make the load generator the bottleneck."""
+
+    def __init__(self, base_url: str, connections: int):
+        url = urlsplit(base_url)
+        self._host, self._port = url.hostname, url.port or 80
+        self._idle: List[tuple] = []
+        self._slots = asyncio.Semaphore(connections)
+
+    async def _request(self, method: str, path: str, body: Optional[dict] = None) -> bytes:
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self._host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+        )
+        async with self._slots:
+            reader, writer = self._idle.pop() if self._idle else await asyncio.open_connection(self._host, self._port)
+            try:
+                writer.write(head.encode() + payload)
+                status_line, _, headers = (await reader.readuntil(b"\r\n\r\n")).partition(b"\r\n")
+                length = 0
+                for header in headers.split(b"\r\n"):
+                    name, _, value = header.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                response = await reader.readexactly(length)
+            except BaseException:
+                writer.close()
+                raise
+            self._idle.append((reader, writer))
+        status = int(status_line.split()[1])
+        if status >= 400:
+            raise HttpError(f"{method} {path} returned {status}")
+        return response
+
+    async def create(self) -> str:
+        response = await self._request("POST", "/tasks/", {
+            "configuration_id": "bench",
+            "location_id": f"bench{random.randrange(10)}",
+            "due_date": datetime.now().isoformat(),
+        })
+        return json.loads(response)["id"]
+
+    async def get(self, task_id: str):
+        await self._request("GET", f"/tasks/{task_id}")
+
+    async def list(self):
+        await self._request("GET", "/tasks/?status=created&limit=20")
+
+    async def complete(self, task_id: str):
+        await self._request("PUT", f"/tasks/{task_id}/complete")
+
+    async def close(self):
+        for _, writer in self._idle:
+            writer.close()
+
+
+class GrpcClient:
+    def __init__(self, target: str):
+        self._channel = grpc.aio.insecure_channel(target)
+        self._stub = task_pb2_grpc.TaskServiceStub(self._channel)
+
+    async def create(self) -> str:
+        task = await self._stub.CreateTask(task_pb2.CreateTaskRequest(
+            configuration_id="bench",
+            location_id=f"bench{random.randrange(10)}",
+            due_date=int(time.time()),
+        ))
+        return task.id
+
+    async def get(self, task_id: str):
+        await self._stub.GetTask(task_pb2.GetTaskRequest(task_id=task_id))
+
+    async def list(self):
+        await self._stub.GetAllTasks(task_pb2.GetAllTasksRequest(page=1, limit=20, status="created"))
+
+    async def complete(self, task_id: str):
+        await self._stub.CompleteTask(task_pb2.CompleteTaskRequest(task_id=task_id))
+
+    async def close(self):
+        await self._channel.close()
+
+
+class Workload:
+    """Picks operations by weight and keeps the ids that get and complete act on."""
+
+    def __init__(self, client, weights: Dict[str, float], seed: int):
+        self._client = client
+        self._operations = list(weights)
+        self._weights = list(weights.values())
+        self._random = random.Random(seed)
+        self._task_ids: List[str] = []
+        self._open_ids: List[str] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def seed(self, count: int):
+        for _ in range(count):
+            task_id = await self._client.create()
+            self._task_ids.append(task_id)
+            self._open_ids.append(task_id)
+
+    async def run_one(self, started: Optional[float] = None, record: bool = True):
+        operation = self._random.choices(self._operations, self._weights)[0]
+        if operation == "complete" and not self._open_ids:
+            operation = "get"
+        started = time.perf_counter() if started is None else started
+        try:
+            if operation == "create":
+                task_id = await self._client.create()
+                self._task_ids.append(task_id)
+                self._open_ids.append(task_id)
+            elif operation == "get":
+                await self._client.get(self._random.choice(self._task_ids))
+            elif operation == "list":
+                await self._client.list()
+            else:
+                await self._client.complete(self._open_ids.pop(self._random.randrange(len(self._open_ids))))
+        except Exception:
+            if record:
+                self.errors[operation] += 1
+            return
+        if record:
+            self.latencies[operation].append(time.perf_counter() - started)
+
+
+async def run_closed(workload: Workload, concurrency: int, warmup: float, duration: float):
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        while (now := time.perf_counter()) < deadline:
+            await workload.run_one(record=now >= measure_from)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open(workload: Workload, rate: float, warmup: float, duration: float, max_outstanding: int):
+    """Starts requests on a fixed schedule, counting the ones skipped while `max_outstanding` are in flight as errors."""
+    interval = 1 / rate
+    started = time.perf_counter()
+    measure_from = started + warmup
+    outstanding = set()
+    skipped = 0
+    for i in range(int(rate * (warmup + duration))):
+        due = started + i * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(outstanding) >= max_outstanding:
+            skipped += 1
+            continue
+        request = asyncio.create_task(workload.run_one(started=due, record=due >= measure_from))
+        outstanding.add(request)
+        request.add_done_callback(outstanding.discard)
+    await asyncio.gather(*outstanding)
+    if skipped:
+        workload.errors["not_started"] += skipped
+
+
+def report(name: str, latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> dict:
+    results = {}
+    rows = sorted(latencies.items())
+    rows.append(("total", [value for samples in latencies.values() for value in samples]))
+    print(name)
+    for operation, samples in rows:
+        if not samples:
+            continue
+        failed = sum(errors.values()) if operation == "total" else errors.get(operation, 0)
+        ms = [value * 1000 for value in samples]
+        results[operation] = {
+            "requests": len(ms),
+            "errors": failed,
+            "rps": len(ms) / elapsed,
+            "p50_ms": percentile(ms, 50),
+            "p95_ms": percentile(ms, 95),
+            "p99_ms": percentile(ms, 99),
+            "max_ms": max(ms),
+        }
+        print(
+            f"  {operation:<9} n={len(ms):7d} errors={failed:5d} rps={len(ms) / elapsed:8.0f} "
+            f"p50={percentile(ms, 50):7.2f}ms p95={percentile(ms, 95):7.2f}ms "
+            f"p99={percentile(ms, 99):7.2f}ms max={max(ms):7.2f}ms"
+        )
+    return results
+
+
+async def drive(protocol: str, rest_url: str, grpc_target: str, args, index: int):
+    # Each client process takes an equal share of the concurrency or rate
+    processes = args.client_processes
+    concurrency = args.concurrency // processes + (index < args.concurrency % processes)
+    client = RestClient(rest_url, max(1, concurrency)) if protocol == "rest" else GrpcClient(grpc_target)
+    try:
+        workload = Workload(client, parse_mix(args.mix), args.seed + index)
+        await workload.seed(max(1, args.seed_tasks // processes))
+        if args.rate:
+            await run_open(workload, args.rate / processes, args.warmup, args.duration, args.max_outstanding // processes)
+        elif concurrency:
+            await run_closed(workload, concurrency, args.warmup, args.duration)
+        return dict(workload.latencies), dict(workload.errors)
+    finally:
+        await client.close()
+
+
+def run_client(protocol: str, rest_url: str, grpc_target: str, args, index: int):
+    return asyncio.run(drive(protocol, rest_url, grpc_target, args, index))
+
+
+def start_server(rest_port: int, grpc_port: int, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "REPOSITORY_TYPE": "mock",
+        "EVENT_SENDER_TYPE": "mock",
+        "REST_PORT": str(rest_port),
+        "GRPC_PORT": str(grpc_port),
+        "LOG_LEVEL": "WARNING",
+        "MOCK_REPOSITORY_LATENCY_MS": str(args.repository_latency_ms),
+    }
+    return subprocess.Popen([sys.executable, "-m", "src.main"], env=env)
+
+
+async def wait_until_ready(rest_url: str, grpc_target: str, server: Optional[subprocess.Popen], timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    client = RestClient(rest_url, 1)
+    try:
+        while True:
+            if server is not None and server.poll() is not None:
+                raise RuntimeError(f"src.main exited with code {server.returncode}")
+            try:
+                await client._request("GET", "/health")
+                break
+            except (OSError, asyncio.IncompleteReadError, HttpError):
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError("The service did not become ready in time")
+            await asyncio.sleep(0.2)
+    finally:
+        await client.close()
+    async with grpc.aio.insecure_channel(grpc_target) as channel:
+        await asyncio.wait_for(channel.channel_ready(), max(1.0, deadline - time.monotonic()))
+
+
+async def main(args):
+    server = None
+    if args.no_server:
+        rest_url, grpc_target = args.rest_url, args.grpc_target
+    else:
+        rest_port, grpc_port = free_port(), free_port()
+        rest_url, grpc_target = f"http://127.0.0.1:{rest_port}", f"127.0.0.1:{grpc_port}"
+        server = start_server(rest_port, grpc_port, args)
+    try:
+        await wait_until_ready(rest_url, grpc_target, server)
+        parse_mix(args.mix)  # Fails before any process starts
+        protocols = ("rest", "grpc") if args.protocol == "both" else (args.protocol,)
+        mode = f"open loop at {args.rate:.0f} req/s" if args.rate else f"closed loop at concurrency {args.concurrency}"
+        results = {}
+        # Clients run in their own processes so they don't take CPU from each other's event loop;
+        # spawned rather than forked, since gRPC does not survive a fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(args.client_processes, mp_context=context) as pool:
+            for protocol in protocols:
+                latencies, errors = defaultdict(list), defaultdict(int)
+                runs = [
+                    pool.submit(run_client, protocol, rest_url, grpc_target, args, index)
+                    for index in range(args.client_processes)
+                ]
+                for run in runs:
+                    client_latencies, client_errors = run.result()
+                    for operation, samples in client_latencies.items():
+                        latencies[operation].extend(samples)
+                    for operation, count in client_errors.items():
+                        errors[operation] += count
+                name = f"{protocol} ({mode}, {args.client_processes} client processes)"
+                results[protocol] = report(name, latencies, errors, args.duration)
+        if args.json:
+            with open(args.json, "w") as output:
+                json.dump(results, output, indent=2)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--protocol", choices=("rest", "grpc", "both"), default="both")
+    parser.add_argument("--mix", default="create=2,get=5,list=2,complete=1", help="operation weights")
+    parser.add_argument("--concurrency", type=int, default=50, help="closed loop: requests in flight")
+    parser.add_argument("--rate", type=float, default=0, help="open loop: requests started per second")
+    parser.add_argument("--max-outstanding", type=int, default=1000, help="open loop: requests in flight before skipping")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per protocol")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each run")
+    parser.add_argument(
+        "--client-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="processes generating the load"
+    )
+    parser.add_argument("--seed-tasks", type=int, default=200, help="tasks created before the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repository-latency-ms", type=float, default=0, help="delay per mock repository call")
+    parser.add_argument("--no-server", action="store_true", help="drive an already running service")
+    parser.add_argument("--rest-url", default="http://localhost:8000")
+    parser.add_argument("--grpc-target", default="localhost:50051")
+    parser.add_argument("--json", help="also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+"""Per-call cost of mediator dispatch and response serialization, checked against stored baselines.
+
+    python -m benchmarks.microbenchmarks            # print the timings next to the baselines
+    python -m benchmarks.microbenchmarks --check    # exit with 1 if any is slower than baseline * (1 + tolerance)
+    python -m benchmarks.microbenchmarks --update   # record the current timings as the baselines
+
+Each benchmark reports the best of several rounds, which is the most stable
+figure on a busy machine. Baselines are only comparable on the machine they
+were recorded on, so record them again with ``--update`` when it changes.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict
+
+from src.application.commands_queries import CompleteTaskCommand, CreateTaskCommand, GetAllTasksQuery, GetTaskQuery
+from src.domain.pagination import decode_cursor, encode_cursor
+from src.infrastructure.api import task_pb2
+from src.infrastructure.api.grpc_api import TaskService
+from src.infrastructure.api.rest_api import TASK_LIST_ADAPTER
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+PAGE_SIZE = 100
+
+
+async def time_call(call: Callable[[], Awaitable], rounds: int, min_round: float) -> float:
+    """Best seconds per call over `rounds` rounds, each long enough to make timer resolution irrelevant.
+
+    Garbage collection is paused while timing, as timeit does, so a collection
+    triggered by earlier allocations doesn't land in one benchmark's figure.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        return await _time_rounds(call, rounds, min_round)
+    finally:
+        gc.enable()
+
+
+async def _time_rounds(call: Callable[[], Awaitable], rounds: int, min_round: float) -> float:
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            await call()
+        if time.perf_counter() - started >= min_round:
+            break
+        number *= 2
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            await call()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+async def build_benchmarks() -> Dict[str, Callable[[], Awaitable]]:
+    mediator = AppMediator(MockTaskRepository(), MockDomainEventSender(), CircuitBreakerMonitor())
+    start = datetime(2030, 1, 1)
+    tasks = [
+        await mediator.handle_command(CreateTaskCommand(
+            configuration_id="bench", location_id=f"bench{i % 10}", user_id="user", due_date=start + timedelta(minutes=i),
+        ))
+        for i in range(1000)
+    ]
+    page = tasks[:PAGE_SIZE]
+    task_service = TaskService(mediator)
+    cursor = encode_cursor({"sort": "due_date", "seq": 12345, "due": 1893456000000000})
+    complete_ids = iter(task.id for task in tasks[PAGE_SIZE:] for _ in range(1000))
+
+    async def create_task():
+        await mediator.handle_command(CreateTaskCommand(configuration_id="bench", location_id="bench", due_date=start))
+
+    async def get_task():
+        await mediator.handle_query(GetTaskQuery(task_id=tasks[0].id))
+
+    async def list_tasks():
+        await mediator.handle_query(GetAllTasksQuery(limit=20, location_id="bench3"))
+
+    async def complete_task():
+        # Completing an already completed task still loads, updates and publishes it
+        await mediator.handle_command(CompleteTaskCommand(task_id=next(complete_ids, tasks[0].id)))
+
+    async def rest_page():
+        TASK_LIST_ADAPTER.dump_json(page)
+
+    async def grpc_page():
+        task_pb2.GetAllTasksResponse(tasks=[task_service._task_to_proto(task) for task in page]).SerializeToString()
+
+    async def cursor_round_trip():
+        decode_cursor(cursor)
+
+    return {
+        "mediator_create_task": create_task,
+        "mediator_get_task": get_task,
+        "mediator_list_tasks": list_tasks,
+        "mediator_complete_task": complete_task,
+        "rest_serialize_page": rest_page,
+        "grpc_serialize_page": grpc_page,
+        "cursor_decode": cursor_round_trip,
+    }
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINES):
+        return {"tolerance": 0.3, "microseconds": {}}
+    with open(BASELINES) as baselines:
+        return json.load(baselines)
+
+
+async def main(args) -> int:
+    baselines = load_baselines()
+    tolerance = baselines["tolerance"] if args.tolerance is None else args.tolerance
+    results = {}
+    regressions = []
+    for name, call in (await build_benchmarks()).items():
+        if args.filter and args.filter not in name:
+            continue
+        microseconds = await time_call(call, args.rounds, args.min_round) * 1e6
+        baseline = baselines["microseconds"].get(name)
+        # A slow figure is timed again before it counts, since one noisy neighbour can cause it,
+        # and new baselines are the best of all the tries
+        for _ in range(args.retries if baseline is not None or args.update else 0):
+            if baseline is not None and not args.update and microseconds / baseline - 1 <= tolerance:
+                break
+            microseconds = min(microseconds, await time_call(call, args.rounds, args.min_round) * 1e6)
+        results[name] = round(microseconds, 2)
+        if baseline is None:
+            print(f"{name:<24} {microseconds:10.2f} us  (no baseline)")
+            continue
+        change = microseconds / baseline - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<24} {microseconds:10.2f} us  baseline {baseline:10.2f} us  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+
+    if args.update:
+        baselines["microseconds"].update(results)
+        with open(BASELINES, "w") as output:
+            json.dump(baselines, output, indent=2, sort_keys=True)
+            output.write("\n")
+        print(f"Baselines written to {BASELINES}")
+    if args.check and regressions:
+        print(f"{len(regressions)} benchmark(s) slower than their baseline by more than {tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="fail on regressions beyond the tolerance")
+    parser.add_argument("--update", action="store_true", help="store the timings as the new baselines")
+    parser.add_argument("--tolerance", type=float, help="allowed slowdown, e.g. 0.3 for 30%% (default: from the baselines file)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--retries", type=int, default=2, help="times a slower than tolerated benchmark is timed again")
+    parser.add_argument("--min-round", type=float, default=0.2, help="minimum seconds per round")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,115 @@
+
+"""Concurrent-request latency of the blocking vs. the async-native Mongo repository.
+
+Requires a reachable MongoDB (``MONGO_CONNECTION_STRING`` or ``--mongo``):
+
+    python -m benchmarks.mongo_repository_benchmark --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from src.config import config
+from src.domain.entities import Task
+from src.infrastructure.persistence.mongo_repository import MongoTaskRepository
+
+
+class BlockingMongoTaskRepository:
+    """The previous implementation: ``async def`` methods over the synchronous driver."""
+
+    def __init__(self, connection_string: str, database: str):
+        self.client = MongoClient(connection_string)
+        self.collection = self.client[database].tasks
+
+    async def get_by_id(self, task_id: str) -> Optional[dict]:
+        return self.collection.find_one({"_id": ObjectId(task_id)})
+
+    async def close(self):
+        self.client.close()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: List[float], interval: float = 0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run(repository, task_ids: List[str], requests: int, concurrency: int):
+    latencies: List[float] = []
+    lags: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await repository.get_by_id(task_ids[i % len(task_ids)])
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    lag_probe = asyncio.create_task(measure_loop_lag(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_probe
+    return latencies, lags, elapsed
+
+
+def report(name: str, latencies: List[float], lags: List[float], elapsed: float):
+    ms = [value * 1000 for value in latencies]
+    lag_ms = [value * 1000 for value in lags] or [0.0]
+    print(
+        f"{name:<10} rps={len(ms) / elapsed:8.0f} "
+        f"p50={percentile(ms, 50):7.2f}ms p95={percentile(ms, 95):7.2f}ms p99={percentile(ms, 99):7.2f}ms "
+        f"mean={statistics.mean(ms):7.2f}ms loop-lag-max={max(lag_ms):7.2f}ms"
+    )
+
+
+async def main(args):
+    database = "tasks_db"
+    repository = MongoTaskRepository(
+        args.mongo,
+        max_pool_size=args.pool_size,
+        min_pool_size=min(args.pool_size, args.concurrency),
+        compressors=config.MONGO_COMPRESSORS,
+    )
+    await repository.connect()
+    seeded = [
+        await repository.create(Task(status="created", configuration_id="bench", location_id="bench", due_date=datetime.now()))
+        for _ in range(args.seed)
+    ]
+    task_ids = [task.id for task in seeded]
+
+    blocking = BlockingMongoTaskRepository(args.mongo, database)
+    try:
+        report("blocking", *await run(blocking, task_ids, args.requests, args.concurrency))
+        report("async", *await run(repository, task_ids, args.requests, args.concurrency))
+    finally:
+        await repository.collection.delete_many({"_id": {"$in": [ObjectId(task_id) for task_id in task_ids]}})
+        await blocking.close()
+        await repository.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo", default=config.MONGO_CONNECTION_STRING)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=config.MONGO_MAX_POOL_SIZE)
+    parser.add_argument("--seed", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
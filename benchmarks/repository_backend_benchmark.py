@@ -0,0 +1,105 @@
+"""Write and read throughput of the repository backends: mock, memory, SQLite and, if reachable, Mongo.
+
+    python -m benchmarks.repository_backend_benchmark --tasks 20000 --requests 5000 --concurrency 100
+
+Mongo is measured when ``--mongo`` points at a reachable server; the tasks it
+creates are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.persistence.memory_repository import MemoryTaskRepository
+from src.infrastructure.persistence.mongo_repository import MongoTaskRepository
+from src.infrastructure.persistence.sqlite_repository import SqliteTaskRepository
+
+START = datetime(2030, 1, 1)
+
+
+def new_task(i: int) -> Task:
+    return Task(
+        status="created" if i % 4 else "completed",
+        configuration_id=f"bench{i % 10}",
+        location_id=f"bench{i % 50}",
+        due_date=START + timedelta(seconds=i * 7919 % 86400),
+    )
+
+
+async def concurrently(call: Callable, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await call(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - started
+
+
+async def measure(name: str, repository, args):
+    task_ids: List[str] = []
+
+    async def create(i: int):
+        task_ids.append((await repository.create(new_task(i))).id)
+
+    async def get_by_id(i: int):
+        await repository.get_by_id(task_ids[i * 7919 % len(task_ids)])
+
+    async def page(i: int):
+        filters = TaskFilter(status="created", location_id=f"bench{i % 50}")
+        await repository.get_all(1, 50, filters=filters, sort=TaskSort(field="due_date"))
+
+    results = [("create", await concurrently(create, args.tasks, args.concurrency), args.tasks)]
+    results.append(("get_by_id", await concurrently(get_by_id, args.requests, args.concurrency), args.requests))
+    results.append(("page", await concurrently(page, args.requests, args.concurrency), args.requests))
+    print(f"{name:<7}", "  ".join(f"{operation}={count / elapsed:8.0f}/s" for operation, elapsed, count in results))
+    return task_ids
+
+
+async def main(args):
+    await measure("mock", MockTaskRepository(), args)
+    await measure("memory", MemoryTaskRepository(), args)
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteTaskRepository(os.path.join(directory, "tasks.db"), synchronous=args.synchronous)
+        await repository.connect()
+        try:
+            await measure("sqlite", repository, args)
+            metrics = repository.get_metrics()
+            print(f"        {metrics['writes_total']} writes in {metrics['commits_total']} commits")
+        finally:
+            await repository.close()
+
+    if not args.mongo:
+        return
+    repository = MongoTaskRepository(args.mongo, prewarm=False)
+    try:
+        await asyncio.wait_for(repository.connect(), timeout=5)
+    except Exception as e:
+        print(f"mongo   skipped: {e!r}")
+        await repository.close()
+        return
+    try:
+        task_ids = await measure("mongo", repository, args)
+        await repository.delete_many(task_ids)
+    finally:
+        await repository.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000, help="tasks created, concurrently, per backend")
+    parser.add_argument("--requests", type=int, default=5000, help="get_by_id calls and filtered pages per backend")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous setting")
+    parser.add_argument("--mongo", default="", help="Mongo connection string; empty skips Mongo")
+    asyncio.run(main(parser.parse_args()))
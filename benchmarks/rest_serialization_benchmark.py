@@ -0,0 +1,106 @@
+"""Latency of GET /tasks/ pages with the previous model_dump + response_model path vs. direct JSON serialization.
+
+    python -m benchmarks.rest_serialization_benchmark --requests 2000 --limit 100
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from src.application.commands_queries import CreateTaskCommand, CreateTasksCommand, GetAllTasksQuery
+from src.domain.entities import Task
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.di_factories import Container
+from src.infrastructure.monitoring.http_metrics_middleware import HttpMetricsMiddleware
+
+
+def legacy_app(container: Container) -> FastAPI:
+    """The list endpoint as it was: dicts that FastAPI validates back into Task and serializes again."""
+    legacy = FastAPI()
+    legacy.add_middleware(HttpMetricsMiddleware)
+    mediator = container.mediator()
+
+    @legacy.get("/tasks/", response_model=List[Task])
+    async def get_all_tasks(
+        response: Response,
+        page: int = 1,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        location_id: Optional[str] = None,
+        configuration_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        role_id: Optional[str] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        sort_by: Literal["id", "due_date"] = "id",
+        sort_order: Literal["asc", "desc"] = "asc",
+    ):
+        task_page = await mediator.handle_query(GetAllTasksQuery(page=page, limit=limit, cursor=cursor))
+        if task_page.next_cursor:
+            response.headers["X-Next-Cursor"] = task_page.next_cursor
+        return [task.model_dump() for task in task_page.tasks]
+
+    return legacy
+
+
+def legacy_body(tasks: List[Task]) -> bytes:
+    # What FastAPI does with the dicts: validate against response_model, dump in JSON mode, json.dumps
+    adapter = TypeAdapter(List[Task])
+    validated = adapter.validate_python([task.model_dump() for task in tasks])
+    return json.dumps(adapter.dump_python(validated, mode="json"), separators=(",", ":")).encode()
+
+
+def measure_serialization(render, tasks: List[Task], requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        render(tasks)
+    return time.perf_counter() - started
+
+
+def measure(client: TestClient, url: str, requests: int) -> float:
+    client.get(url)  # Warm-up
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200
+    return elapsed
+
+
+def main(args):
+    container = Container()
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    command = CreateTasksCommand(tasks=[
+        CreateTaskCommand(configuration_id="bench", location_id="bench", user_id="bench", due_date=datetime.now())
+        for _ in range(args.limit)
+    ])
+    asyncio.run(container.mediator().handle_command(command))
+
+    tasks = asyncio.run(container.mediator().handle_query(GetAllTasksQuery(limit=args.limit))).tasks
+    adapter = TypeAdapter(List[Task])
+    print(f"Serialization of a page of {len(tasks)} tasks")
+    for name, render in (("before", legacy_body), ("after", adapter.dump_json)):
+        elapsed = measure_serialization(render, tasks, args.requests)
+        print(f"{name:<7} {elapsed / args.requests * 1e6:8.0f} us/page")
+
+    print("GET /tasks/ through the ASGI stack")
+    url = f"/tasks/?limit={args.limit}"
+    for name, application in (("before", legacy_app(container)), ("after", app)):
+        with TestClient(application) as client:
+            elapsed = measure(client, url, args.requests)
+        print(f"{name:<7} {elapsed / args.requests * 1e6:8.0f} us/request  rps={args.requests / elapsed:7.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100, help="tasks per page")
+    main(parser.parse_args())
@@ -0,0 +1,57 @@
+"""Throughput of get_by_id with and without the batching loader over a slow repository.
+
+    python -m benchmarks.task_loader_benchmark --requests 20000 --concurrency 500 --latency-ms 2 --pool-size 10
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from src.domain.entities import Task
+from src.infrastructure.mocks.latency_repository import LatencyInjectingTaskRepository
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.persistence.batching_repository import BatchingTaskRepository
+
+
+async def run(repository, task_ids, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await repository.get_by_id(task_ids[i % len(task_ids)])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started
+
+
+async def main(args):
+    latency = args.latency_ms / 1000
+    for name, batching in (("direct", False), ("batched", True)):
+        tasks = MockTaskRepository()
+        for _ in range(args.tasks):
+            await tasks.create(Task(status="created", configuration_id="bench", location_id="bench", due_date=datetime.now()))
+        task_ids = list(tasks._tasks)
+        # Every lookup holds one of `pool_size` connections for a round trip
+        backend = LatencyInjectingTaskRepository(tasks, latency, args.pool_size)
+        repository = (
+            BatchingTaskRepository(backend, args.window_us / 1_000_000, args.max_batch_size) if batching else backend
+        )
+        elapsed = await run(repository, task_ids, args.requests, args.concurrency)
+        print(
+            f"{name:<8} rps={args.requests / elapsed:9.0f} elapsed={elapsed:6.2f}s "
+            f"round-trips={backend.round_trips}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--window-us", type=int, default=0)
+    parser.add_argument("--max-batch-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -1,8 +1,10 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
+from src.config import config
 from src.domain.commands_queries import Command, Query
+from src.domain.entities import Task
 
 # Commands
 class CreateTaskCommand(BaseModel, Command):
@@ -14,10 +16,21 @@ class CreateTaskCommand(BaseModel, Command):
 
 class CompleteTaskCommand(BaseModel, Command):
     task_id: str
+    # Set by task workers: the task is completed only if they still hold its lease
+    lease_owner: Optional[str] = None
 
 class DeleteTaskCommand(BaseModel, Command):
     task_id: str
 
+class CreateTasksCommand(BaseModel, Command):
+    tasks: List[CreateTaskCommand]
+
+class CompleteTasksCommand(BaseModel, Command):
+    task_ids: List[str]
+
+class DeleteTasksCommand(BaseModel, Command):
+    task_ids: List[str]
+
 # Queries
 class GetTaskQuery(BaseModel, Query):
     task_id: str
@@ -25,3 +38,27 @@ class GetTaskQuery(BaseModel, Query):
 class GetAllTasksQuery(BaseModel, Query):
     page: int = 1
     limit: int = 10
+    cursor: Optional[str] = None
+    status: Optional[str] = None
+    location_id: Optional[str] = None
+    configuration_id: Optional[str] = None
+    user_id: Optional[str] = None
+    role_id: Optional[str] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+    sort_by: Literal["id", "due_date"] = "id"
+    sort_order: Literal["asc", "desc"] = "asc"
+
+class StreamTasksQuery(BaseModel, Query):
+    batch_size: int = Field(default_factory=lambda: config.STREAM_BATCH_SIZE, gt=0)
+
+# Batch requests, which combine the batch commands
+class BatchTasksRequest(BaseModel):
+    create: List[CreateTaskCommand] = []
+    complete: List[str] = []
+    delete: List[str] = []
+
+class BatchTasksResponse(BaseModel):
+    created: List[Task] = []
+    completed: List[Task] = []
+    deleted: List[str] = []
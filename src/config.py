@@ -1,27 +1,115 @@
 import os
-import logging
-import sys
 from datetime import timedelta
 
 class AppConfig:
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+    LOG_ASYNC = os.environ.get("LOG_ASYNC", "true").lower() == "true"
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1"))
+    LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+    LOG_RATE_LIMIT = float(os.environ.get("LOG_RATE_LIMIT", "0"))
+    LOG_RATE_LIMIT_BURST = float(os.environ.get("LOG_RATE_LIMIT_BURST", "0"))
+    LOG_RATE_LIMITS = os.environ.get("LOG_RATE_LIMITS", "")
+    TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+    TRACING_FILE_PATH = os.environ.get("TRACING_FILE_PATH", "data/traces.jsonl")
+    TRACING_SAMPLE_RATE = float(os.environ.get("TRACING_SAMPLE_RATE", "0.01"))
+    TRACING_TAIL_SAMPLING = os.environ.get("TRACING_TAIL_SAMPLING", "true").lower() == "true"
+    TRACING_TAIL_LATENCY = float(os.environ.get("TRACING_TAIL_LATENCY_MS", "500")) / 1000
+    TRACING_QUEUE_SIZE = int(os.environ.get("TRACING_QUEUE_SIZE", "10000"))
+    TRACING_EXPORT_BATCH_SIZE = int(os.environ.get("TRACING_EXPORT_BATCH_SIZE", "512"))
+    TRACING_EXPORT_INTERVAL = float(os.environ.get("TRACING_EXPORT_INTERVAL", "1"))
     REPOSITORY_TYPE = os.environ.get("REPOSITORY_TYPE", "mock")
+    MOCK_REPOSITORY_LATENCY = float(os.environ.get("MOCK_REPOSITORY_LATENCY_MS", "0")) / 1000
     EVENT_SENDER_TYPE = os.environ.get("EVENT_SENDER_TYPE", "mock")
     MONGO_CONNECTION_STRING = os.environ.get("MONGO_CONNECTION_STRING", "mongodb://mongo:27017/")
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_COMPRESSORS = os.environ.get("MONGO_COMPRESSORS", "")
+    MONGO_PREWARM = os.environ.get("MONGO_PREWARM", "true").lower() == "true"
+    MONGO_ENSURE_INDEXES = os.environ.get("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+    SQLITE_PATH = os.environ.get("SQLITE_PATH", "data/tasks.db")
+    SQLITE_READ_THREADS = int(os.environ.get("SQLITE_READ_THREADS", "4"))
+    SQLITE_WRITE_BATCH_SIZE = int(os.environ.get("SQLITE_WRITE_BATCH_SIZE", "256"))
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    MEMORY_SNAPSHOT_PATH = os.environ.get("MEMORY_SNAPSHOT_PATH", "")
+    MEMORY_SNAPSHOT_INTERVAL = float(os.environ.get("MEMORY_SNAPSHOT_INTERVAL", "60"))
+    MEMORY_JOURNAL_FLUSH_INTERVAL = float(os.environ.get("MEMORY_JOURNAL_FLUSH_INTERVAL", "1"))
+    TASK_LOADER_ENABLED = os.environ.get("TASK_LOADER_ENABLED", "true").lower() == "true"
+    TASK_LOADER_BATCH_WINDOW = int(os.environ.get("TASK_LOADER_BATCH_WINDOW_US", "0")) / 1_000_000
+    TASK_LOADER_MAX_BATCH_SIZE = int(os.environ.get("TASK_LOADER_MAX_BATCH_SIZE", "100"))
+    TASK_CACHE_ENABLED = os.environ.get("TASK_CACHE_ENABLED", "false").lower() == "true"
+    TASK_CACHE_MAX_SIZE = int(os.environ.get("TASK_CACHE_MAX_SIZE", "10000"))
+    TASK_CACHE_TTL_SECONDS = float(os.environ.get("TASK_CACHE_TTL_SECONDS", "30"))
     NATS_URL = os.environ.get("NATS_URL", "nats://nats:4222")
     NATS_SUBJECT = os.environ.get("NATS_SUBJECT", "execution-task-service-events")
     NATS_STREAM_NAME = os.environ.get("NATS_STREAM_NAME", "execution-task-service-stream")
+    NATS_PUBLISH_QUEUE_SIZE = int(os.environ.get("NATS_PUBLISH_QUEUE_SIZE", "10000"))
+    NATS_PUBLISH_MAX_IN_FLIGHT = int(os.environ.get("NATS_PUBLISH_MAX_IN_FLIGHT", "512"))
+    NATS_PUBLISH_BATCH_SIZE = int(os.environ.get("NATS_PUBLISH_BATCH_SIZE", "128"))
+    NATS_PUBLISH_ACK_TIMEOUT = float(os.environ.get("NATS_PUBLISH_ACK_TIMEOUT", "5"))
+    NATS_PUBLISH_MAX_RETRIES = int(os.environ.get("NATS_PUBLISH_MAX_RETRIES", "5"))
+    NATS_SHUTDOWN_FLUSH_TIMEOUT = float(os.environ.get("NATS_SHUTDOWN_FLUSH_TIMEOUT", "10"))
+    OUTBOX_ENABLED = os.environ.get("OUTBOX_ENABLED", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", "1"))
+    OUTBOX_MAX_RETRY_DELAY = float(os.environ.get("OUTBOX_MAX_RETRY_DELAY", "30"))
+    OUTBOX_LEASE_SECONDS = float(os.environ.get("OUTBOX_LEASE_SECONDS", "30"))
+    SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "false").lower() == "true"
+    SCHEDULER_HORIZON_SECONDS = float(os.environ.get("SCHEDULER_HORIZON_SECONDS", "3600"))
+    SCHEDULER_OVERDUE_AFTER_SECONDS = float(os.environ.get("SCHEDULER_OVERDUE_AFTER_SECONDS", "3600"))
+    SCHEDULER_MAX_PENDING = int(os.environ.get("SCHEDULER_MAX_PENDING", "100000"))
+    SCHEDULER_BATCH_SIZE = int(os.environ.get("SCHEDULER_BATCH_SIZE", "500"))
+    WORKER_ENABLED = os.environ.get("WORKER_ENABLED", "false").lower() == "true"
+    WORKER_HANDLER = os.environ.get("WORKER_HANDLER", "src.infrastructure.workers.task_worker_pool:default_task_handler")
+    WORKER_EXECUTOR = os.environ.get("WORKER_EXECUTOR", "asyncio")
+    WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", "10"))
+    WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", "0"))
+    WORKER_LOCATION_CONCURRENCY = int(os.environ.get("WORKER_LOCATION_CONCURRENCY", "0"))
+    WORKER_CONFIGURATION_CONCURRENCY = int(os.environ.get("WORKER_CONFIGURATION_CONCURRENCY", "0"))
+    WORKER_LEASE_SECONDS = float(os.environ.get("WORKER_LEASE_SECONDS", "60"))
+    WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1"))
+    WORKER_MAX_ATTEMPTS = int(os.environ.get("WORKER_MAX_ATTEMPTS", "5"))
     REST_PORT = int(os.environ.get("REST_PORT", "8000"))
+    SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", "1"))
+    SERVER_GRPC_WORKERS = int(os.environ.get("SERVER_GRPC_WORKERS", "0"))
+    SERVER_DRAIN_DELAY = float(os.environ.get("SERVER_DRAIN_DELAY", "5"))
+    SERVER_SHUTDOWN_GRACE = float(os.environ.get("SERVER_SHUTDOWN_GRACE", "10"))
+    SERVER_SHUTDOWN_TIMEOUT = float(os.environ.get("SERVER_SHUTDOWN_TIMEOUT", "30"))
     GRPC_PORT = int(os.environ.get("GRPC_PORT", "50051"))
     GRPC_MAX_WORKERS = int(os.environ.get("GRPC_MAX_WORKERS", "10"))
+    STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "500"))
+    BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "1000"))
+    # Deadline in seconds of requests that arrive without one; 0 leaves them unbounded
+    DEFAULT_REQUEST_TIMEOUT = float(os.environ.get("DEFAULT_REQUEST_TIMEOUT", "0"))
+    # Query types whose concurrent identical calls are coalesced into one; results must be read-only
+    SINGLE_FLIGHT_QUERIES = {
+        name.strip()
+        for name in os.environ.get("SINGLE_FLIGHT_QUERIES", "GetTaskQuery,GetAllTasksQuery").split(",")
+        if name.strip()
+    }
+    LOAD_SHEDDING_ENABLED = os.environ.get("LOAD_SHEDDING_ENABLED", "false").lower() == "true"
+    LOAD_SHEDDING_READ_LIMIT = int(os.environ.get("LOAD_SHEDDING_READ_LIMIT", "100"))
+    LOAD_SHEDDING_WRITE_LIMIT = int(os.environ.get("LOAD_SHEDDING_WRITE_LIMIT", "50"))
+    LOAD_SHEDDING_MIN_LIMIT = int(os.environ.get("LOAD_SHEDDING_MIN_LIMIT", "10"))
+    LOAD_SHEDDING_MAX_LIMIT = int(os.environ.get("LOAD_SHEDDING_MAX_LIMIT", "1000"))
+    LOAD_SHEDDING_LATENCY_TOLERANCE = float(os.environ.get("LOAD_SHEDDING_LATENCY_TOLERANCE", "2"))
+    LOAD_SHEDDING_RETRY_AFTER = float(os.environ.get("LOAD_SHEDDING_RETRY_AFTER", "1"))
+    HEALTH_CHECK_INTERVAL = float(os.environ.get("HEALTH_CHECK_INTERVAL", "5"))
+    HEALTH_CHECK_TIMEOUT = float(os.environ.get("HEALTH_CHECK_TIMEOUT", "2"))
+    # Bearer token of the /admin endpoints and the gRPC AdminService; empty disables them
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+    PROFILING_MAX_SECONDS = float(os.environ.get("PROFILING_MAX_SECONDS", "60"))
+    # Concurrent repository calls and calls waiting for a slot, per bulkhead. They bound API
+    # requests only: streams read after their slot is released, and the outbox relay, worker
+    # pool and scheduler use the repository directly, so they are not a share of the pool
+    REPOSITORY_READ_CONCURRENCY = int(os.environ.get("REPOSITORY_READ_CONCURRENCY", "40"))
+    REPOSITORY_READ_QUEUE = int(os.environ.get("REPOSITORY_READ_QUEUE", "400"))
+    REPOSITORY_SCAN_CONCURRENCY = int(os.environ.get("REPOSITORY_SCAN_CONCURRENCY", "10"))
+    REPOSITORY_SCAN_QUEUE = int(os.environ.get("REPOSITORY_SCAN_QUEUE", "50"))
+    REPOSITORY_WRITE_CONCURRENCY = int(os.environ.get("REPOSITORY_WRITE_CONCURRENCY", "50"))
+    REPOSITORY_WRITE_QUEUE = int(os.environ.get("REPOSITORY_WRITE_QUEUE", "500"))
     CIRCUIT_BREAKER_FAIL_MAX = int(os.environ.get("CIRCUIT_BREAKER_FAIL_MAX", "5"))
     CIRCUIT_BREAKER_TIMEOUT_DURATION = timedelta(seconds=int(os.environ.get("CIRCUIT_BREAKER_TIMEOUT_DURATION", "60")))
 
-def setup_logging():
-    logging.basicConfig(
-        stream=sys.stdout,
-        level=config.LOG_LEVEL,
-        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-    )
-
 config = AppConfig()
@@ -1,6 +1,6 @@
 
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -12,6 +12,12 @@ class Task(BaseModel):
     user_id: Optional[str] = None
     role_id: Optional[str] = None
     due_date: datetime
+    # Claims by task workers, not counting the ones handed back unrun
+    attempts: int = 0
+    # Set while a worker holds the task in the "running" status. They are
+    # internal to the workers, so serializing a task (API responses included) leaves them out.
+    lease_owner: Optional[str] = Field(default=None, exclude=True)
+    lease_until: Optional[datetime] = Field(default=None, exclude=True)
 
     def to_json(self):
         return {
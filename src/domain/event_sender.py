@@ -1,6 +1,23 @@
 from abc import ABC, abstractmethod
 
 class EventSender(ABC):
+    async def connect(self):
+        """Opens connections before serving traffic."""
+        pass
+
+    async def flush(self):
+        """Waits until every event handed to the sender has been delivered."""
+        pass
+
+    async def close(self):
+        """Flushes pending events and releases connections."""
+        pass
+
     @abstractmethod
     async def send(self, event):
         pass
+
+    async def send_batch(self, events):
+        """Sends several events; implementations may publish them concurrently."""
+        for event in events:
+            await self.send(event)
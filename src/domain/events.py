@@ -17,3 +17,11 @@ class TaskCompletedEvent(BaseModel):
 
 class TaskDeletedEvent(BaseModel):
     task_id: str
+
+class TaskDueEvent(BaseModel):
+    task_id: str
+    due_date: datetime
+
+class TaskOverdueEvent(BaseModel):
+    task_id: str
+    due_date: datetime
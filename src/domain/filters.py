@@ -0,0 +1,44 @@
+
+from datetime import datetime, timezone
+from pydantic import BaseModel
+from typing import Literal, Optional
+from src.domain.entities import Task
+
+# Task fields that can be filtered on by exact value
+EQUALITY_FIELDS = ("status", "location_id", "configuration_id", "user_id", "role_id")
+
+
+def due_timestamp(due_date: datetime) -> float:
+    """Orders due dates consistently; naive datetimes are taken as UTC, like MongoDB does."""
+    if due_date.tzinfo is None:
+        due_date = due_date.replace(tzinfo=timezone.utc)
+    return due_date.timestamp()
+
+
+class TaskFilter(BaseModel):
+    status: Optional[str] = None
+    location_id: Optional[str] = None
+    configuration_id: Optional[str] = None
+    user_id: Optional[str] = None
+    role_id: Optional[str] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+
+    def equality_filters(self) -> dict:
+        return {field: getattr(self, field) for field in EQUALITY_FIELDS if getattr(self, field) is not None}
+
+    def matches(self, task: Task) -> bool:
+        for field, value in self.equality_filters().items():
+            if getattr(task, field) != value:
+                return False
+        due = due_timestamp(task.due_date)
+        if self.due_after is not None and due < due_timestamp(self.due_after):
+            return False
+        if self.due_before is not None and due >= due_timestamp(self.due_before):
+            return False
+        return True
+
+
+class TaskSort(BaseModel):
+    field: Literal["id", "due_date"] = "id"
+    descending: bool = False
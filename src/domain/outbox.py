@@ -0,0 +1,23 @@
+
+from pydantic import BaseModel
+from typing import Optional
+from src.domain import events as domain_events
+
+
+class OutboxMessage(BaseModel):
+    """A domain event persisted next to the task it belongs to, waiting to be relayed."""
+    id: Optional[str] = None
+    event_type: str
+    payload: str
+    # W3C traceparent of the request that produced the event, so its delivery joins that trace
+    trace_parent: Optional[str] = None
+
+    @classmethod
+    def from_event(cls, event: BaseModel, trace_parent: Optional[str] = None) -> "OutboxMessage":
+        return cls(event_type=type(event).__name__, payload=event.model_dump_json(), trace_parent=trace_parent)
+
+    def to_event(self) -> BaseModel:
+        event_class = getattr(domain_events, self.event_type, None)
+        if event_class is None:
+            raise ValueError(f"Unknown event type {self.event_type}")
+        return event_class.model_validate_json(self.payload)
@@ -0,0 +1,29 @@
+
+import base64
+import json
+from pydantic import BaseModel
+from typing import List, Optional
+from src.domain.entities import Task
+
+
+class TaskPage(BaseModel):
+    tasks: List[Task]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(position: dict) -> str:
+    """Encodes a repository-specific resume position as an opaque cursor token."""
+    payload = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodes a cursor token produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid pagination cursor")
+    return position
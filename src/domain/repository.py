@@ -1,17 +1,61 @@
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
 from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage
+
+T = TypeVar("T")
 
 
 class TaskRepository(ABC):
 
+    async def connect(self):
+        """Opens connections and warms up resources before serving traffic."""
+        pass
+
+    async def close(self):
+        """Releases connections held by the repository."""
+        pass
+
+    async def atomically(self, work: Callable[[], Awaitable[T]]) -> T:
+        """Awaits `work()` so that the writes it makes through this repository are all applied, or none.
+
+        Backends whose writes never yield to the event loop are atomic as they are.
+        """
+        return await work()
+
     @abstractmethod
     async def get_by_id(self, task_id: str) -> Optional[Task]:
         ...
 
     @abstractmethod
-    async def get_all(self, page: int, limit: int) -> List[Task]:
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Looks up several tasks in one round trip; missing ids are left out of the result."""
+        ...
+
+    @abstractmethod
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        """Returns a page of the tasks matching `filters`, ordered by `sort` (id by default).
+
+        When a cursor from a previous page is given the page resumes right after
+        the last task of that page (keyset pagination) and `page` is ignored.
+        The cursor must be used with the same filters and sort.
+        """
+        ...
+
+    @abstractmethod
+    def stream_all(self, batch_size: int) -> AsyncIterator[Task]:
+        """Yields every task as it is read, fetching `batch_size` tasks at a time."""
         ...
 
     @abstractmethod
@@ -25,3 +69,78 @@ class TaskRepository(ABC):
     @abstractmethod
     async def delete(self, task_id: str):
         ...
+
+    @abstractmethod
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        """Creates all tasks in a single round trip, assigning their ids."""
+        ...
+
+    @abstractmethod
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        """Updates all tasks in a single round trip."""
+        ...
+
+    @abstractmethod
+    async def delete_many(self, task_ids: List[str]):
+        """Deletes all tasks in a single round trip."""
+        ...
+
+    @abstractmethod
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        """Stores events to be relayed, in order, alongside the task data."""
+        ...
+
+    @abstractmethod
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        """Leases up to `limit` of the oldest outbox messages to `owner`, oldest first.
+
+        Messages already leased to `owner` are claimed again, so a relay retries a failed
+        batch in order, and so are those whose lease has expired, so the messages of
+        a relay that stopped before deleting them are relayed by another one.
+        """
+        ...
+
+    @abstractmethod
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        """Removes outbox messages once they have been relayed."""
+        ...
+
+    @abstractmethod
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        """Records the keys not recorded yet, or whose record has expired, and returns them.
+
+        Instances claim an event's key before emitting it, so each event is
+        emitted by only one of them until `expires_at`.
+        """
+        ...
+
+    @abstractmethod
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        """Atomically moves up to `limit` due tasks to "running" under a lease held by `owner`.
+
+        Claimable tasks are "created" ones due by `now` and "running" ones whose
+        lease has expired, earliest due first. A task is only ever claimed by one owner,
+        and each claim increments its `attempts`.
+        """
+        ...
+
+    @abstractmethod
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        """Extends the leases still held by `owner` and returns the ids renewed."""
+        ...
+
+    @abstractmethod
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        """Clears the lease held by `owner` and sets `status`; False if it was lost.
+
+        Releasing to "created" hands the task back unrun, so its attempt is not counted.
+        """
+        ...
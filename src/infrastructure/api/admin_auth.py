@@ -0,0 +1,12 @@
+import hmac
+from typing import Optional
+from src.config import config
+
+def admin_enabled() -> bool:
+    return bool(config.ADMIN_TOKEN)
+
+def is_admin(authorization: Optional[str]) -> bool:
+    """Whether an `Authorization` header value carries the admin bearer token."""
+    if not config.ADMIN_TOKEN or not authorization:
+        return False
+    return hmac.compare_digest(authorization.encode(), f"Bearer {config.ADMIN_TOKEN}".encode())
@@ -0,0 +1,94 @@
+import json
+import grpc
+from src.config import config
+from src.infrastructure.concurrency import deadline
+
+# The REST counterpart of a gRPC deadline: milliseconds the caller is willing to wait
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+_TIMEOUT_HEADER = TIMEOUT_HEADER.lower().encode()
+
+def _default_timeout():
+    return config.DEFAULT_REQUEST_TIMEOUT or None
+
+class HttpDeadlineMiddleware:
+    """ASGI middleware setting the request's deadline from its `X-Request-Timeout-Ms` header.
+
+    Requests without a valid header get DEFAULT_REQUEST_TIMEOUT, if configured;
+    a request whose budget is already spent is answered 504 without being handled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timeout = _default_timeout()
+        for name, value in scope["headers"]:
+            if name == _TIMEOUT_HEADER:
+                try:
+                    timeout = float(value) / 1000
+                except ValueError:
+                    pass
+                break
+        if timeout is not None and timeout <= 0:
+            error = deadline.exceeded("api")
+            await send({"type": "http.response.start", "status": 504, "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": json.dumps({"detail": str(error)}).encode()})
+            return
+        with deadline.deadline_after(timeout):
+            await self.app(scope, receive, send)
+
+class GrpcDeadlineInterceptor(grpc.aio.ServerInterceptor):
+    """Sets the deadline of unary and server-streaming calls from the one the client sent.
+
+    Calls without a deadline get DEFAULT_REQUEST_TIMEOUT, if configured.
+    """
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+
+        def timeout(context):
+            remaining = context.time_remaining()
+            return _default_timeout() if remaining is None else remaining
+
+        async def reject(context):
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, str(deadline.exceeded("api")))
+
+        if handler.unary_unary:
+            inner = handler.unary_unary
+
+            async def unary_unary(request, context):
+                budget = timeout(context)
+                if budget is not None and budget <= 0:
+                    await reject(context)
+                with deadline.deadline_after(budget):
+                    return await inner(request, context)
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        if handler.unary_stream:
+            inner = handler.unary_stream
+
+            async def unary_stream(request, context):
+                budget = timeout(context)
+                if budget is not None and budget <= 0:
+                    await reject(context)
+                with deadline.deadline_after(budget):
+                    async for response in inner(request, context):
+                        yield response
+
+            return grpc.unary_stream_rpc_method_handler(
+                unary_stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return handler
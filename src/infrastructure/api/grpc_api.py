@@ -6,16 +6,28 @@ from datetime import datetime
 from dependency_injector.wiring import inject, Provide
 from src.application.commands_queries import (
     CompleteTaskCommand,
+    CompleteTasksCommand,
     CreateTaskCommand,
+    CreateTasksCommand,
     DeleteTaskCommand,
+    DeleteTasksCommand,
     GetAllTasksQuery,
     GetTaskQuery,
+    StreamTasksQuery,
 )
 from src.domain.mediator import Mediator
 from src.config import config
 from src.domain.entities import Task
-from src.infrastructure.api import task_pb2, task_pb2_grpc
+from src.infrastructure.api import health_pb2, health_pb2_grpc, task_pb2, task_pb2_grpc
+from src.infrastructure.api.admin_auth import admin_enabled, is_admin
+from src.infrastructure.api.deadline_propagation import GrpcDeadlineInterceptor
+from src.infrastructure.concurrency.adaptive_limiter import OverloadedError
+from src.infrastructure.concurrency.deadline import DeadlineExceededError
 from src.infrastructure.di_factories import Container
+from src.infrastructure.monitoring.grpc_metrics_interceptor import GrpcMetricsInterceptor
+from src.infrastructure.monitoring.grpc_tracing_interceptor import GrpcTracingInterceptor
+from src.infrastructure.monitoring.health_monitor import HealthMonitor
+from src.infrastructure.monitoring.profiler import Profiler, ProfilerArgumentError, ProfilerError
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +38,15 @@ class TaskService(task_pb2_grpc.TaskServiceServicer):
     async def CreateTask(self, request, context):
         logger.info("Received request to create task")
         try:
-            command = CreateTaskCommand(
-                configuration_id=request.configuration_id,
-                location_id=request.location_id,
-                user_id=request.user_id,
-                role_id=request.role_id,
-                due_date=datetime.fromtimestamp(request.due_date),
-            )
+            command = self._create_command_from_proto(request)
             task = await self.mediator.handle_command(command)
             return self._task_to_proto(task)
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+            return task_pb2.Task()
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+            return task_pb2.Task()
         except Exception as e:
             logger.exception("An unexpected error occurred while creating a task")
             context.set_details(str(e))
@@ -42,7 +54,7 @@ class TaskService(task_pb2_grpc.TaskServiceServicer):
             return task_pb2.Task()
 
     async def CompleteTask(self, request, context):
-        logger.info(f"Received request to complete task {request.task_id}")
+        logger.info("Received request to complete task %s", request.task_id)
         try:
             command = CompleteTaskCommand(task_id=request.task_id)
             task = await self.mediator.handle_command(command)
@@ -51,26 +63,38 @@ class TaskService(task_pb2_grpc.TaskServiceServicer):
                 context.set_code(grpc.StatusCode.NOT_FOUND)
                 return task_pb2.Task()
             return self._task_to_proto(task)
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+            return task_pb2.Task()
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+            return task_pb2.Task()
         except Exception as e:
-            logger.exception(f"An unexpected error occurred while completing task {request.task_id}")
+            logger.exception("An unexpected error occurred while completing task %s", request.task_id)
             context.set_details(str(e))
             context.set_code(grpc.StatusCode.INTERNAL)
             return task_pb2.Task()
 
     async def DeleteTask(self, request, context):
-        logger.info(f"Received request to delete task {request.task_id}")
+        logger.info("Received request to delete task %s", request.task_id)
         try:
             command = DeleteTaskCommand(task_id=request.task_id)
             await self.mediator.handle_command(command)
             return task_pb2.Empty()
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+            return task_pb2.Empty()
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+            return task_pb2.Empty()
         except Exception as e:
-            logger.exception(f"An unexpected error occurred while deleting task {request.task_id}")
+            logger.exception("An unexpected error occurred while deleting task %s", request.task_id)
             context.set_details(str(e))
             context.set_code(grpc.StatusCode.INTERNAL)
             return task_pb2.Empty()
 
     async def GetTask(self, request, context):
-        logger.info(f"Received request to get task {request.task_id}")
+        logger.info("Received request to get task %s", request.task_id)
         try:
             query = GetTaskQuery(task_id=request.task_id)
             task = await self.mediator.handle_query(query)
@@ -79,8 +103,14 @@ class TaskService(task_pb2_grpc.TaskServiceServicer):
                 context.set_code(grpc.StatusCode.NOT_FOUND)
                 return task_pb2.Task()
             return self._task_to_proto(task)
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+            return task_pb2.Task()
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+            return task_pb2.Task()
         except Exception as e:
-            logger.exception(f"An unexpected error occurred while getting task {request.task_id}")
+            logger.exception("An unexpected error occurred while getting task %s", request.task_id)
             context.set_details(str(e))
             context.set_code(grpc.StatusCode.INTERNAL)
             return task_pb2.Task()
@@ -88,17 +118,117 @@ class TaskService(task_pb2_grpc.TaskServiceServicer):
     async def GetAllTasks(self, request, context):
         logger.info("Received request to get all tasks")
         try:
-            query = GetAllTasksQuery(page=request.page, limit=request.limit)
-            tasks = await self.mediator.handle_query(query)
+            query = GetAllTasksQuery(
+                page=request.page,
+                limit=request.limit,
+                cursor=request.cursor or None,
+                status=request.status or None,
+                location_id=request.location_id or None,
+                configuration_id=request.configuration_id or None,
+                user_id=request.user_id or None,
+                role_id=request.role_id or None,
+                due_after=datetime.fromtimestamp(request.due_after) if request.due_after else None,
+                due_before=datetime.fromtimestamp(request.due_before) if request.due_before else None,
+                sort_by=request.sort_by or "id",
+                sort_order=request.sort_order or "asc",
+            )
+            task_page = await self.mediator.handle_query(query)
             return task_pb2.GetAllTasksResponse(
-                tasks=[self._task_to_proto(task) for task in tasks]
+                tasks=[self._task_to_proto(task) for task in task_page.tasks],
+                next_cursor=task_page.next_cursor or "",
             )
+        except ValueError as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return task_pb2.GetAllTasksResponse()
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+            return task_pb2.GetAllTasksResponse()
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+            return task_pb2.GetAllTasksResponse()
         except Exception as e:
             logger.exception("An unexpected error occurred while getting all tasks")
             context.set_details(str(e))
             context.set_code(grpc.StatusCode.INTERNAL)
             return task_pb2.GetAllTasksResponse()
 
+    async def StreamTasks(self, request, context):
+        logger.info("Received request to stream tasks")
+        try:
+            query = StreamTasksQuery(batch_size=request.batch_size) if request.batch_size else StreamTasksQuery()
+            tasks = await self.mediator.handle_query(query)
+            # Each yield waits for the transport, so a slow client throttles the repository cursor
+            async for task in tasks:
+                yield self._task_to_proto(task)
+        except ValueError as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+        except Exception as e:
+            logger.exception("An unexpected error occurred while streaming tasks")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+
+    async def BatchTasks(self, request, context):
+        logger.info(
+            "Received batch request to create %s, complete %s and delete %s tasks",
+            len(request.create),
+            len(request.complete_task_ids),
+            len(request.delete_task_ids),
+        )
+        try:
+            response = task_pb2.BatchTasksResponse()
+            if request.create:
+                command = CreateTasksCommand(tasks=[self._create_command_from_proto(item) for item in request.create])
+                created = await self.mediator.handle_command(command)
+                response.created.extend(self._task_to_proto(task) for task in created)
+            if request.complete_task_ids:
+                command = CompleteTasksCommand(task_ids=list(request.complete_task_ids))
+                completed = await self.mediator.handle_command(command)
+                response.completed.extend(self._task_to_proto(task) for task in completed)
+            if request.delete_task_ids:
+                await self.mediator.handle_command(DeleteTasksCommand(task_ids=list(request.delete_task_ids)))
+                response.deleted_task_ids.extend(request.delete_task_ids)
+            return response
+        except ValueError as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return task_pb2.BatchTasksResponse()
+        except OverloadedError as e:
+            self._reject_overloaded(context, e)
+            return task_pb2.BatchTasksResponse()
+        except DeadlineExceededError as e:
+            self._reject_expired(context, e)
+            return task_pb2.BatchTasksResponse()
+        except Exception as e:
+            logger.exception("An unexpected error occurred while processing a task batch")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return task_pb2.BatchTasksResponse()
+
+    def _reject_overloaded(self, context, error: OverloadedError):
+        # grpc-retry-pushback-ms is honoured by clients with a retry policy
+        context.set_trailing_metadata((("grpc-retry-pushback-ms", str(int(error.retry_after * 1000))),))
+        context.set_details(str(error))
+        context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+    def _reject_expired(self, context, error: DeadlineExceededError):
+        context.set_details(str(error))
+        context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+
+    def _create_command_from_proto(self, request) -> CreateTaskCommand:
+        return CreateTaskCommand(
+            configuration_id=request.configuration_id,
+            location_id=request.location_id,
+            user_id=request.user_id,
+            role_id=request.role_id,
+            due_date=datetime.fromtimestamp(request.due_date),
+        )
+
     def _task_to_proto(self, task: Task):
         return task_pb2.Task(
             id=str(task.id),
@@ -110,14 +240,123 @@ class TaskService(task_pb2_grpc.TaskServiceServicer):
             completed=task.status == "completed",
         )
 
+class HealthService(health_pb2_grpc.HealthServicer):
+    """grpc.health.v1 over the cached readiness of the health monitor; "" stands for the whole server."""
+
+    SERVICES = {"", "task.TaskService"}
+
+    def __init__(self, health_monitor: HealthMonitor, watch_interval: float = 5.0):
+        self.health_monitor = health_monitor
+        self.watch_interval = watch_interval
+
+    def _status(self):
+        if self.health_monitor.is_ready():
+            return health_pb2.HealthCheckResponse.SERVING
+        return health_pb2.HealthCheckResponse.NOT_SERVING
+
+    async def Check(self, request, context):
+        if request.service not in self.SERVICES:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"Unknown service {request.service}")
+        return health_pb2.HealthCheckResponse(status=self._status())
+
+    async def Watch(self, request, context):
+        if request.service not in self.SERVICES:
+            # Per the protocol, unknown services are reported rather than failed, in case they appear later
+            yield health_pb2.HealthCheckResponse(status=health_pb2.HealthCheckResponse.SERVICE_UNKNOWN)
+            return
+        last = None
+        while True:
+            status = self._status()
+            if status != last:
+                yield health_pb2.HealthCheckResponse(status=status)
+                last = status
+            # Breaker transitions don't notify the monitor, so the status is also re-read periodically
+            await self.health_monitor.wait_for_change(self.watch_interval)
+
+class AdminService(task_pb2_grpc.AdminServiceServicer):
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    async def _run(self, context, call):
+        if not is_admin(dict(context.invocation_metadata() or ()).get("authorization")):
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Invalid admin token")
+        try:
+            return await call()
+        except ProfilerArgumentError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except ProfilerError as e:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+
+    async def ProfileCpu(self, request, context):
+        seconds = request.seconds or 10
+        logger.info("Profiling CPU for %s seconds", seconds)
+        stacks = await self._run(context, lambda: self.profiler.profile_cpu(seconds, (request.interval_ms or 5) / 1000))
+        return task_pb2.ProfileCpuResponse(collapsed_stacks=stacks)
+
+    async def StartAllocationTracing(self, request, context):
+        frames = request.frames or 1
+        logger.info("Starting allocation tracing with %s frames", frames)
+
+        async def start():
+            self.profiler.start_allocation_tracing(frames)
+        await self._run(context, start)
+        return task_pb2.Empty()
+
+    async def GetAllocationSnapshot(self, request, context):
+        snapshot = await self._run(
+            context, lambda: self.profiler.allocation_snapshot(request.limit or 20, request.group_by or "lineno")
+        )
+        return task_pb2.AllocationSnapshotResponse(
+            traced_bytes=snapshot["traced_bytes"],
+            peak_bytes=snapshot["peak_bytes"],
+            compared_to_previous=snapshot["compared_to_previous"],
+            top=[task_pb2.AllocationSite(**site) for site in snapshot["top"]],
+        )
+
+    async def StopAllocationTracing(self, request, context):
+        logger.info("Stopping allocation tracing")
+
+        async def stop():
+            self.profiler.stop_allocation_tracing()
+        await self._run(context, stop)
+        return task_pb2.Empty()
+
+    async def MeasureEventLoop(self, request, context):
+        seconds = request.seconds or 5
+        logger.info("Measuring event loop lag for %s seconds", seconds)
+        report = await self._run(
+            context,
+            lambda: self.profiler.measure_event_loop(seconds, slow_threshold=(request.slow_threshold_ms or 100) / 1000),
+        )
+        lag = report["lag_ms"]
+        return task_pb2.MeasureEventLoopResponse(
+            samples=report["samples"],
+            lag_mean_ms=lag["mean"],
+            lag_p50_ms=lag["p50"],
+            lag_p99_ms=lag["p99"],
+            lag_max_ms=lag["max"],
+            slow_callbacks=[task_pb2.SlowCallback(**stall) for stall in report["slow_callbacks"]],
+        )
+
 @inject
-async def serve(container: Container = Provide[Container]):
+async def start_server(container: Container = Provide[Container]) -> grpc.aio.Server:
     server = grpc.aio.server(
-        futures.ThreadPoolExecutor(max_workers=config.GRPC_MAX_WORKERS)
+        futures.ThreadPoolExecutor(max_workers=config.GRPC_MAX_WORKERS),
+        interceptors=[GrpcMetricsInterceptor(), GrpcTracingInterceptor(), GrpcDeadlineInterceptor()],
+        # Lets the worker processes of the supervisor bind the same port
+        options=[("grpc.so_reuseport", 1)],
     )
     task_service = TaskService(container.mediator())
     task_pb2_grpc.add_TaskServiceServicer_to_server(task_service, server)
+    health_pb2_grpc.add_HealthServicer_to_server(HealthService(container.health_monitor()), server)
+    # Without a configured token the admin service isn't served at all
+    if admin_enabled():
+        task_pb2_grpc.add_AdminServiceServicer_to_server(AdminService(container.profiler()), server)
     server.add_insecure_port(f"[::]:{config.GRPC_PORT}")
-    logger.info(f"gRPC server started on port {config.GRPC_PORT}")
     await server.start()
+    logger.info("gRPC server started on port %s", config.GRPC_PORT)
+    return server
+
+async def serve():
+    server = await start_server()
     await server.wait_for_termination()
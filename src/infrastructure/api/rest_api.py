@@ -1,64 +1,136 @@
 
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Depends, Header, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dependency_injector.wiring import inject, Provide
 import logging
+import math
 from src.domain.mediator import Mediator
 from src.application.commands_queries import (
     CreateTaskCommand,
     CompleteTaskCommand,
     DeleteTaskCommand,
+    CreateTasksCommand,
+    CompleteTasksCommand,
+    DeleteTasksCommand,
     GetTaskQuery,
     GetAllTasksQuery,
+    BatchTasksRequest,
+    BatchTasksResponse,
 )
 from src.domain.entities import Task
 from datetime import datetime
+from src.infrastructure.api.admin_auth import admin_enabled, is_admin
+from src.infrastructure.api.deadline_propagation import HttpDeadlineMiddleware
+from src.infrastructure.concurrency.adaptive_limiter import OverloadedError
+from src.infrastructure.concurrency.deadline import DeadlineExceededError
 from src.infrastructure.di_factories import Container
-from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
-from typing import List
+from src.infrastructure.monitoring.health_monitor import HealthMonitor
+from src.infrastructure.monitoring.http_metrics_middleware import HttpMetricsMiddleware
+from src.infrastructure.monitoring.http_tracing_middleware import HttpTracingMiddleware
+from src.infrastructure.monitoring.metrics import registry
+from src.infrastructure.monitoring.profiler import Profiler, ProfilerArgumentError, ProfilerError
+from pydantic import TypeAdapter
+from typing import List, Literal, Optional
 
 logger = logging.getLogger(__name__)
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Responses are serialized straight to JSON bytes; `response_model` only documents them
+TASK_ADAPTER = TypeAdapter(Task)
+TASK_LIST_ADAPTER = TypeAdapter(List[Task])
+BATCH_RESPONSE_ADAPTER = TypeAdapter(BatchTasksResponse)
+
+def json_response(content: bytes, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    return Response(content=content, status_code=status_code, headers=headers, media_type="application/json")
+
 app = FastAPI()
+# The last added middleware runs first, so requests rejected for their deadline are still measured and traced
+app.add_middleware(HttpDeadlineMiddleware)
+app.add_middleware(HttpMetricsMiddleware)
+app.add_middleware(HttpTracingMiddleware)
+
 container = Container()
 # Note: The container wiring is now handled in main.py
 
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request, exc: OverloadedError):
+    retry_after = str(max(1, math.ceil(exc.retry_after)))
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": retry_after})
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request, exc: DeadlineExceededError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.exception_handler(ProfilerError)
+async def profiler_error_handler(request, exc: ProfilerError):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+@app.exception_handler(ProfilerArgumentError)
+async def profiler_argument_error_handler(request, exc: ProfilerArgumentError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.post("/tasks/", response_model=Task, status_code=201)
 @inject
 async def create_task(
-    task_data: dict,
+    command: CreateTaskCommand,
     mediator: Mediator = Depends(Provide[Container.mediator]),
 ):
     logger.info("Received request to create task")
     try:
-        command = CreateTaskCommand(
-            configuration_id=task_data["configuration_id"],
-            location_id=task_data["location_id"],
-            user_id=task_data.get("user_id"),
-            role_id=task_data.get("role_id"),
-            due_date=datetime.fromisoformat(task_data["due_date"])
-        )
         task = await mediator.handle_command(command)
-        return task.model_dump()
+        return json_response(TASK_ADAPTER.dump_json(task), status_code=201)
+    except (OverloadedError, DeadlineExceededError):
+        raise
     except Exception as e:
         logger.exception("An unexpected error occurred while creating a task")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/tasks/batch", response_model=BatchTasksResponse)
+@inject
+async def batch_tasks(
+    batch: BatchTasksRequest,
+    mediator: Mediator = Depends(Provide[Container.mediator]),
+):
+    logger.info(
+        "Received batch request to create %s, complete %s and delete %s tasks",
+        len(batch.create),
+        len(batch.complete),
+        len(batch.delete),
+    )
+    try:
+        response = BatchTasksResponse()
+        if batch.create:
+            response.created = await mediator.handle_command(CreateTasksCommand(tasks=batch.create))
+        if batch.complete:
+            response.completed = await mediator.handle_command(CompleteTasksCommand(task_ids=batch.complete))
+        if batch.delete:
+            await mediator.handle_command(DeleteTasksCommand(task_ids=batch.delete))
+            response.deleted = batch.delete
+        return json_response(BATCH_RESPONSE_ADAPTER.dump_json(response))
+    except (OverloadedError, DeadlineExceededError):
+        raise
+    except Exception as e:
+        logger.exception("An unexpected error occurred while processing a task batch")
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.put("/tasks/{task_id}/complete", response_model=Task)
 @inject
 async def complete_task(
     task_id: str,
     mediator: Mediator = Depends(Provide[Container.mediator]),
 ):
-    logger.info(f"Received request to complete task {task_id}")
+    logger.info("Received request to complete task %s", task_id)
     try:
         command = CompleteTaskCommand(task_id=task_id)
         task = await mediator.handle_command(command)
         if task is None:
             raise HTTPException(status_code=404, detail="Task not found")
-        return task.model_dump()
+        return json_response(TASK_ADAPTER.dump_json(task))
+    except (OverloadedError, DeadlineExceededError):
+        raise
     except Exception as e:
-        logger.exception(f"An unexpected error occurred while completing task {task_id}")
+        logger.exception("An unexpected error occurred while completing task %s", task_id)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.delete("/tasks/{task_id}", status_code=204)
@@ -67,12 +139,14 @@ async def delete_task(
     task_id: str,
     mediator: Mediator = Depends(Provide[Container.mediator]),
 ):
-    logger.info(f"Received request to delete task {task_id}")
+    logger.info("Received request to delete task %s", task_id)
     try:
         command = DeleteTaskCommand(task_id=task_id)
         await mediator.handle_command(command)
+    except (OverloadedError, DeadlineExceededError):
+        raise
     except Exception as e:
-        logger.exception(f"An unexpected error occurred while deleting task {task_id}")
+        logger.exception("An unexpected error occurred while deleting task %s", task_id)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/tasks/{task_id}", response_model=Task)
@@ -81,15 +155,17 @@ async def get_task(
     task_id: str,
     mediator: Mediator = Depends(Provide[Container.mediator]),
 ):
-    logger.info(f"Received request to get task {task_id}")
+    logger.info("Received request to get task %s", task_id)
     try:
         query = GetTaskQuery(task_id=task_id)
         task = await mediator.handle_query(query)
         if task is None:
             raise HTTPException(status_code=404, detail="Task not found")
-        return task.model_dump()
+        return json_response(TASK_ADAPTER.dump_json(task))
+    except (OverloadedError, DeadlineExceededError):
+        raise
     except Exception as e:
-        logger.exception(f"An unexpected error occurred while getting task {task_id}")
+        logger.exception("An unexpected error occurred while getting task %s", task_id)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/tasks/", response_model=List[Task])
@@ -97,22 +173,112 @@ async def get_task(
 async def get_all_tasks(
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    location_id: Optional[str] = None,
+    configuration_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    role_id: Optional[str] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    sort_by: Literal["id", "due_date"] = "id",
+    sort_order: Literal["asc", "desc"] = "asc",
     mediator: Mediator = Depends(Provide[Container.mediator]),
 ):
     logger.info("Received request to get all tasks")
     try:
-        query = GetAllTasksQuery(page=page, limit=limit)
-        tasks = await mediator.handle_query(query)
-        return [task.model_dump() for task in tasks]
+        query = GetAllTasksQuery(
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            location_id=location_id,
+            configuration_id=configuration_id,
+            user_id=user_id,
+            role_id=role_id,
+            due_after=due_after,
+            due_before=due_before,
+            sort_by=sort_by,
+            sort_order=sort_order,
+        )
+        task_page = await mediator.handle_query(query)
+        # The body stays a plain list; the token for the next page travels in a header
+        headers = {NEXT_CURSOR_HEADER: task_page.next_cursor} if task_page.next_cursor else None
+        return json_response(TASK_LIST_ADAPTER.dump_json(task_page.tasks), headers=headers)
+    except (OverloadedError, DeadlineExceededError):
+        raise
     except Exception as e:
         logger.exception("An unexpected error occurred while getting all tasks")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/health/live")
+@inject
+async def liveness(health_monitor: HealthMonitor = Depends(Provide[Container.health_monitor])):
+    status = health_monitor.liveness()
+    return JSONResponse(content=status, status_code=200 if status["status"] == "alive" else 503)
+
+# /health is kept for existing probes and answers like /health/ready
 @app.get("/health")
+@app.get("/health/ready")
+@inject
+async def readiness(health_monitor: HealthMonitor = Depends(Provide[Container.health_monitor])):
+    status = health_monitor.readiness()
+    ready = status["status"] in ("healthy", "degraded")
+    return JSONResponse(content=status, status_code=200 if ready else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    # Without a configured token the admin endpoints don't exist
+    if not admin_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(authorization):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+@app.get("/admin/profile/cpu", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+@inject
+async def profile_cpu(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    profiler: Profiler = Depends(Provide[Container.profiler]),
+):
+    logger.info("Profiling CPU for %s seconds", seconds)
+    return PlainTextResponse(await profiler.profile_cpu(seconds, interval_ms / 1000))
+
+@app.post("/admin/profile/allocations", status_code=204, dependencies=[Depends(require_admin)])
+@inject
+async def start_allocation_tracing(
+    frames: int = 1,
+    profiler: Profiler = Depends(Provide[Container.profiler]),
+):
+    logger.info("Starting allocation tracing with %s frames", frames)
+    profiler.start_allocation_tracing(frames)
+    return Response(status_code=204)
+
+@app.get("/admin/profile/allocations", dependencies=[Depends(require_admin)])
+@inject
+async def allocation_snapshot(
+    limit: int = 20,
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    profiler: Profiler = Depends(Provide[Container.profiler]),
+):
+    return await profiler.allocation_snapshot(limit, group_by)
+
+@app.delete("/admin/profile/allocations", status_code=204, dependencies=[Depends(require_admin)])
+@inject
+async def stop_allocation_tracing(profiler: Profiler = Depends(Provide[Container.profiler])):
+    logger.info("Stopping allocation tracing")
+    profiler.stop_allocation_tracing()
+    return Response(status_code=204)
+
+@app.get("/admin/profile/event-loop", dependencies=[Depends(require_admin)])
 @inject
-async def health_check(
-    monitor: CircuitBreakerMonitor = Depends(Provide[Container.circuit_breaker_monitor]),
+async def measure_event_loop(
+    seconds: float = 5,
+    slow_threshold_ms: float = 100,
+    profiler: Profiler = Depends(Provide[Container.profiler]),
 ):
-    health_status = monitor.get_status()
-    status_code = 503 if health_status["status"] == "down" else 200
-    return JSONResponse(content=health_status, status_code=status_code)
+    logger.info("Measuring event loop lag for %s seconds", seconds)
+    return await profiler.measure_event_loop(seconds, slow_threshold=slow_threshold_ms / 1000)
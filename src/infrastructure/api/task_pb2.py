@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n!src/infrastructure/api/task.proto\x12\x04task\"\x07\n\x05\x45mpty\"\x88\x01\n\x04Task\x12\n\n\x02id\x18\x01 \x01(\t\x12\x18\n\x10\x63onfiguration_id\x18\x02 \x01(\t\x12\x13\n\x0blocation_id\x18\x03 \x01(\t\x12\x0f\n\x07user_id\x18\x04 \x01(\t\x12\x0f\n\x07role_id\x18\x05 \x01(\t\x12\x10\n\x08\x64ue_date\x18\x06 \x01(\x03\x12\x11\n\tcompleted\x18\x07 \x01(\x08\"v\n\x11\x43reateTaskRequest\x12\x18\n\x10\x63onfiguration_id\x18\x01 \x01(\t\x12\x13\n\x0blocation_id\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x0f\n\x07role_id\x18\x04 \x01(\t\x12\x10\n\x08\x64ue_date\x18\x05 \x01(\x03\"&\n\x13\x43ompleteTaskRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"$\n\x11\x44\x65leteTaskRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"!\n\x0eGetTaskRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"1\n\x12GetAllTasksRequest\x12\x0c\n\x04page\x18\x01 \x01(\x05\x12\r\n\x05limit\x18\x02 \x01(\x05\"0\n\x13GetAllTasksResponse\x12\x19\n\x05tasks\x18\x01 \x03(\x0b\x32\n.task.Task2\x9c\x02\n\x0bTaskService\x12\x31\n\nCreateTask\x12\x17.task.CreateTaskRequest\x1a\n.task.Task\x12\x35\n\x0c\x43ompleteTask\x12\x19.task.CompleteTaskRequest\x1a\n.task.Task\x12\x32\n\nDeleteTask\x12\x17.task.DeleteTaskRequest\x1a\x0b.task.Empty\x12+\n\x07GetTask\x12\x14.task.GetTaskRequest\x1a\n.task.Task\x12\x42\n\x0bGetAllTasks\x12\x18.task.GetAllTasksRequest\x1a\x19.task.GetAllTasksResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n!src/infrastructure/api/task.proto\x12\x04task\"\x07\n\x05\x45mpty\"\x88\x01\n\x04Task\x12\n\n\x02id\x18\x01 \x01(\t\x12\x18\n\x10\x63onfiguration_id\x18\x02 \x01(\t\x12\x13\n\x0blocation_id\x18\x03 \x01(\t\x12\x0f\n\x07user_id\x18\x04 \x01(\t\x12\x0f\n\x07role_id\x18\x05 \x01(\t\x12\x10\n\x08\x64ue_date\x18\x06 \x01(\x03\x12\x11\n\tcompleted\x18\x07 \x01(\x08\"v\n\x11\x43reateTaskRequest\x12\x18\n\x10\x63onfiguration_id\x18\x01 \x01(\t\x12\x13\n\x0blocation_id\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x0f\n\x07role_id\x18\x04 \x01(\t\x12\x10\n\x08\x64ue_date\x18\x05 \x01(\x03\"&\n\x13\x43ompleteTaskRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"$\n\x11\x44\x65leteTaskRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"!\n\x0eGetTaskRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"\xee\x01\n\x12GetAllTasksRequest\x12\x0c\n\x04page\x18\x01 \x01(\x05\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\x12\x13\n\x0blocation_id\x18\x05 \x01(\t\x12\x18\n\x10\x63onfiguration_id\x18\x06 \x01(\t\x12\x0f\n\x07user_id\x18\x07 \x01(\t\x12\x0f\n\x07role_id\x18\x08 \x01(\t\x12\x11\n\tdue_after\x18\t \x01(\x03\x12\x12\n\ndue_before\x18\n \x01(\x03\x12\x0f\n\x07sort_by\x18\x0b \x01(\t\x12\x12\n\nsort_order\x18\x0c \x01(\t\"E\n\x13GetAllTasksResponse\x12\x19\n\x05tasks\x18\x01 \x03(\x0b\x32\n.task.Task\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\t\"(\n\x12StreamTasksRequest\x12\x12\n\nbatch_size\x18\x01 \x01(\x05\"p\n\x11\x42\x61tchTasksRequest\x12\'\n\x06\x63reate\x18\x01 \x03(\x0b\x32\x17.task.CreateTaskRequest\x12\x19\n\x11\x63omplete_task_ids\x18\x02 \x03(\t\x12\x17\n\x0f\x64\x65lete_task_ids\x18\x03 \x03(\t\"j\n\x12\x42\x61tchTasksResponse\x12\x1b\n\x07\x63reated\x18\x01 \x03(\x0b\x32\n.task.Task\x12\x1d\n\tcompleted\x18\x02 \x03(\x0b\x32\n.task.Task\x12\x18\n\x10\x64\x65leted_task_ids\x18\x03 \x03(\t\"9\n\x11ProfileCpuRequest\x12\x0f\n\x07seconds\x18\x01 \x01(\x01\x12\x13\n\x0binterval_ms\x18\x02 \x01(\x01\".\n\x12ProfileCpuResponse\x12\x18\n\x10\x63ollapsed_stacks\x18\x01 \x01(\t\"/\n\x1dStartAllocationTracingRequest\x12\x0e\n\x06\x66rames\x18\x01 \x01(\x05\"<\n\x19\x41llocationSnapshotRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x10\n\x08group_by\x18\x02 \x01(\t\"r\n\x0e\x41llocationSite\x12\x10\n\x08location\x18\x01 \x03(\t\x12\x12\n\nsize_bytes\x18\x02 \x01(\x03\x12\r\n\x05\x63ount\x18\x03 \x01(\x03\x12\x17\n\x0fsize_diff_bytes\x18\x04 \x01(\x03\x12\x12\n\ncount_diff\x18\x05 \x01(\x03\"\x87\x01\n\x1a\x41llocationSnapshotResponse\x12\x14\n\x0ctraced_bytes\x18\x01 \x01(\x03\x12\x12\n\npeak_bytes\x18\x02 \x01(\x03\x12\x1c\n\x14\x63ompared_to_previous\x18\x03 \x01(\x08\x12!\n\x03top\x18\x04 \x03(\x0b\x32\x14.task.AllocationSite\"E\n\x17MeasureEventLoopRequest\x12\x0f\n\x07seconds\x18\x01 \x01(\x01\x12\x19\n\x11slow_threshold_ms\x18\x02 \x01(\x01\"D\n\x0cSlowCallback\x12\x12\n\nblocked_ms\x18\x01 \x01(\x01\x12\x11\n\toperation\x18\x02 \x01(\t\x12\r\n\x05stack\x18\x03 \x03(\t\"\xa8\x01\n\x18MeasureEventLoopResponse\x12\x0f\n\x07samples\x18\x01 \x01(\x05\x12\x13\n\x0blag_mean_ms\x18\x02 \x01(\x01\x12\x12\n\nlag_p50_ms\x18\x03 \x01(\x01\x12\x12\n\nlag_p99_ms\x18\x04 \x01(\x01\x12\x12\n\nlag_max_ms\x18\x05 \x01(\x01\x12*\n\x0eslow_callbacks\x18\x06 \x03(\x0b\x32\x12.task.SlowCallback2\x94\x03\n\x0bTaskService\x12\x31\n\nCreateTask\x12\x17.task.CreateTaskRequest\x1a\n.task.Task\x12\x35\n\x0c\x43ompleteTask\x12\x19.task.CompleteTaskRequest\x1a\n.task.Task\x12\x32\n\nDeleteTask\x12\x17.task.DeleteTaskRequest\x1a\x0b.task.Empty\x12+\n\x07GetTask\x12\x14.task.GetTaskRequest\x1a\n.task.Task\x12\x42\n\x0bGetAllTasks\x12\x18.task.GetAllTasksRequest\x1a\x19.task.GetAllTasksResponse\x12?\n\nBatchTasks\x12\x17.task.BatchTasksRequest\x1a\x18.task.BatchTasksResponse\x12\x35\n\x0bStreamTasks\x12\x18.task.StreamTasksRequest\x1a\n.task.Task0\x01\x32\xfd\x02\n\x0c\x41\x64minService\x12?\n\nProfileCpu\x12\x17.task.ProfileCpuRequest\x1a\x18.task.ProfileCpuResponse\x12J\n\x16StartAllocationTracing\x12#.task.StartAllocationTracingRequest\x1a\x0b.task.Empty\x12Z\n\x15GetAllocationSnapshot\x12\x1f.task.AllocationSnapshotRequest\x1a .task.AllocationSnapshotResponse\x12\x31\n\x15StopAllocationTracing\x12\x0b.task.Empty\x1a\x0b.task.Empty\x12Q\n\x10MeasureEventLoop\x12\x1d.task.MeasureEventLoopRequest\x1a\x1e.task.MeasureEventLoopResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -43,10 +43,36 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_DELETETASKREQUEST']._serialized_end=387
   _globals['_GETTASKREQUEST']._serialized_start=389
   _globals['_GETTASKREQUEST']._serialized_end=422
-  _globals['_GETALLTASKSREQUEST']._serialized_start=424
-  _globals['_GETALLTASKSREQUEST']._serialized_end=473
-  _globals['_GETALLTASKSRESPONSE']._serialized_start=475
-  _globals['_GETALLTASKSRESPONSE']._serialized_end=523
-  _globals['_TASKSERVICE']._serialized_start=526
-  _globals['_TASKSERVICE']._serialized_end=810
+  _globals['_GETALLTASKSREQUEST']._serialized_start=425
+  _globals['_GETALLTASKSREQUEST']._serialized_end=663
+  _globals['_GETALLTASKSRESPONSE']._serialized_start=665
+  _globals['_GETALLTASKSRESPONSE']._serialized_end=734
+  _globals['_STREAMTASKSREQUEST']._serialized_start=736
+  _globals['_STREAMTASKSREQUEST']._serialized_end=776
+  _globals['_BATCHTASKSREQUEST']._serialized_start=778
+  _globals['_BATCHTASKSREQUEST']._serialized_end=890
+  _globals['_BATCHTASKSRESPONSE']._serialized_start=892
+  _globals['_BATCHTASKSRESPONSE']._serialized_end=998
+  _globals['_PROFILECPUREQUEST']._serialized_start=1000
+  _globals['_PROFILECPUREQUEST']._serialized_end=1057
+  _globals['_PROFILECPURESPONSE']._serialized_start=1059
+  _globals['_PROFILECPURESPONSE']._serialized_end=1105
+  _globals['_STARTALLOCATIONTRACINGREQUEST']._serialized_start=1107
+  _globals['_STARTALLOCATIONTRACINGREQUEST']._serialized_end=1154
+  _globals['_ALLOCATIONSNAPSHOTREQUEST']._serialized_start=1156
+  _globals['_ALLOCATIONSNAPSHOTREQUEST']._serialized_end=1216
+  _globals['_ALLOCATIONSITE']._serialized_start=1218
+  _globals['_ALLOCATIONSITE']._serialized_end=1332
+  _globals['_ALLOCATIONSNAPSHOTRESPONSE']._serialized_start=1335
+  _globals['_ALLOCATIONSNAPSHOTRESPONSE']._serialized_end=1470
+  _globals['_MEASUREEVENTLOOPREQUEST']._serialized_start=1472
+  _globals['_MEASUREEVENTLOOPREQUEST']._serialized_end=1541
+  _globals['_SLOWCALLBACK']._serialized_start=1543
+  _globals['_SLOWCALLBACK']._serialized_end=1611
+  _globals['_MEASUREEVENTLOOPRESPONSE']._serialized_start=1614
+  _globals['_MEASUREEVENTLOOPRESPONSE']._serialized_end=1782
+  _globals['_TASKSERVICE']._serialized_start=1785
+  _globals['_TASKSERVICE']._serialized_end=2189
+  _globals['_ADMINSERVICE']._serialized_start=2192
+  _globals['_ADMINSERVICE']._serialized_end=2573
 # @@protoc_insertion_point(module_scope)
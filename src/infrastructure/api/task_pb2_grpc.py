@@ -59,6 +59,16 @@ class TaskServiceStub(object):
                 request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.GetAllTasksRequest.SerializeToString,
                 response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.GetAllTasksResponse.FromString,
                 _registered_method=True)
+        self.BatchTasks = channel.unary_unary(
+                '/task.TaskService/BatchTasks',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.BatchTasksRequest.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.BatchTasksResponse.FromString,
+                _registered_method=True)
+        self.StreamTasks = channel.unary_stream(
+                '/task.TaskService/StreamTasks',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.StreamTasksRequest.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.Task.FromString,
+                _registered_method=True)
 
 
 class TaskServiceServicer(object):
@@ -94,6 +104,18 @@ class TaskServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchTasks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamTasks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_TaskServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -122,6 +144,16 @@ def add_TaskServiceServicer_to_server(servicer, server):
                     request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.GetAllTasksRequest.FromString,
                     response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.GetAllTasksResponse.SerializeToString,
             ),
+            'BatchTasks': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchTasks,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.BatchTasksRequest.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.BatchTasksResponse.SerializeToString,
+            ),
+            'StreamTasks': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamTasks,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.StreamTasksRequest.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.Task.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'task.TaskService', rpc_method_handlers)
@@ -267,3 +299,304 @@ class TaskService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def BatchTasks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/task.TaskService/BatchTasks',
+            src_dot_infrastructure_dot_api_dot_task__pb2.BatchTasksRequest.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.BatchTasksResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamTasks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/task.TaskService/StreamTasks',
+            src_dot_infrastructure_dot_api_dot_task__pb2.StreamTasksRequest.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.Task.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class AdminServiceStub(object):
+    """Diagnostics of the serving process; calls need "authorization: Bearer <ADMIN_TOKEN>" metadata.
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ProfileCpu = channel.unary_unary(
+                '/task.AdminService/ProfileCpu',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.ProfileCpuRequest.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.ProfileCpuResponse.FromString,
+                _registered_method=True)
+        self.StartAllocationTracing = channel.unary_unary(
+                '/task.AdminService/StartAllocationTracing',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.StartAllocationTracingRequest.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.Empty.FromString,
+                _registered_method=True)
+        self.GetAllocationSnapshot = channel.unary_unary(
+                '/task.AdminService/GetAllocationSnapshot',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.AllocationSnapshotRequest.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.AllocationSnapshotResponse.FromString,
+                _registered_method=True)
+        self.StopAllocationTracing = channel.unary_unary(
+                '/task.AdminService/StopAllocationTracing',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.Empty.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.Empty.FromString,
+                _registered_method=True)
+        self.MeasureEventLoop = channel.unary_unary(
+                '/task.AdminService/MeasureEventLoop',
+                request_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.MeasureEventLoopRequest.SerializeToString,
+                response_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.MeasureEventLoopResponse.FromString,
+                _registered_method=True)
+
+
+class AdminServiceServicer(object):
+    """Diagnostics of the serving process; calls need "authorization: Bearer <ADMIN_TOKEN>" metadata.
+    """
+
+    def ProfileCpu(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StartAllocationTracing(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetAllocationSnapshot(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StopAllocationTracing(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def MeasureEventLoop(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AdminServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ProfileCpu': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProfileCpu,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.ProfileCpuRequest.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.ProfileCpuResponse.SerializeToString,
+            ),
+            'StartAllocationTracing': grpc.unary_unary_rpc_method_handler(
+                    servicer.StartAllocationTracing,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.StartAllocationTracingRequest.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.Empty.SerializeToString,
+            ),
+            'GetAllocationSnapshot': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetAllocationSnapshot,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.AllocationSnapshotRequest.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.AllocationSnapshotResponse.SerializeToString,
+            ),
+            'StopAllocationTracing': grpc.unary_unary_rpc_method_handler(
+                    servicer.StopAllocationTracing,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.Empty.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.Empty.SerializeToString,
+            ),
+            'MeasureEventLoop': grpc.unary_unary_rpc_method_handler(
+                    servicer.MeasureEventLoop,
+                    request_deserializer=src_dot_infrastructure_dot_api_dot_task__pb2.MeasureEventLoopRequest.FromString,
+                    response_serializer=src_dot_infrastructure_dot_api_dot_task__pb2.MeasureEventLoopResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'task.AdminService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('task.AdminService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class AdminService(object):
+    """Diagnostics of the serving process; calls need "authorization: Bearer <ADMIN_TOKEN>" metadata.
+    """
+
+    @staticmethod
+    def ProfileCpu(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/task.AdminService/ProfileCpu',
+            src_dot_infrastructure_dot_api_dot_task__pb2.ProfileCpuRequest.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.ProfileCpuResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StartAllocationTracing(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/task.AdminService/StartAllocationTracing',
+            src_dot_infrastructure_dot_api_dot_task__pb2.StartAllocationTracingRequest.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetAllocationSnapshot(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/task.AdminService/GetAllocationSnapshot',
+            src_dot_infrastructure_dot_api_dot_task__pb2.AllocationSnapshotRequest.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.AllocationSnapshotResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StopAllocationTracing(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/task.AdminService/StopAllocationTracing',
+            src_dot_infrastructure_dot_api_dot_task__pb2.Empty.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def MeasureEventLoop(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/task.AdminService/MeasureEventLoop',
+            src_dot_infrastructure_dot_api_dot_task__pb2.MeasureEventLoopRequest.SerializeToString,
+            src_dot_infrastructure_dot_api_dot_task__pb2.MeasureEventLoopResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
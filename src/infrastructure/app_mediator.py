@@ -1,28 +1,63 @@
 
 import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
 from aiobreaker import CircuitBreaker, CircuitBreakerListener
 from src.application.commands_queries import (
     CreateTaskCommand,
     CompleteTaskCommand,
     DeleteTaskCommand,
+    CreateTasksCommand,
+    CompleteTasksCommand,
+    DeleteTasksCommand,
     GetTaskQuery,
     GetAllTasksQuery,
+    StreamTasksQuery,
 )
 from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.pagination import TaskPage
 from src.domain.events import TaskCreatedEvent, TaskCompletedEvent, TaskDeletedEvent
 from src.domain.repository import TaskRepository
 from src.domain.event_sender import EventSender
+from src.domain.outbox import OutboxMessage
 from src.config import config
+from src.infrastructure.concurrency import deadline
+from src.infrastructure.concurrency.bulkhead import Bulkhead
+from src.infrastructure.concurrency.deadline import DeadlineExceededError
+from src.infrastructure.concurrency.single_flight import SingleFlight
+from src.infrastructure.messaging.outbox_relay import OutboxRelay
 from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.monitoring.metrics import (
+    CIRCUIT_BREAKER_STATE,
+    CIRCUIT_BREAKER_TRANSITIONS,
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+)
+from src.infrastructure.monitoring.profiler import operation_frame
+from src.infrastructure.monitoring.tracing import tracer
+from src.infrastructure.persistence.batching_repository import BatchLoadError
+from src.infrastructure.scheduling.due_date_scheduler import DueDateScheduler
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Exported value of the circuit breaker state gauge
+BREAKER_STATE_VALUES = {"closed": 0.0, "half_open": 0.5, "open": 1.0}
+
 class CircuitBreakerLogger(CircuitBreakerListener):
     def __init__(self, name):
         self._name = name
+        self._label = name.lower().replace(" ", "_")
 
     def state_change(self, cb, old_state, new_state):
-        logger.info(f"{self._name} circuit breaker state changed from {old_state} to {new_state}")
+        logger.info("%s circuit breaker state changed from %s to %s", self._name, old_state, new_state)
+        old_name = old_state.state.name.lower() if old_state is not None else "none"
+        new_name = new_state.state.name.lower()
+        CIRCUIT_BREAKER_TRANSITIONS.labels(self._label, old_name, new_name).inc()
+        CIRCUIT_BREAKER_STATE.labels(self._label).set(BREAKER_STATE_VALUES[new_name])
 
 class AppMediator:
     def __init__(
@@ -30,37 +65,80 @@ class AppMediator:
         task_repository: TaskRepository,
         event_sender: EventSender,
         circuit_breaker_monitor: CircuitBreakerMonitor,
+        outbox_relay: Optional[OutboxRelay] = None,
+        scheduler: Optional[DueDateScheduler] = None,
     ):
         self._task_repository = task_repository
         self._event_sender = event_sender
-        self._repository_breaker = CircuitBreaker(
-            fail_max=config.CIRCUIT_BREAKER_FAIL_MAX,
-            timeout_duration=config.CIRCUIT_BREAKER_TIMEOUT_DURATION,
+        self._outbox_relay = outbox_relay
+        self._scheduler = scheduler
+        # Point reads, list scans and writes each get their own breaker and concurrency limit,
+        # so a burst of slow scans can neither trip the breaker of nor crowd out task creation
+        self._read_bulkhead = self._repository_bulkhead(
+            "repository_read", config.REPOSITORY_READ_CONCURRENCY, config.REPOSITORY_READ_QUEUE
+        )
+        self._scan_bulkhead = self._repository_bulkhead(
+            "repository_scan", config.REPOSITORY_SCAN_CONCURRENCY, config.REPOSITORY_SCAN_QUEUE
+        )
+        self._write_bulkhead = self._repository_bulkhead(
+            "repository_write", config.REPOSITORY_WRITE_CONCURRENCY, config.REPOSITORY_WRITE_QUEUE
         )
         self._event_sender_breaker = CircuitBreaker(
             fail_max=config.CIRCUIT_BREAKER_FAIL_MAX,
             timeout_duration=config.CIRCUIT_BREAKER_TIMEOUT_DURATION,
+            exclude=[DeadlineExceededError],
         )
 
-        circuit_breaker_monitor.register("repository", self._repository_breaker)
+        # Writes and point reads are what the service is for; without scans it is only degraded
+        for bulkhead in (self._read_bulkhead, self._scan_bulkhead, self._write_bulkhead):
+            circuit_breaker_monitor.register(bulkhead.name, bulkhead.breaker, critical=bulkhead is not self._scan_bulkhead)
         circuit_breaker_monitor.register("event_sender", self._event_sender_breaker)
-
-        self._repository_breaker.add_listener(CircuitBreakerLogger("Repository"))
         self._event_sender_breaker.add_listener(CircuitBreakerLogger("Event Sender"))
+        if outbox_relay is not None:
+            outbox_relay.use_breaker(self._event_sender_breaker)
+        if scheduler is not None:
+            scheduler.use_publisher(self.publish_once)
 
         self._command_handlers = {
             CreateTaskCommand: self._handle_create_task,
             CompleteTaskCommand: self._handle_complete_task,
             DeleteTaskCommand: self._handle_delete_task,
+            CreateTasksCommand: self._handle_create_tasks,
+            CompleteTasksCommand: self._handle_complete_tasks,
+            DeleteTasksCommand: self._handle_delete_tasks,
         }
         self._query_handlers = {
             GetTaskQuery: self._handle_get_task,
             GetAllTasksQuery: self._handle_get_all_tasks,
+            StreamTasksQuery: self._handle_stream_tasks,
+        }
+        # Metric children are looked up once so the hot path only does the update
+        self._handler_metrics = {}
+        for kind, handlers in (("command", self._command_handlers), ("query", self._query_handlers)):
+            for message_type in handlers:
+                labels = (kind, message_type.__name__)
+                self._handler_metrics[message_type] = (HANDLER_DURATION.labels(*labels), HANDLER_ERRORS.labels(*labels))
+        # Concurrent identical queries of these types share a single backend call
+        self._single_flights = {
+            query_type: SingleFlight()
+            for query_type in self._query_handlers
+            if query_type.__name__ in config.SINGLE_FLIGHT_QUERIES
         }
 
-    async def _handle_create_task(self, command: CreateTaskCommand) -> Task:
-        logger.info(f"Handling CreateTaskCommand for config: {command.configuration_id}")
-        task = Task(
+    def _repository_bulkhead(self, name: str, max_concurrent: int, max_queued: int) -> Bulkhead:
+        breaker = CircuitBreaker(
+            fail_max=config.CIRCUIT_BREAKER_FAIL_MAX,
+            timeout_duration=config.CIRCUIT_BREAKER_TIMEOUT_DURATION,
+            # Invalid client input such as a malformed cursor is not a repository outage,
+            # and neither is a caller's deadline running out; a failed batch lookup
+            # counts once, for the one caller that gets its original error
+            exclude=[ValueError, DeadlineExceededError, BatchLoadError],
+        )
+        breaker.add_listener(CircuitBreakerLogger(name.replace("_", " ").capitalize()))
+        return Bulkhead(name, breaker, max_concurrent, max_queued, config.LOAD_SHEDDING_RETRY_AFTER)
+
+    def _new_task(self, command: CreateTaskCommand) -> Task:
+        return Task(
             status="created",
             configuration_id=command.configuration_id,
             location_id=command.location_id,
@@ -68,60 +146,216 @@ class AppMediator:
             role_id=command.role_id,
             due_date=command.due_date,
         )
-        created_task = await self._repository_breaker.call_async(self._task_repository.create, task)
-        event = TaskCreatedEvent(
-            task_id=created_task.id,
-            configuration_id=created_task.configuration_id,
-            location_id=created_task.location_id,
-            user_id=created_task.user_id,
-            role_id=created_task.role_id,
-            due_date=created_task.due_date,
-            status=created_task.status,
+
+    def _task_created_event(self, task: Task) -> TaskCreatedEvent:
+        return TaskCreatedEvent(
+            task_id=task.id,
+            configuration_id=task.configuration_id,
+            location_id=task.location_id,
+            user_id=task.user_id,
+            role_id=task.role_id,
+            due_date=task.due_date,
+            status=task.status,
+        )
+
+    async def _write(self, events_for: Callable[[T], List], write: Callable[..., Awaitable[T]], *args) -> T:
+        """Runs a repository write and publishes the events `events_for` derives from its result.
+
+        With an outbox the events are stored atomically with the write, in the same
+        write slot, so a task is never stored without its events and a command
+        never queues twice for the write bulkhead; the relay delivers them later,
+        still as part of the request's trace.
+        """
+        if self._outbox_relay is None:
+            result = await self._write_bulkhead.call(write, *args)
+            events = events_for(result)
+            if events:
+                await self._event_sender_breaker.call_async(self._event_sender.send_batch, events)
+            return result
+        trace_parent = tracer.current_traceparent()
+
+        async def write_and_record():
+            result = await write(*args)
+            events = events_for(result)
+            if events:
+                messages = [OutboxMessage.from_event(event, trace_parent) for event in events]
+                await self._task_repository.add_outbox_messages(messages)
+            return result
+
+        result = await self._write_bulkhead.call(self._task_repository.atomically, write_and_record)
+        self._outbox_relay.notify()
+        return result
+
+    async def publish_once(self, events: Dict[str, object], now: datetime, expires_at: datetime) -> List[str]:
+        """Publishes the events whose key no other instance has claimed yet and returns those keys.
+
+        The claims are written like any other command's write, together with
+        the outbox messages of the events, so racing instances emit each event once.
+        """
+        return await self._write(
+            lambda claimed: [events[key] for key in claimed],
+            self._task_repository.claim_emissions,
+            list(events),
+            now,
+            expires_at,
+        )
+
+    def _check_batch_size(self, size: int):
+        if size > config.BATCH_MAX_SIZE:
+            raise ValueError(f"Batch of {size} exceeds the maximum of {config.BATCH_MAX_SIZE}")
+
+    async def _handle_create_task(self, command: CreateTaskCommand) -> Task:
+        logger.info("Handling CreateTaskCommand for config: %s", command.configuration_id)
+        task = self._new_task(command)
+        created_task = await self._write(
+            lambda created: [self._task_created_event(created)], self._task_repository.create, task
         )
-        await self._event_sender_breaker.call_async(self._event_sender.send, event)
-        logger.info(f"Task created successfully with ID: {created_task.id}")
+        if self._scheduler:
+            self._scheduler.schedule([created_task])
+        logger.info("Task created successfully with ID: %s", created_task.id)
         return created_task
 
     async def _handle_complete_task(self, command: CompleteTaskCommand) -> Task:
-        logger.info(f"Handling CompleteTaskCommand for task: {command.task_id}")
-        task = await self._repository_breaker.call_async(self._task_repository.get_by_id, command.task_id)
+        logger.info("Handling CompleteTaskCommand for task: %s", command.task_id)
+        if command.lease_owner:
+            return await self._complete_leased_task(command)
+        task = await self._read_bulkhead.call(self._task_repository.get_by_id, command.task_id)
         if task:
             task.status = "completed"
-            updated_task = await self._repository_breaker.call_async(self._task_repository.update, task)
-            event = TaskCompletedEvent(task_id=updated_task.id)
-            await self._event_sender_breaker.call_async(self._event_sender.send, event)
-            logger.info(f"Task {command.task_id} completed successfully")
+            updated_task = await self._write(
+                lambda updated: [TaskCompletedEvent(task_id=updated.id)], self._task_repository.update, task
+            )
+            if self._scheduler:
+                self._scheduler.cancel([updated_task.id])
+            logger.info("Task %s completed successfully", command.task_id)
             return updated_task
-        logger.warning(f"Task {command.task_id} not found for completion")
+        logger.warning("Task %s not found for completion", command.task_id)
         return None
 
+    async def _complete_leased_task(self, command: CompleteTaskCommand) -> Optional[Task]:
+        released = await self._write(
+            lambda released: [TaskCompletedEvent(task_id=command.task_id)] if released else [],
+            self._task_repository.release_lease,
+            command.task_id,
+            command.lease_owner,
+            "completed",
+        )
+        if not released:
+            logger.warning("Task %s lease no longer held by %s", command.task_id, command.lease_owner)
+            return None
+        if self._scheduler:
+            self._scheduler.cancel([command.task_id])
+        logger.info("Task %s completed by worker %s", command.task_id, command.lease_owner)
+        return await self._read_bulkhead.call(self._task_repository.get_by_id, command.task_id)
+
     async def _handle_delete_task(self, command: DeleteTaskCommand):
-        logger.info(f"Handling DeleteTaskCommand for task: {command.task_id}")
-        await self._repository_breaker.call_async(self._task_repository.delete, command.task_id)
-        event = TaskDeletedEvent(task_id=command.task_id)
-        await self._event_sender_breaker.call_async(self._event_sender.send, event)
-        logger.info(f"Task {command.task_id} deleted successfully")
+        logger.info("Handling DeleteTaskCommand for task: %s", command.task_id)
+        await self._write(
+            lambda _: [TaskDeletedEvent(task_id=command.task_id)], self._task_repository.delete, command.task_id
+        )
+        if self._scheduler:
+            self._scheduler.cancel([command.task_id])
+        logger.info("Task %s deleted successfully", command.task_id)
+
+    async def _handle_create_tasks(self, command: CreateTasksCommand) -> List[Task]:
+        logger.info("Handling CreateTasksCommand for %s tasks", len(command.tasks))
+        self._check_batch_size(len(command.tasks))
+        tasks = [self._new_task(task_command) for task_command in command.tasks]
+        created_tasks = await self._write(
+            lambda created: [self._task_created_event(task) for task in created],
+            self._task_repository.create_many,
+            tasks,
+        )
+        if self._scheduler:
+            self._scheduler.schedule(created_tasks)
+        logger.info("%s tasks created successfully", len(created_tasks))
+        return created_tasks
+
+    async def _handle_complete_tasks(self, command: CompleteTasksCommand) -> List[Task]:
+        logger.info("Handling CompleteTasksCommand for %s tasks", len(command.task_ids))
+        self._check_batch_size(len(command.task_ids))
+        # One lookup for the whole batch, in one read slot
+        found_tasks = await self._read_bulkhead.call(self._task_repository.get_many, command.task_ids)
+        tasks = [found_tasks[task_id] for task_id in dict.fromkeys(command.task_ids) if task_id in found_tasks]
+        for task in tasks:
+            task.status = "completed"
+        updated_tasks = await self._write(
+            lambda updated: [TaskCompletedEvent(task_id=task.id) for task in updated],
+            self._task_repository.update_many,
+            tasks,
+        )
+        if self._scheduler:
+            self._scheduler.cancel([task.id for task in updated_tasks])
+        logger.info("%s of %s tasks completed successfully", len(updated_tasks), len(command.task_ids))
+        return updated_tasks
+
+    async def _handle_delete_tasks(self, command: DeleteTasksCommand):
+        logger.info("Handling DeleteTasksCommand for %s tasks", len(command.task_ids))
+        self._check_batch_size(len(command.task_ids))
+        await self._write(
+            lambda _: [TaskDeletedEvent(task_id=task_id) for task_id in command.task_ids],
+            self._task_repository.delete_many,
+            command.task_ids,
+        )
+        if self._scheduler:
+            self._scheduler.cancel(command.task_ids)
+        logger.info("%s tasks deleted successfully", len(command.task_ids))
 
     async def _handle_get_task(self, query: GetTaskQuery) -> Task:
-        logger.info(f"Handling GetTaskQuery for task: {query.task_id}")
-        return await self._repository_breaker.call_async(self._task_repository.get_by_id, query.task_id)
+        logger.info("Handling GetTaskQuery for task: %s", query.task_id)
+        return await self._read_bulkhead.call(self._task_repository.get_by_id, query.task_id)
+
+    async def _handle_get_all_tasks(self, query: GetAllTasksQuery) -> TaskPage:
+        logger.info("Handling GetAllTasksQuery with page: %s, limit: %s, cursor: %s", query.page, query.limit, query.cursor)
+        filters = TaskFilter(**query.model_dump(include=set(TaskFilter.model_fields)))
+        sort = TaskSort(field=query.sort_by, descending=query.sort_order == "desc")
+        return await self._scan_bulkhead.call(
+            self._task_repository.get_all, query.page, query.limit, query.cursor, filters, sort
+        )
 
-    async def _handle_get_all_tasks(self, query: GetAllTasksQuery):
-        logger.info(f"Handling GetAllTasksQuery with page: {query.page}, limit: {query.limit}")
-        return await self._repository_breaker.call_async(self._task_repository.get_all, query.page, query.limit)
+    async def _handle_stream_tasks(self, query: StreamTasksQuery) -> AsyncIterator[Task]:
+        logger.info("Handling StreamTasksQuery with batch size: %s", query.batch_size)
+        return self._scan_bulkhead.iterate(self._task_repository.stream_all(query.batch_size))
+
+    @operation_frame("message")
+    async def _measure(self, message, call):
+        duration, errors = self._handler_metrics[type(message)]
+        start = time.perf_counter()
+        try:
+            with tracer.start_span(type(message).__name__):
+                return await call()
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
 
     async def handle_command(self, command):
         handler = self._command_handlers.get(type(command))
         if handler:
-            logger.debug(f"Routing {type(command).__name__} to handler")
-            return await handler(command)
-        logger.error(f"No handler found for {type(command).__name__}")
+            logger.debug("Routing %s to handler", type(command).__name__)
+            # The deadline is only checked before a command starts: once it has written, it
+            # runs to the end, so a task is never stored without its event
+            deadline.check("mediator")
+            return await self._measure(command, lambda: handler(command))
+        logger.error("No handler found for %s", type(command).__name__)
         raise ValueError(f"No handler found for {type(command).__name__}")
 
+    def get_single_flight_metrics(self) -> dict:
+        return {query_type.__name__: flight.get_metrics() for query_type, flight in self._single_flights.items()}
+
     async def handle_query(self, query):
         handler = self._query_handlers.get(type(query))
         if handler:
-            logger.debug(f"Routing {type(query).__name__} to handler")
-            return await handler(query)
-        logger.error(f"No handler found for {type(query).__name__}")
+            logger.debug("Routing %s to handler", type(query).__name__)
+            single_flight = self._single_flights.get(type(query))
+            if single_flight:
+                key = query.model_dump_json()
+                call = lambda: single_flight.do(key, lambda: handler(query))
+            else:
+                call = lambda: handler(query)
+            # Queries have no side effects, so they are cut off as soon as the deadline passes;
+            # a shared single-flight call keeps running for the callers still waiting on it
+            return await self._measure(query, lambda: deadline.bounded("mediator", call))
+        logger.error("No handler found for %s", type(query).__name__)
         raise ValueError(f"No handler found for {type(query).__name__}")
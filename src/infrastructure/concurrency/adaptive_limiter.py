@@ -0,0 +1,107 @@
+
+import math
+import time
+from typing import Awaitable, Callable, Hashable
+from src.infrastructure.concurrency.deadline import DeadlineExceededError
+from src.infrastructure.monitoring.metrics import CONCURRENCY_IN_FLIGHT, CONCURRENCY_LIMIT, LOAD_SHED
+
+class OverloadedError(Exception):
+    """Raised when a request is rejected because the concurrency limit is reached."""
+
+    def __init__(self, kind: str, limit: int, retry_after: float):
+        super().__init__(f"Too many concurrent {kind} requests (limit {limit}); retry in {retry_after:g}s")
+        self.kind = kind
+        self.limit = limit
+        self.retry_after = retry_after
+
+class AdaptiveConcurrencyLimiter:
+    """Caps concurrent calls at a limit that follows the observed latency.
+
+    Each call's latency is compared with a slow-moving average for its key
+    (the message type), so fast and slow request types can share one limiter.
+    While recent calls run at up to `tolerance` times their usual latency the
+    limit grows by about its square root per call, as long as it is being used;
+    beyond that it shrinks in proportion, by at most half per call. Only
+    successful calls are sampled, as fast failures such as invalid input or an
+    open breaker would drag the averages down; calls that run out of time
+    shrink the limit like the slowest calls do. Calls over the limit fail
+    right away with OverloadedError instead of queueing.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        initial_limit: int = 100,
+        min_limit: int = 10,
+        max_limit: int = 1000,
+        tolerance: float = 2.0,
+        retry_after: float = 1.0,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+        short_window: int = 10,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.kind = kind
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._tolerance = tolerance
+        self._retry_after = retry_after
+        self._smoothing = smoothing
+        self._long_alpha = 1 / long_window
+        self._short_alpha = 1 / short_window
+        self._clock = clock
+        self._baselines = {}
+        self._recent_ratio = 1.0
+        self._in_flight = 0
+        self._rejected = 0
+        self._limit_gauge = CONCURRENCY_LIMIT.labels(kind)
+        self._in_flight_gauge = CONCURRENCY_IN_FLIGHT.labels(kind)
+        self._shed_counter = LOAD_SHED.labels(kind)
+        self._limit_gauge.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def get_metrics(self) -> dict:
+        return {"limit": self.limit, "in_flight": self._in_flight, "rejected_total": self._rejected}
+
+    def _record(self, key: Hashable, latency: float, in_flight: int):
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            baseline = latency
+        self._baselines[key] = baseline + (latency - baseline) * self._long_alpha
+        ratio = latency / baseline if baseline > 0 else 1.0
+        self._recent_ratio += (ratio - self._recent_ratio) * self._short_alpha
+
+        self._adjust(max(0.5, min(1.0, self._tolerance / self._recent_ratio)), in_flight)
+
+    def _adjust(self, gradient: float, in_flight: int):
+        # Only a limit that is actually reached is allowed to grow
+        headroom = math.sqrt(self._limit) if in_flight * 2 >= self._limit else 0.0
+        target = self._limit * gradient + headroom
+        limit = self._limit + (target - self._limit) * self._smoothing
+        self._limit = max(self._min_limit, min(self._max_limit, limit))
+        self._limit_gauge.set(self.limit)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable]):
+        if self._in_flight >= self.limit:
+            self._rejected += 1
+            self._shed_counter.inc()
+            raise OverloadedError(self.kind, self.limit, self._retry_after)
+        self._in_flight += 1
+        self._in_flight_gauge.set(self._in_flight)
+        in_flight = self._in_flight
+        start = self._clock()
+        try:
+            result = await call()
+        except (DeadlineExceededError, TimeoutError):
+            self._adjust(0.5, in_flight)
+            raise
+        else:
+            self._record(key, self._clock() - start, in_flight)
+            return result
+        finally:
+            self._in_flight -= 1
+            self._in_flight_gauge.set(self._in_flight)
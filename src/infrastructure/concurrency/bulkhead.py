@@ -0,0 +1,79 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable
+from aiobreaker import CircuitBreaker
+from src.infrastructure.concurrency import deadline
+from src.infrastructure.concurrency.adaptive_limiter import OverloadedError
+from src.infrastructure.monitoring.metrics import BULKHEAD_IN_FLIGHT, BULKHEAD_QUEUED, BULKHEAD_REJECTED
+
+_EXHAUSTED = object()
+
+async def _next_item(iterator: AsyncIterator):
+    # The end of the iterator is returned rather than raised, so the breaker does not count it as a failure
+    try:
+        return await anext(iterator)
+    except StopAsyncIteration:
+        return _EXHAUSTED
+
+class Bulkhead:
+    """Isolates one class of calls to a dependency behind its own breaker and concurrency limit.
+
+    At most `max_concurrent` calls run at once and up to `max_queued` more wait
+    for a slot, for no longer than their deadline; beyond that calls fail right
+    away with OverloadedError. Failures only count towards this bulkhead's
+    breaker, so one slow or failing class of calls cannot take the
+    connections or the breaker state of the others.
+    """
+
+    def __init__(self, name: str, breaker: CircuitBreaker, max_concurrent: int, max_queued: int, retry_after: float = 1.0):
+        self.name = name
+        self.breaker = breaker
+        self._max_concurrent = max_concurrent
+        self._max_queued = max_queued
+        self._retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._in_flight = 0
+        self._queued = 0
+        self._in_flight_gauge = BULKHEAD_IN_FLIGHT.labels(name)
+        self._queued_gauge = BULKHEAD_QUEUED.labels(name)
+        self._rejected_counter = BULKHEAD_REJECTED.labels(name)
+
+    async def call(self, fn: Callable[..., Awaitable], *args):
+        if self._slots.locked():
+            await self._wait_for_slot()
+        else:
+            await self._slots.acquire()
+        self._in_flight += 1
+        self._in_flight_gauge.set(self._in_flight)
+        try:
+            return await self.breaker.call_async(fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._in_flight_gauge.set(self._in_flight)
+            self._slots.release()
+
+    async def iterate(self, iterator: AsyncIterator) -> AsyncIterator:
+        """Yields from `iterator`, counting failures while reading it towards this bulkhead's breaker.
+
+        Only the first item, which opens the cursor, waits for a slot; the rest are
+        paced by the consumer, and holding a slot for them would let slow consumers
+        take every slot.
+        """
+        try:
+            item = await self.call(_next_item, iterator)
+            while item is not _EXHAUSTED:
+                yield item
+                item = await self.breaker.call_async(_next_item, iterator)
+        finally:
+            await iterator.aclose()
+
+    async def _wait_for_slot(self):
+        if self._queued >= self._max_queued:
+            self._rejected_counter.inc()
+            raise OverloadedError(self.name.replace("_", " "), self._max_concurrent, self._retry_after)
+        self._queued += 1
+        self._queued_gauge.set(self._queued)
+        try:
+            await deadline.bounded("bulkhead", self._slots.acquire)
+        finally:
+            self._queued -= 1
+            self._queued_gauge.set(self._queued)
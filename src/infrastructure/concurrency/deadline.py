@@ -0,0 +1,75 @@
+import asyncio
+import contextlib
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+from src.infrastructure.monitoring.metrics import DEADLINE_EXCEEDED
+
+# Absolute time.monotonic() by which the current request must be answered, or None without one
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceededError(Exception):
+    """Raised when a request's deadline passes before, or while, one of its stages runs."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded in {stage}")
+        self.stage = stage
+
+def exceeded(stage: str) -> DeadlineExceededError:
+    """Counts an expired deadline at `stage` and returns the error to raise for it."""
+    DEADLINE_EXCEEDED.labels(stage).inc()
+    return DeadlineExceededError(stage)
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, negative once it has passed, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+@contextlib.contextmanager
+def deadline_after(timeout: Optional[float]):
+    """Sets the deadline `timeout` seconds from now for the block, unless an earlier one is already set."""
+    if timeout is None:
+        yield
+        return
+    deadline = time.monotonic() + timeout
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+async def detached(call: Callable[[], Awaitable]):
+    """Awaits `call()` without a deadline, for work shared by callers that each have their own.
+
+    Tasks start with a copy of their creator's context, so work started by one
+    caller on behalf of others would otherwise run under that caller's budget.
+    """
+    token = _deadline.set(None)
+    try:
+        return await call()
+    finally:
+        _deadline.reset(token)
+
+def check(stage: str):
+    """Fails fast before starting `stage` when the deadline has already passed."""
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        raise exceeded(stage)
+
+async def bounded(stage: str, call: Callable[[], Awaitable]):
+    """Awaits `call()`, cancelling it and raising DeadlineExceededError when the deadline passes first."""
+    budget = remaining()
+    if budget is None:
+        return await call()
+    if budget <= 0:
+        raise exceeded(stage)
+    scope = asyncio.timeout(budget)
+    try:
+        async with scope:
+            return await call()
+    except TimeoutError:
+        # Timeouts of the call's own are passed on unchanged
+        if scope.expired():
+            raise exceeded(stage) from None
+        raise
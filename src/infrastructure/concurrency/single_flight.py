@@ -0,0 +1,43 @@
+
+import asyncio
+from typing import Awaitable, Callable, Hashable
+from src.infrastructure.concurrency import deadline
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers asking for the same key.
+
+    The call runs in its own task, so a caller that gives up (for example a
+    disconnected client) does not cancel the work the other callers wait on.
+    For the same reason it runs without a deadline; each caller only waits
+    for it until its own deadline.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._calls = 0
+        self._shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        self._calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(deadline.detached(fn))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._shared += 1
+        return await deadline.bounded("single_flight", lambda: asyncio.shield(task))
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved even if every caller gave up
+            task.exception()
+
+    def get_metrics(self) -> dict:
+        return {
+            "calls_total": self._calls,
+            "shared_total": self._shared,
+            "coalescing_ratio": self._shared / self._calls if self._calls else 0.0,
+        }
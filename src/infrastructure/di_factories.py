@@ -1,24 +1,87 @@
 
 from dependency_injector import providers, containers
 from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.concurrency.adaptive_limiter import AdaptiveConcurrencyLimiter
+from src.infrastructure.load_shedding_mediator import LoadSheddingMediator
 from src.infrastructure.persistence.mongo_repository import MongoTaskRepository
+from src.infrastructure.persistence.memory_repository import MemoryTaskRepository
+from src.infrastructure.persistence.sqlite_repository import SqliteTaskRepository
 from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.mocks.latency_repository import LatencyInjectingTaskRepository
 from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
 from src.infrastructure.messaging.nats_event_sender import NatsEventSender
+from src.infrastructure.messaging.outbox_relay import OutboxRelay
+from src.infrastructure.messaging.nats_cache_invalidator import NatsCacheInvalidator
+from src.infrastructure.persistence.batching_repository import BatchingTaskRepository
+from src.infrastructure.persistence.cached_repository import CachedTaskRepository
+from src.infrastructure.persistence.instrumented_repository import InstrumentedTaskRepository
+from src.infrastructure.messaging.instrumented_event_sender import InstrumentedEventSender
+from src.infrastructure.scheduling.due_date_scheduler import DueDateScheduler
+from src.infrastructure.workers.task_worker_pool import TaskWorkerPool, load_handler
 from src.domain.event_sender import EventSender
 from src.config import config
 from src.domain.mediator import Mediator
 from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.monitoring.health_monitor import HealthMonitor
+from src.infrastructure.monitoring.profiler import Profiler
 
 class Container(containers.DeclarativeContainer):
     circuit_breaker_monitor = providers.Singleton(CircuitBreakerMonitor)
+    profiler = providers.Singleton(Profiler, max_seconds=config.PROFILING_MAX_SECONDS)
+    health_monitor = providers.Singleton(
+        HealthMonitor,
+        circuit_breaker_monitor=circuit_breaker_monitor,
+        interval=config.HEALTH_CHECK_INTERVAL,
+        timeout=config.HEALTH_CHECK_TIMEOUT,
+    )
 
-    task_repository = providers.Selector(
+    mock_repository = providers.Singleton(MockTaskRepository)
+    task_repository_backend = providers.Selector(
         providers.Object(config.REPOSITORY_TYPE),
-        mongo=providers.Singleton(MongoTaskRepository, connection_string=config.MONGO_CONNECTION_STRING),
-        mock=providers.Singleton(MockTaskRepository),
+        mongo=providers.Singleton(
+            MongoTaskRepository,
+            connection_string=config.MONGO_CONNECTION_STRING,
+            max_pool_size=config.MONGO_MAX_POOL_SIZE,
+            min_pool_size=config.MONGO_MIN_POOL_SIZE,
+            compressors=config.MONGO_COMPRESSORS,
+            prewarm=config.MONGO_PREWARM,
+            ensure_indexes=config.MONGO_ENSURE_INDEXES,
+        ),
+        memory=providers.Singleton(
+            MemoryTaskRepository,
+            snapshot_path=config.MEMORY_SNAPSHOT_PATH,
+            snapshot_interval=config.MEMORY_SNAPSHOT_INTERVAL,
+            journal_flush_interval=config.MEMORY_JOURNAL_FLUSH_INTERVAL,
+        ),
+        sqlite=providers.Singleton(
+            SqliteTaskRepository,
+            path=config.SQLITE_PATH,
+            read_threads=config.SQLITE_READ_THREADS,
+            max_batch_size=config.SQLITE_WRITE_BATCH_SIZE,
+            synchronous=config.SQLITE_SYNCHRONOUS,
+        ),
+        # A nonzero latency stands in for a database round trip in load benchmarks
+        mock=providers.Singleton(
+            LatencyInjectingTaskRepository,
+            inner=mock_repository,
+            latency=config.MOCK_REPOSITORY_LATENCY,
+        ) if config.MOCK_REPOSITORY_LATENCY else mock_repository,
     )
-    event_sender = providers.Selector(
+    # Measured below the loader and cache, so the metrics show actual backend calls
+    instrumented_repository = providers.Singleton(InstrumentedTaskRepository, inner=task_repository_backend)
+    task_loader = providers.Singleton(
+        BatchingTaskRepository,
+        inner=instrumented_repository,
+        batch_window=config.TASK_LOADER_BATCH_WINDOW,
+        max_batch_size=config.TASK_LOADER_MAX_BATCH_SIZE,
+    ) if config.TASK_LOADER_ENABLED else instrumented_repository
+    task_repository = providers.Singleton(
+        CachedTaskRepository,
+        inner=task_loader,
+        max_size=config.TASK_CACHE_MAX_SIZE,
+        ttl_seconds=config.TASK_CACHE_TTL_SECONDS,
+    ) if config.TASK_CACHE_ENABLED else task_loader
+    event_sender_backend = providers.Selector(
         providers.Object(config.EVENT_SENDER_TYPE),
         mock=providers.Singleton(MockDomainEventSender),
         nats=providers.Singleton(
@@ -26,11 +89,81 @@ class Container(containers.DeclarativeContainer):
             nats_url=config.NATS_URL,
             subject=config.NATS_SUBJECT,
             stream_name=config.NATS_STREAM_NAME,
+            queue_size=config.NATS_PUBLISH_QUEUE_SIZE,
+            max_in_flight=config.NATS_PUBLISH_MAX_IN_FLIGHT,
+            batch_size=config.NATS_PUBLISH_BATCH_SIZE,
+            ack_timeout=config.NATS_PUBLISH_ACK_TIMEOUT,
+            max_retries=config.NATS_PUBLISH_MAX_RETRIES,
+            shutdown_timeout=config.NATS_SHUTDOWN_FLUSH_TIMEOUT,
         ),
     )
-    mediator: providers.Singleton[Mediator] = providers.Singleton(
+    event_sender = providers.Singleton(InstrumentedEventSender, inner=event_sender_backend)
+    # Other replicas announce completions and deletions on the event stream
+    cache_invalidator = providers.Singleton(
+        NatsCacheInvalidator,
+        cache=task_repository,
+        nats_url=config.NATS_URL,
+        subject=config.NATS_SUBJECT,
+    ) if config.TASK_CACHE_ENABLED and config.EVENT_SENDER_TYPE == "nats" else providers.Object(None)
+    outbox_relay = providers.Singleton(
+        OutboxRelay,
+        task_repository=task_repository,
+        event_sender=event_sender,
+        batch_size=config.OUTBOX_BATCH_SIZE,
+        poll_interval=config.OUTBOX_POLL_INTERVAL,
+        max_retry_delay=config.OUTBOX_MAX_RETRY_DELAY,
+        lease_seconds=config.OUTBOX_LEASE_SECONDS,
+    ) if config.OUTBOX_ENABLED else providers.Object(None)
+    scheduler = providers.Singleton(
+        DueDateScheduler,
+        task_repository=task_repository,
+        horizon=config.SCHEDULER_HORIZON_SECONDS,
+        overdue_after=config.SCHEDULER_OVERDUE_AFTER_SECONDS,
+        max_pending=config.SCHEDULER_MAX_PENDING,
+        batch_size=config.SCHEDULER_BATCH_SIZE,
+    ) if config.SCHEDULER_ENABLED else providers.Object(None)
+    app_mediator: providers.Singleton[Mediator] = providers.Singleton(
         AppMediator,
         task_repository=task_repository,
         event_sender=event_sender,
         circuit_breaker_monitor=circuit_breaker_monitor,
+        outbox_relay=outbox_relay,
+        scheduler=scheduler,
     )
+    # Requests from the APIs are admitted through the limits; background work is not
+    mediator: providers.Singleton[Mediator] = providers.Singleton(
+        LoadSheddingMediator,
+        inner=app_mediator,
+        read_limiter=providers.Singleton(
+            AdaptiveConcurrencyLimiter,
+            kind="read",
+            initial_limit=config.LOAD_SHEDDING_READ_LIMIT,
+            min_limit=config.LOAD_SHEDDING_MIN_LIMIT,
+            max_limit=config.LOAD_SHEDDING_MAX_LIMIT,
+            tolerance=config.LOAD_SHEDDING_LATENCY_TOLERANCE,
+            retry_after=config.LOAD_SHEDDING_RETRY_AFTER,
+        ),
+        write_limiter=providers.Singleton(
+            AdaptiveConcurrencyLimiter,
+            kind="write",
+            initial_limit=config.LOAD_SHEDDING_WRITE_LIMIT,
+            min_limit=config.LOAD_SHEDDING_MIN_LIMIT,
+            max_limit=config.LOAD_SHEDDING_MAX_LIMIT,
+            tolerance=config.LOAD_SHEDDING_LATENCY_TOLERANCE,
+            retry_after=config.LOAD_SHEDDING_RETRY_AFTER,
+        ),
+    ) if config.LOAD_SHEDDING_ENABLED else app_mediator
+    worker_pool = providers.Singleton(
+        TaskWorkerPool,
+        task_repository=task_repository,
+        mediator=app_mediator,
+        handler=providers.Callable(load_handler, config.WORKER_HANDLER),
+        executor=config.WORKER_EXECUTOR,
+        concurrency=config.WORKER_CONCURRENCY,
+        processes=config.WORKER_PROCESSES,
+        location_concurrency=config.WORKER_LOCATION_CONCURRENCY,
+        configuration_concurrency=config.WORKER_CONFIGURATION_CONCURRENCY,
+        lease_seconds=config.WORKER_LEASE_SECONDS,
+        poll_interval=config.WORKER_POLL_INTERVAL,
+        max_attempts=config.WORKER_MAX_ATTEMPTS,
+    ) if config.WORKER_ENABLED else providers.Object(None)
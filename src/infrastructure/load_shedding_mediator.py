@@ -0,0 +1,33 @@
+
+from src.application.commands_queries import StreamTasksQuery
+from src.domain.mediator import Mediator
+from src.infrastructure.concurrency.adaptive_limiter import AdaptiveConcurrencyLimiter
+
+class LoadSheddingMediator(Mediator):
+    """Admits commands and queries through separate adaptive concurrency limits.
+
+    When the repository slows down the limits shrink and the excess requests
+    are rejected with OverloadedError instead of piling up on the event loop.
+    Streams are not limited: opening one is cheap and reading it is paced by
+    the client.
+    """
+
+    def __init__(self, inner: Mediator, read_limiter: AdaptiveConcurrencyLimiter, write_limiter: AdaptiveConcurrencyLimiter):
+        self._inner = inner
+        self._read_limiter = read_limiter
+        self._write_limiter = write_limiter
+
+    async def handle_command(self, command):
+        return await self._write_limiter.run(type(command), lambda: self._inner.handle_command(command))
+
+    async def handle_query(self, query):
+        if isinstance(query, StreamTasksQuery):
+            return await self._inner.handle_query(query)
+        return await self._read_limiter.run(type(query), lambda: self._inner.handle_query(query))
+
+    def get_metrics(self) -> dict:
+        return {
+            f"{limiter.kind}_{key}": value
+            for limiter in (self._read_limiter, self._write_limiter)
+            for key, value in limiter.get_metrics().items()
+        }
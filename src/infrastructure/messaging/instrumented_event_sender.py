@@ -0,0 +1,42 @@
+
+import time
+from src.domain.event_sender import EventSender
+from src.infrastructure.monitoring.metrics import EVENT_SENDER_DURATION, EVENT_SENDER_ERRORS
+from src.infrastructure.monitoring.tracing import tracer
+
+class InstrumentedEventSender(EventSender):
+    """Records the latency and errors of send, send_batch and flush on the wrapped sender, and traces them."""
+
+    def __init__(self, inner: EventSender):
+        self._inner = inner
+        self._metrics = {
+            method: (EVENT_SENDER_DURATION.labels(method), EVENT_SENDER_ERRORS.labels(method))
+            for method in ("send", "send_batch", "flush")
+        }
+
+    async def _measure(self, method: str, call):
+        duration, errors = self._metrics[method]
+        start = time.perf_counter()
+        try:
+            with tracer.start_span(f"event_sender.{method}", kind="producer"):
+                return await call
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+
+    async def connect(self):
+        await self._inner.connect()
+
+    async def flush(self):
+        await self._measure("flush", self._inner.flush())
+
+    async def close(self):
+        await self._inner.close()
+
+    async def send(self, event):
+        await self._measure("send", self._inner.send(event))
+
+    async def send_batch(self, events):
+        await self._measure("send_batch", self._inner.send_batch(events))
@@ -0,0 +1,40 @@
+
+import json
+import logging
+import nats
+from src.domain.events import TaskCompletedEvent, TaskDeletedEvent
+from src.infrastructure.messaging.nats_event_sender import EVENT_TYPE_HEADER
+from src.infrastructure.persistence.cached_repository import CachedTaskRepository
+
+logger = logging.getLogger(__name__)
+
+INVALIDATING_EVENTS = {TaskCompletedEvent.__name__, TaskDeletedEvent.__name__}
+
+class NatsCacheInvalidator:
+    """Invalidates the local task cache when any replica completes or deletes a task."""
+
+    def __init__(self, cache: CachedTaskRepository, nats_url: str, subject: str):
+        self._cache = cache
+        self._nats_url = nats_url
+        self._subject = subject
+        self._nc = None
+
+    async def start(self):
+        self._nc = await nats.connect(self._nats_url)
+        await self._nc.subscribe(self._subject, cb=self._on_message)
+        logger.info("Listening for cache invalidations on '%s'", self._subject)
+
+    async def stop(self):
+        if self._nc:
+            await self._nc.drain()
+            self._nc = None
+
+    async def _on_message(self, msg):
+        if (msg.headers or {}).get(EVENT_TYPE_HEADER) not in INVALIDATING_EVENTS:
+            return
+        try:
+            task_id = json.loads(msg.data)["task_id"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed task event while invalidating the cache")
+            return
+        self._cache.invalidate(task_id)
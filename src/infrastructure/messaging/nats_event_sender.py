@@ -3,30 +3,186 @@ import nats
 import asyncio
 import logging
 from src.domain.event_sender import EventSender
+from src.infrastructure.monitoring.tracing import TRACEPARENT_HEADER, tracer
 
 logger = logging.getLogger(__name__)
 
+# Lets subscribers pick the events they care about without decoding every payload
+EVENT_TYPE_HEADER = "Event-Type"
+
 class NatsEventSender(EventSender):
-    def __init__(self, nats_url: str, subject: str, stream_name: str):
+    """Publishes events to JetStream from a bounded in-memory queue.
+
+    `send` returns as soon as the event is queued. A background publisher drains
+    the queue in batches and keeps up to `max_in_flight` publishes awaiting their
+    acks. A failed publish is retried up to `max_retries` times while it keeps
+    its place in the window, so when NATS is slow the window fills up, the queue
+    fills up and `send` waits for room. Events still failing after that are
+    dropped, and the next `flush` raises so the outbox relay sends them again.
+    A retried event is published after the events queued behind it, so events
+    may reach the stream out of order.
+    Events carry the trace they were sent in through a `traceparent` header.
+    """
+
+    def __init__(
+        self,
+        nats_url: str,
+        subject: str,
+        stream_name: str,
+        queue_size: int = 10000,
+        max_in_flight: int = 512,
+        batch_size: int = 128,
+        ack_timeout: float = 5.0,
+        max_retries: int = 5,
+        shutdown_timeout: float = 10.0,
+    ):
         self._nats_url = nats_url
         self._subject = subject
         self._stream_name = stream_name
+        self._max_in_flight = max_in_flight
+        self._batch_size = batch_size
+        self._ack_timeout = ack_timeout
+        self._max_retries = max_retries
+        self._shutdown_timeout = shutdown_timeout
         self._nc = None
+        self._js = None
+        self._connect_lock = asyncio.Lock()
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._window = asyncio.Semaphore(max_in_flight)
+        self._publisher = None
+        self._ack_waiters = set()
+        self._in_flight = 0
+        self._published = 0
+        self._retries = 0
+        self._failed = 0
+        # Events dropped since the last flush
+        self._undelivered = 0
 
-    async def _connect(self):
-        if not self._nc:
-            self._nc = await nats.connect(self._nats_url)
-            self._js = self._nc.jetstream()
-            await self._js.add_stream(name=self._stream_name, subjects=[self._subject])
+    async def connect(self):
+        async with self._connect_lock:
+            if self._nc:
+                return
+            nc = await nats.connect(self._nats_url)
+            js = nc.jetstream(publish_async_max_pending=self._max_in_flight)
+            await js.add_stream(name=self._stream_name, subjects=[self._subject])
+            self._nc, self._js = nc, js
+            self._publisher = asyncio.create_task(self._publish_loop())
+            logger.info("Connected to NATS stream '%s'", self._stream_name)
 
     async def send(self, event):
-        await self._connect()
-        try:
-            await self._js.publish(self._subject, event.model_dump_json().encode())
-            logger.info(f"Event {type(event).__name__} sent to NATS stream '{self._stream_name}'")
-        except Exception as e:
-            logger.error(f"Error sending event to NATS: {e}")
+        if not self._nc:
+            await self.connect()
+        await self._queue.put(self._message(event, tracer.current_traceparent()))
+
+    async def send_batch(self, events):
+        if not self._nc:
+            await self.connect()
+        trace_parent = tracer.current_traceparent()
+        for event in events:
+            await self._queue.put(self._message(event, trace_parent))
+
+    def _message(self, event, trace_parent) -> tuple:
+        headers = {EVENT_TYPE_HEADER: type(event).__name__}
+        if trace_parent:
+            headers[TRACEPARENT_HEADER] = trace_parent
+        return headers, event.model_dump_json().encode()
+
+    async def ping(self):
+        """A PING/PONG round trip to the server."""
+        if not self._nc or not self._nc.is_connected:
+            raise ConnectionError("Not connected to NATS")
+        await self._nc.flush()
+
+    async def flush(self):
+        """Waits until every queued event has been acknowledged by JetStream.
+
+        Raises ConnectionError when events were dropped since the last flush.
+        """
+        await self._queue.join()
+        if self._undelivered:
+            undelivered, self._undelivered = self._undelivered, 0
+            raise ConnectionError(f"{undelivered} events could not be published to NATS")
+
+    def get_metrics(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "in_flight": self._in_flight,
+            "published_total": self._published,
+            "retries_total": self._retries,
+            "failed_total": self._failed,
+        }
+
+    async def _publish_loop(self):
+        while True:
+            # Events stay in the queue until the window has room for them, so the
+            # queue size alone bounds how many events wait to be published.
+            await self._window.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty() and not self._window.locked():
+                await self._window.acquire()
+                batch.append(self._queue.get_nowait())
+
+            acks = []
+            for headers, payload in batch:
+                self._in_flight += 1
+                try:
+                    acks.append(await self._js.publish_async(self._subject, payload, headers=headers))
+                except Exception as e:
+                    acks.append(e)
+            waiter = asyncio.create_task(self._await_acks(batch, acks))
+            self._ack_waiters.add(waiter)
+            waiter.add_done_callback(self._ack_waiters.discard)
+
+    async def _await_acks(self, batch, acks):
+        results = await asyncio.gather(*(self._wait_for_ack(ack) for ack in acks), return_exceptions=True)
+        for message, result in zip(batch, results):
+            if isinstance(result, Exception) and not await self._publish_with_retry(message, result):
+                self._failed += 1
+                self._undelivered += 1
+            else:
+                self._published += 1
+            self._in_flight -= 1
+            self._window.release()
+            self._queue.task_done()
+        logger.debug("%s events acknowledged by NATS stream '%s'", len(batch), self._stream_name)
+
+    async def _wait_for_ack(self, ack):
+        if isinstance(ack, Exception):
+            raise ack
+        return await asyncio.wait_for(ack, self._ack_timeout)
+
+    async def _publish_with_retry(self, message: tuple, error: Exception) -> bool:
+        headers, payload = message
+        delay = 0.1
+        for _ in range(self._max_retries):
+            self._retries += 1
+            logger.warning("Error sending event to NATS, retrying in %.1fs: %s", delay, error)
+            await asyncio.sleep(delay)
+            try:
+                await self._js.publish(self._subject, payload, timeout=self._ack_timeout, headers=headers)
+                return True
+            except Exception as e:
+                error = e
+                delay = min(delay * 2, 5.0)
+        logger.error("Dropping event after %s failed NATS retries: %s", self._max_retries, error)
+        return False
 
     async def close(self):
-        if self._nc:
-            await self._nc.close()
+        if not self._nc:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), self._shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                "Timed out flushing NATS publisher with %s queued and %s unacknowledged events",
+                self._queue.qsize(),
+                self._in_flight,
+            )
+        except ConnectionError as e:
+            logger.error("Closing NATS publisher: %s", e)
+        self._publisher.cancel()
+        for waiter in list(self._ack_waiters):
+            waiter.cancel()
+        await self._nc.close()
+        self._nc = None
@@ -0,0 +1,127 @@
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from aiobreaker import CircuitBreaker
+from src.domain.event_sender import EventSender
+from src.domain.outbox import OutboxMessage
+from src.domain.repository import TaskRepository
+from src.infrastructure.monitoring.tracing import SpanContext, tracer
+
+logger = logging.getLogger(__name__)
+
+class OutboxRelay:
+    """Drains the repository outbox to the event sender in the background.
+
+    Messages are sent in order, a batch at a time, and only deleted from the
+    outbox once the sender has flushed them, so delivery is at-least-once and a
+    NATS outage only grows the outbox instead of failing writes. Each batch is
+    claimed under a lease first, so the relays of several replicas never send
+    the same message twice while its lease is held; batches of different
+    relays may be delivered out of order. Sending a batch times out after half
+    the lease, so a relay never deletes a batch that another one may have
+    claimed again in the meantime.
+    """
+
+    def __init__(
+        self,
+        task_repository: TaskRepository,
+        event_sender: EventSender,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_retry_delay: float = 30.0,
+        lease_seconds: float = 30.0,
+    ):
+        self._task_repository = task_repository
+        self._event_sender = event_sender
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_retry_delay = max_retry_delay
+        self._lease = timedelta(seconds=lease_seconds)
+        self._send_timeout = lease_seconds / 2
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._breaker: Optional[CircuitBreaker] = None
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._relayed = 0
+        self._failures = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Outbox relay started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Outbox relay stopped")
+
+    def use_breaker(self, breaker: CircuitBreaker):
+        """Sends through `breaker`, so relayed batches count towards and respect the event sender's breaker."""
+        self._breaker = breaker
+
+    def notify(self):
+        """Wakes the relay up after new messages were added to the outbox."""
+        self._wakeup.set()
+
+    def get_metrics(self) -> dict:
+        return {"relayed_total": self._relayed, "failures_total": self._failures}
+
+    async def relay_once(self) -> int:
+        """Relays one batch of outbox messages and returns how many were sent."""
+        now = datetime.now(timezone.utc)
+        messages = await self._task_repository.claim_outbox_messages(self.owner, now, now + self._lease, self._batch_size)
+        if not messages:
+            return 0
+        # A batch is one call to the breaker, so a failing or timed out batch counts once
+        if self._breaker is None:
+            await self._send_within_lease(messages)
+        else:
+            await self._breaker.call_async(self._send_within_lease, messages)
+        await self._task_repository.delete_outbox_messages([message.id for message in messages])
+        self._relayed += len(messages)
+        return len(messages)
+
+    async def _send_within_lease(self, messages: List[OutboxMessage]):
+        await asyncio.wait_for(self._send(messages), self._send_timeout)
+
+    async def _send(self, messages: List[OutboxMessage]):
+        # Consecutive messages of one request are sent together, within that request's trace
+        start = 0
+        for end in range(1, len(messages) + 1):
+            if end < len(messages) and messages[end].trace_parent == messages[start].trace_parent:
+                continue
+            parent = SpanContext.parse(messages[start].trace_parent)
+            with tracer.start_span("outbox.relay", kind="producer", parent=parent, attributes={"messages": end - start}):
+                await self._event_sender.send_batch([message.to_event() for message in messages[start:end]])
+            start = end
+        await self._event_sender.flush()
+
+    async def _run(self):
+        retry_delay = self._poll_interval
+        while True:
+            # Cleared before reading so a notify() during the batch is not missed
+            self._wakeup.clear()
+            try:
+                relayed = await self.relay_once()
+                retry_delay = self._poll_interval
+            except Exception as e:
+                self._failures += 1
+                logger.warning("Error relaying outbox messages, retrying in %.1fs: %s", retry_delay, e)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self._max_retry_delay)
+                continue
+            if relayed < self._batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage
+from src.domain.repository import TaskRepository
+from src.infrastructure.persistence.repository_decorator import TaskRepositoryDecorator
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class LatencyInjectingTaskRepository(TaskRepositoryDecorator):
+    """Delays every call by a fixed round trip, standing in for a real database in load benchmarks.
+
+    With a `pool_size`, each round trip also holds one of that many connections.
+    The inner call only starts once its round trip is over. stream_all is
+    forwarded as is.
+    """
+
+    def __init__(self, inner: TaskRepository, latency: float, pool_size: int = 0):
+        super().__init__(inner)
+        self._latency = latency
+        self._pool = asyncio.Semaphore(pool_size) if pool_size else None
+        self.round_trips = 0
+
+    async def _round_trip(self, call: Callable[..., Awaitable[T]], *args) -> T:
+        self.round_trips += 1
+        if self._pool is None:
+            await asyncio.sleep(self._latency)
+        else:
+            async with self._pool:
+                await asyncio.sleep(self._latency)
+        return await call(*args)
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        return await self._round_trip(self._inner.get_by_id, task_id)
+
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        return await self._round_trip(self._inner.get_many, task_ids)
+
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        return await self._round_trip(self._inner.get_all, page, limit, cursor, filters, sort)
+
+    async def create(self, task: Task) -> Task:
+        return await self._round_trip(self._inner.create, task)
+
+    async def update(self, task: Task) -> Task:
+        return await self._round_trip(self._inner.update, task)
+
+    async def delete(self, task_id: str):
+        await self._round_trip(self._inner.delete, task_id)
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        return await self._round_trip(self._inner.create_many, tasks)
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        return await self._round_trip(self._inner.update_many, tasks)
+
+    async def delete_many(self, task_ids: List[str]):
+        await self._round_trip(self._inner.delete_many, task_ids)
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        await self._round_trip(self._inner.add_outbox_messages, messages)
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        return await self._round_trip(self._inner.claim_outbox_messages, owner, now, lease_until, limit)
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        await self._round_trip(self._inner.delete_outbox_messages, message_ids)
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        return await self._round_trip(self._inner.claim_emissions, keys, now, expires_at)
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        return await self._round_trip(
+            self._inner.claim_tasks, owner, now, lease_until, limit, exclude_location_ids, exclude_configuration_ids
+        )
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        return await self._round_trip(self._inner.renew_leases, task_ids, owner, lease_until)
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        return await self._round_trip(self._inner.release_lease, task_id, owner, status)
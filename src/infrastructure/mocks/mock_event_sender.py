@@ -6,4 +6,4 @@ logger = logging.getLogger(__name__)
 
 class MockDomainEventSender(EventSender):
     async def send(self, event):
-        logger.info(f"Sending event: {event}")
+        logger.info("Sending event: %s", event)
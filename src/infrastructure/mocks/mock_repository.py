@@ -1,29 +1,293 @@
 
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
 from src.domain.entities import Task
+from src.domain.filters import EQUALITY_FIELDS, TaskFilter, TaskSort, due_timestamp
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage, encode_cursor, decode_cursor
 from src.domain.repository import TaskRepository
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import uuid
 
+def _seq_position(entry: tuple) -> tuple:
+    return (entry[0],)
+
+def _due_position(entry: tuple) -> tuple:
+    return (entry[0], entry[1])
+
+def _remove(entries: list, entry: tuple):
+    index = bisect_left(entries, entry)
+    if index < len(entries) and entries[index] == entry:
+        del entries[index]
+
 class MockTaskRepository(TaskRepository):
     def __init__(self):
         self._tasks = {}
+        # Sorted secondary indexes so filtered queries don't scan every task:
+        # (sequence, id) in insertion order, the same per value of each filter
+        # field, and (due timestamp, sequence, id). Sequences stand in for _id.
+        self._log = []
+        self._by_field = {field: {} for field in EQUALITY_FIELDS}
+        self._by_due_date = []
+        # Indexed values per task; tasks are mutated in place before update()
+        # is called, so the old values cannot be read back from the task.
+        self._keys = {}
+        self._next_sequence = 0
+        self._outbox = {}
+        self._next_outbox_id = 0
+        self._outbox_leases = {}
+        self._emissions = {}
+
+    def _index(self, task: Task):
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        values = tuple(getattr(task, field) for field in EQUALITY_FIELDS)
+        due = due_timestamp(task.due_date)
+        self._keys[task.id] = (sequence, values, due)
+        self._log.append((sequence, task.id))
+        for field, value in zip(EQUALITY_FIELDS, values):
+            insort(self._by_field[field].setdefault(value, []), (sequence, task.id))
+        insort(self._by_due_date, (due, sequence, task.id))
+
+    def _reindex(self, task: Task):
+        sequence, old_values, old_due = self._keys[task.id]
+        values = tuple(getattr(task, field) for field in EQUALITY_FIELDS)
+        due = due_timestamp(task.due_date)
+        for field, old_value, value in zip(EQUALITY_FIELDS, old_values, values):
+            if old_value != value:
+                self._remove_from_bucket(field, old_value, (sequence, task.id))
+                insort(self._by_field[field].setdefault(value, []), (sequence, task.id))
+        if old_due != due:
+            _remove(self._by_due_date, (old_due, sequence, task.id))
+            insort(self._by_due_date, (due, sequence, task.id))
+        self._keys[task.id] = (sequence, values, due)
+
+    def _unindex(self, task_id: str):
+        sequence, values, due = self._keys.pop(task_id)
+        _remove(self._log, (sequence, task_id))
+        for field, value in zip(EQUALITY_FIELDS, values):
+            self._remove_from_bucket(field, value, (sequence, task_id))
+        _remove(self._by_due_date, (due, sequence, task_id))
+
+    def _remove_from_bucket(self, field: str, value, entry: tuple):
+        bucket = self._by_field[field][value]
+        _remove(bucket, entry)
+        if not bucket:
+            del self._by_field[field][value]
+
+    def _position(self, task_id: str, sort: TaskSort) -> tuple:
+        sequence, _, due = self._keys[task_id]
+        return (due, sequence) if sort.field == "due_date" else (sequence,)
+
+    def _decode_position(self, cursor: str, sort: TaskSort) -> tuple:
+        position = decode_cursor(cursor)
+        if position.get("sort", "id") != sort.field or not isinstance(position.get("seq"), int):
+            raise ValueError("Invalid pagination cursor")
+        if sort.field != "due_date":
+            return (position["seq"],)
+        if not isinstance(position.get("due"), (int, float)):
+            raise ValueError("Invalid pagination cursor")
+        return (position["due"], position["seq"])
+
+    def _page(self, tasks: List[Task], limit: int, sort: TaskSort) -> TaskPage:
+        if len(tasks) <= limit:
+            return TaskPage(tasks=tasks)
+        tasks = tasks[:limit]
+        position = self._position(tasks[-1].id, sort)
+        cursor = {"sort": sort.field, "seq": position[-1]}
+        if sort.field == "due_date":
+            cursor["due"] = position[0]
+        return TaskPage(tasks=tasks, next_cursor=encode_cursor(cursor))
+
+    def _matching(self, filters: TaskFilter, sort: TaskSort, after: Optional[tuple]):
+        """Yields the tasks matching `filters` in `sort` order, strictly after `after`."""
+        # Each source is (entries, lo, hi, order, position of an entry); the
+        # narrowest one is scanned and the remaining filters are checked per task.
+        sources = [(self._log, 0, len(self._log), "id", _seq_position)]
+        for field, value in filters.equality_filters().items():
+            bucket = self._by_field[field].get(value, [])
+            sources.append((bucket, 0, len(bucket), "id", _seq_position))
+        if filters.due_after is not None or filters.due_before is not None:
+            lo, hi = 0, len(self._by_due_date)
+            if filters.due_after is not None:
+                lo = bisect_left(self._by_due_date, (due_timestamp(filters.due_after),))
+            if filters.due_before is not None:
+                hi = bisect_left(self._by_due_date, (due_timestamp(filters.due_before),))
+            sources.append((self._by_due_date, lo, max(lo, hi), "due_date", _due_position))
+        entries, lo, hi, order, position_of = min(sources, key=lambda source: source[2] - source[1])
+
+        if order == sort.field:
+            # Already in the requested order: start at the cursor and stop early
+            if after is not None and sort.descending:
+                hi = bisect_left(entries, after, lo, hi, key=position_of)
+            elif after is not None:
+                lo = bisect_right(entries, after, lo, hi, key=position_of)
+            indices = range(hi - 1, lo - 1, -1) if sort.descending else range(lo, hi)
+            for index in indices:
+                task = self._tasks[entries[index][-1]]
+                if filters.matches(task):
+                    yield task
+            return
+
+        tasks = [self._tasks[entries[index][-1]] for index in range(lo, hi)]
+        tasks = [task for task in tasks if filters.matches(task)]
+        tasks.sort(key=lambda task: self._position(task.id, sort), reverse=sort.descending)
+        for task in tasks:
+            position = self._position(task.id, sort)
+            if after is None or (position < after if sort.descending else position > after):
+                yield task
 
     async def get_by_id(self, task_id: str) -> Optional[Task]:
         return self._tasks.get(task_id)
 
-    async def get_all(self, page: int, limit: int) -> List[Task]:
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        return {task_id: self._tasks[task_id] for task_id in task_ids if task_id in self._tasks}
+
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        filters = filters or TaskFilter()
+        sort = sort or TaskSort()
+        if cursor:
+            matching = self._matching(filters, sort, self._decode_position(cursor, sort))
+            return self._page(list(islice(matching, limit + 1)), limit, sort)
         start = (page - 1) * limit
-        end = start + limit
-        return list(self._tasks.values())[start:end]
+        matching = self._matching(filters, sort, None)
+        return self._page(list(islice(matching, start, start + limit + 1)), limit, sort)
+
+    async def stream_all(self, batch_size: int) -> AsyncIterator[Task]:
+        # Resumes each batch from the last sequence seen, so tasks created or
+        # deleted while the consumer is awaiting are safe.
+        last_position = (-1,)
+        while True:
+            start = bisect_right(self._log, last_position, key=_seq_position)
+            entries = self._log[start:start + batch_size]
+            if not entries:
+                return
+            last_position = _seq_position(entries[-1])
+            for _, task_id in entries:
+                # Tasks deleted since the batch was read are skipped
+                task = self._tasks.get(task_id)
+                if task is not None:
+                    yield task
+            await asyncio.sleep(0)
 
     async def create(self, task: Task) -> Task:
         task.id = str(uuid.uuid4())
         self._tasks[task.id] = task
+        self._index(task)
         return task
 
     async def update(self, task: Task) -> Task:
         self._tasks[task.id] = task
+        if task.id in self._keys:
+            self._reindex(task)
+        else:
+            self._index(task)
         return task
 
     async def delete(self, task_id: str):
-        self._tasks.pop(task_id, None)
+        if self._tasks.pop(task_id, None) is not None:
+            self._unindex(task_id)
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        return [await self.create(task) for task in tasks]
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        return [await self.update(task) for task in tasks]
+
+    async def delete_many(self, task_ids: List[str]):
+        for task_id in task_ids:
+            await self.delete(task_id)
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        for message in messages:
+            message.id = str(self._next_outbox_id)
+            self._next_outbox_id += 1
+            self._outbox[message.id] = message
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        messages = []
+        for message_id, message in self._outbox.items():
+            if len(messages) == limit:
+                break
+            lease_owner, leased_until = self._outbox_leases.get(message_id, (None, None))
+            if leased_until is None or leased_until < now or lease_owner == owner:
+                self._outbox_leases[message_id] = (owner, lease_until)
+                messages.append(message)
+        return messages
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        for message_id in message_ids:
+            self._outbox.pop(message_id, None)
+            self._outbox_leases.pop(message_id, None)
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        claimed = []
+        for key in keys:
+            if key not in self._emissions or self._emissions[key] < now:
+                self._emissions[key] = expires_at
+                claimed.append(key)
+        return claimed
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        now_ts = due_timestamp(now)
+        excluded_locations = set(exclude_location_ids or ())
+        excluded_configurations = set(exclude_configuration_ids or ())
+        candidates = []
+        # Only "created" and "running" tasks can be claimed, so those buckets are all that is read
+        for status in ("created", "running"):
+            for _, task_id in self._by_field["status"].get(status, []):
+                task = self._tasks[task_id]
+                if self._keys[task_id][2] > now_ts:
+                    continue
+                if status == "running" and due_timestamp(task.lease_until) >= now_ts:
+                    continue
+                if task.location_id in excluded_locations or task.configuration_id in excluded_configurations:
+                    continue
+                candidates.append(task)
+        candidates.sort(key=lambda task: self._position(task.id, TaskSort(field="due_date")))
+        claimed = candidates[:limit]
+        for task in claimed:
+            task.status = "running"
+            task.lease_owner = owner
+            task.lease_until = lease_until
+            task.attempts += 1
+            self._reindex(task)
+        return claimed
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        renewed = []
+        for task_id in task_ids:
+            task = self._tasks.get(task_id)
+            if task is not None and task.status == "running" and task.lease_owner == owner:
+                task.lease_until = lease_until
+                renewed.append(task_id)
+        return renewed
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        task = self._tasks.get(task_id)
+        if task is None or task.status != "running" or task.lease_owner != owner:
+            return False
+        task.status = status
+        task.lease_owner = None
+        task.lease_until = None
+        if status == "created":
+            task.attempts -= 1
+        self._reindex(task)
+        return True
@@ -1,6 +1,7 @@
 
 import logging
 from aiobreaker import CircuitBreaker
+from aiobreaker.state import CircuitBreakerState
 
 logger = logging.getLogger(__name__)
 
@@ -11,32 +12,37 @@ class CircuitBreakerMonitor:
         if cls._instance is None:
             cls._instance = super(CircuitBreakerMonitor, cls).__new__(cls)
             cls._instance.breakers = {}
+            cls._instance.noncritical = set()
         return cls._instance
 
-    def register(self, name: str, breaker: CircuitBreaker):
-        logger.info(f"Registering circuit breaker: {name}")
+    def register(self, name: str, breaker: CircuitBreaker, critical: bool = True):
+        """Adds a breaker; an open non-critical one only degrades the status instead of taking it down."""
+        logger.info("Registering circuit breaker: %s", name)
         self.breakers[name] = breaker
+        if critical:
+            self.noncritical.discard(name)
+        else:
+            self.noncritical.add(name)
 
     def get_status(self):
-        logger.info(f"Getting health status. Breakers: {self.breakers}")
         statuses = {}
         overall_status = "healthy"
-        has_half_open = False
+        degraded = False
 
         for name, breaker in self.breakers.items():
-            state = breaker.current_state.name
-            statuses[name] = state
-            if state == "open":
+            state = breaker.current_state
+            statuses[name] = state.name
+            if state == CircuitBreakerState.OPEN and name not in self.noncritical:
                 overall_status = "down"
-                break
-            elif state == "half-open":
-                has_half_open = True
+            elif state != CircuitBreakerState.CLOSED:
+                degraded = True
 
-        if overall_status != "down" and has_half_open:
+        if overall_status != "down" and degraded:
             overall_status = "degraded"
 
         health_status = {"status": overall_status, "dependencies": statuses}
-        logger.info(f"Health status: {health_status}")
+        # Called on every health probe
+        logger.debug("Health status: %s", health_status)
         return health_status
 
 circuit_breaker_monitor = CircuitBreakerMonitor()
@@ -0,0 +1,61 @@
+
+import grpc
+import time
+from src.infrastructure.monitoring.metrics import GRPC_REQUEST_DURATION
+
+def _observe(method: str, context, start: float, failed: bool):
+    code = context.code()
+    if code is None:
+        code_name = "UNKNOWN" if failed else "OK"
+    else:
+        code_name = code.name if isinstance(code, grpc.StatusCode) else str(code)
+    GRPC_REQUEST_DURATION.labels(method, code_name).observe(time.perf_counter() - start)
+
+class GrpcMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Records the latency and status code of every unary and server-streaming call, per method."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+
+        if handler.unary_unary:
+            inner = handler.unary_unary
+
+            async def unary_unary(request, context):
+                start, failed = time.perf_counter(), False
+                try:
+                    return await inner(request, context)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    _observe(method, context, start, failed)
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        if handler.unary_stream:
+            inner = handler.unary_stream
+
+            async def unary_stream(request, context):
+                start, failed = time.perf_counter(), False
+                try:
+                    async for response in inner(request, context):
+                        yield response
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    _observe(method, context, start, failed)
+
+            return grpc.unary_stream_rpc_method_handler(
+                unary_stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return handler
@@ -0,0 +1,63 @@
+import grpc
+from src.infrastructure.monitoring.tracing import TRACEPARENT_HEADER, SpanContext, tracer
+
+def _start_span(method: str, invocation_metadata):
+    parent = None
+    for key, value in invocation_metadata or ():
+        if key == TRACEPARENT_HEADER:
+            parent = SpanContext.parse(value)
+            break
+    return tracer.start_span(method, kind="server", parent=parent, attributes={"rpc.method": method})
+
+def _record_status(span, context):
+    code = context.code()
+    if code is None:
+        return
+    code_name = code.name if isinstance(code, grpc.StatusCode) else str(code)
+    span.set_attribute("rpc.grpc.status_code", code_name)
+    if code_name not in ("OK", "NOT_FOUND", "INVALID_ARGUMENT"):
+        span.record_error(f"{code_name}: {context.details()}")
+
+class GrpcTracingInterceptor(grpc.aio.ServerInterceptor):
+    """Opens a server span per unary and server-streaming call, continuing the trace in the `traceparent` metadata."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or not tracer.enabled:
+            return handler
+        method = handler_call_details.method.lstrip("/")
+        metadata = handler_call_details.invocation_metadata
+
+        if handler.unary_unary:
+            inner = handler.unary_unary
+
+            async def unary_unary(request, context):
+                with _start_span(method, metadata) as span:
+                    try:
+                        return await inner(request, context)
+                    finally:
+                        _record_status(span, context)
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        if handler.unary_stream:
+            inner = handler.unary_stream
+
+            async def unary_stream(request, context):
+                with _start_span(method, metadata) as span:
+                    try:
+                        async for response in inner(request, context):
+                            yield response
+                    finally:
+                        _record_status(span, context)
+
+            return grpc.unary_stream_rpc_method_handler(
+                unary_stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return handler
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """Probes the service's dependencies in the background and serves the cached results.
+
+    Every `interval` seconds all registered probes run concurrently, each
+    bounded by `timeout`, so liveness and readiness requests only read the
+    last results and cost the same however often they are made. Readiness is
+    withheld until `mark_started` and the first successful probe round, and
+    again from `mark_stopping` on, so traffic is drained before shutdown.
+    """
+
+    def __init__(self, circuit_breaker_monitor: CircuitBreakerMonitor, interval: float = 5.0, timeout: float = 2.0):
+        self._circuit_breaker_monitor = circuit_breaker_monitor
+        self._interval = interval
+        self._timeout = timeout
+        self._probes: Dict[str, Callable[[], Awaitable]] = {}
+        self._results: Dict[str, dict] = {}
+        self._started = False
+        self._stopping = False
+        self._last_round = 0.0
+        self._task = None
+        self._changed = asyncio.Event()
+
+    def register(self, name: str, probe: Callable[[], Awaitable]):
+        """Adds a probe: a coroutine function that raises when the dependency is unusable."""
+        self._probes[name] = probe
+
+    async def start(self):
+        """Runs the first probe round, then keeps probing in the background."""
+        if self._task is None:
+            await self.check_now()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Health monitor started with probes: %s", ", ".join(self._probes) or "none")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def mark_started(self):
+        self._started = True
+        self._notify()
+
+    def mark_stopping(self):
+        self._stopping = True
+        self._notify()
+
+    async def check_now(self):
+        names = list(self._probes)
+        outcomes = await asyncio.gather(*(self._probe(name) for name in names))
+        changed = False
+        for name, result in zip(names, outcomes):
+            previous = self._results.get(name)
+            if previous is None or previous["status"] != result["status"]:
+                changed = True
+                if result["status"] == "down":
+                    logger.warning("Health probe %s failed: %s", name, result["error"])
+                elif previous is not None:
+                    logger.info("Health probe %s recovered", name)
+            self._results[name] = result
+        self._last_round = time.monotonic()
+        if changed:
+            self._notify()
+
+    async def _probe(self, name: str) -> dict:
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(self._probes[name](), self._timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self._timeout:g}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "status": "down" if error else "up",
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "error": error,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.check_now()
+            except Exception:
+                logger.exception("Error running health probes")
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, timeout: Optional[float] = None):
+        """Returns once a probe result or the lifecycle state changes, or after `timeout` seconds."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def liveness(self) -> dict:
+        """Alive unless the probe loop has stopped running, which means the process is wedged."""
+        stale = self._task is not None and time.monotonic() - self._last_round > 3 * self._interval + self._timeout
+        return {"status": "stale" if stale else "alive"}
+
+    def readiness(self) -> dict:
+        breakers = self._circuit_breaker_monitor.get_status()
+        if self._stopping:
+            status = "stopping"
+        elif not self._started:
+            status = "starting"
+        elif any(result["status"] == "down" for result in self._results.values()):
+            status = "down"
+        else:
+            status = breakers["status"]
+        return {"status": status, "dependencies": dict(self._results), "circuit_breakers": breakers["dependencies"]}
+
+    def is_ready(self) -> bool:
+        return self.readiness()["status"] in ("healthy", "degraded")
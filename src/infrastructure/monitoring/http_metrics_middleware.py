@@ -0,0 +1,34 @@
+
+import time
+from src.infrastructure.monitoring.metrics import HTTP_REQUEST_DURATION
+
+class HttpMetricsMiddleware:
+    """ASGI middleware recording the latency of every request under its route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would add a task and a
+    stream per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], path, str(status)).observe(time.perf_counter() - start)
@@ -0,0 +1,36 @@
+from src.infrastructure.monitoring.tracing import TRACEPARENT_HEADER, SpanContext, tracer
+
+_TRACEPARENT = TRACEPARENT_HEADER.encode()
+
+class HttpTracingMiddleware:
+    """ASGI middleware opening a server span per request, continuing the caller's trace if it sent one."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        parent = None
+        for name, value in scope["headers"]:
+            if name == _TRACEPARENT:
+                parent = SpanContext.parse(value)
+                break
+
+        with tracer.start_span(scope["method"], kind="server", parent=parent) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.record_error(f"HTTP {message['status']}")
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # Named after the route template once the router has matched one
+                path = getattr(scope.get("route"), "path", None)
+                span.name = f"{scope['method']} {path or 'unmatched'}"
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("http.route", path)
@@ -0,0 +1,201 @@
+
+import json
+import logging
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Optional
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+def parse_logger_rates(value: str) -> Dict[str, float]:
+    """Parses "logger=rate,logger=rate" settings, e.g. "src.infrastructure.api=0.1"."""
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including the fields passed through `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _PerLoggerFilter(logging.Filter):
+    """Base for filters that only throttle records below `max_level`, configured per logger prefix.
+
+    The most specific configured prefix of a logger name applies; the result is
+    cached per logger name, so the lookup runs once per logger.
+    """
+
+    def __init__(self, default: float, per_logger: Optional[Dict[str, float]] = None, max_level: int = logging.INFO):
+        super().__init__()
+        self._default = default
+        self._per_logger = per_logger or {}
+        self._max_level = max_level
+        self._settings = {}
+        self.dropped = 0
+
+    def _setting_for(self, name: str) -> float:
+        setting = self._settings.get(name)
+        if setting is None:
+            setting = self._default
+            prefixes = [prefix for prefix in self._per_logger if name == prefix or name.startswith(prefix + ".")]
+            if prefixes:
+                setting = self._per_logger[max(prefixes, key=len)]
+            self._settings[name] = setting
+        return setting
+
+    def _allow(self, name: str, setting: float) -> bool:
+        raise NotImplementedError
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self._max_level:
+            return True
+        if self._allow(record.name, self._setting_for(record.name)):
+            return True
+        self.dropped += 1
+        return False
+
+class SamplingFilter(_PerLoggerFilter):
+    """Keeps a fraction of each logger's records, e.g. 0.1 keeps every tenth one.
+
+    Sampling is deterministic so a steady stream keeps exactly its share, and
+    warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rate: float = 1.0, per_logger: Optional[Dict[str, float]] = None, max_level: int = logging.INFO):
+        super().__init__(rate, per_logger, max_level)
+        self._credit = {}
+
+    def _allow(self, name: str, rate: float) -> bool:
+        if rate >= 1:
+            return True
+        credit = self._credit.get(name, 0.0) + rate
+        if credit >= 1:
+            self._credit[name] = credit - 1
+            return True
+        self._credit[name] = credit
+        return False
+
+class RateLimitFilter(_PerLoggerFilter):
+    """Lets through at most `rate` records per second per logger, with bursts of up to `burst`.
+
+    Each logger has its own token bucket; a rate of 0 disables the limit.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        burst: float = 0.0,
+        per_logger: Optional[Dict[str, float]] = None,
+        max_level: int = logging.INFO,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(rate, per_logger, max_level)
+        self._burst = burst
+        self._clock = clock
+        self._buckets = {}
+
+    def _allow(self, name: str, rate: float) -> bool:
+        if rate <= 0:
+            return True
+        capacity = max(self._burst or rate, 1.0)
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(name, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            self._buckets[name] = (tokens - 1, now)
+            return True
+        self._buckets[name] = (tokens, now)
+        return False
+
+class AsyncLogHandler(QueueHandler):
+    """Hands records to a background thread that formats and writes them.
+
+    Callers only pay for the filters and a non-blocking put; records dropped by
+    a filter are never formatted. Message arguments are formatted on the writer
+    thread, so they should not be mutated after the call. When the queue is
+    full, records are dropped and counted rather than blocking the event loop.
+    """
+
+    def __init__(self, target: logging.Handler, queue_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.queue_full = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock QueueHandler formats the message here, on the caller's thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.queue_full += 1
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        """Writes the records still queued and stops the writer thread."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        # logging.shutdown() closes handlers at exit, which flushes the queue
+        self.stop()
+        super().close()
+
+    def get_metrics(self) -> dict:
+        metrics = {"queued": self.queue.qsize(), "dropped_queue_full_total": self.queue_full}
+        for log_filter in self.filters:
+            if isinstance(log_filter, SamplingFilter):
+                metrics["sampled_out_total"] = log_filter.dropped
+            elif isinstance(log_filter, RateLimitFilter):
+                metrics["rate_limited_total"] = log_filter.dropped
+        return metrics
+
+def build_log_handler(
+    log_format: str = "text",
+    use_queue: bool = True,
+    queue_size: int = 10000,
+    sample_rate: float = 1.0,
+    sample_rates: Optional[Dict[str, float]] = None,
+    rate_limit: float = 0.0,
+    rate_limit_burst: float = 0.0,
+    rate_limits: Optional[Dict[str, float]] = None,
+    stream=None,
+) -> logging.Handler:
+    """Builds the root handler: stdout output, optionally behind a background queue, with throttling filters."""
+    if log_format not in ("text", "json"):
+        raise ValueError(f"Unknown log format '{log_format}'")
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    handler = AsyncLogHandler(output, queue_size) if use_queue else output
+    # Sampling runs first so the rate limit only spends tokens on records that would be kept
+    if sample_rate < 1 or sample_rates:
+        handler.addFilter(SamplingFilter(sample_rate, sample_rates))
+    if rate_limit > 0 or rate_limits:
+        handler.addFilter(RateLimitFilter(rate_limit, rate_limit_burst, rate_limits))
+    return handler
@@ -0,0 +1,217 @@
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow backend calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "bucket_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # Per-bucket counts with an overflow slot; made cumulative only when rendered
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _Metric:
+    """A metric family with one child per label combination.
+
+    Children are plain objects updated with single attribute writes, so the
+    event loop can update them without any locking; `labels` lookups are one
+    dict access and callers on hot paths may keep the child around.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in list(self._children.items())
+        ]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.upper_bounds + (float("inf"),), child.bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(upper_bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds the process metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]):
+        """Exposes the numeric values of a component's `get_metrics()` as gauges named `<prefix>_<key>`."""
+        self._collectors[prefix] = collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for prefix, collect in list(self._collectors.items()):
+            for key, value in collect().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Metrics shared across the service; children are created on first use per label set
+HANDLER_DURATION = registry.histogram(
+    "task_service_handler_duration_seconds", "Mediator command and query handling time.", ("kind", "type")
+)
+HANDLER_ERRORS = registry.counter(
+    "task_service_handler_errors_total", "Mediator commands and queries that raised.", ("kind", "type")
+)
+REPOSITORY_DURATION = registry.histogram(
+    "task_service_repository_duration_seconds", "Task repository call time.", ("method",)
+)
+REPOSITORY_ERRORS = registry.counter(
+    "task_service_repository_errors_total", "Task repository calls that raised.", ("method",)
+)
+EVENT_SENDER_DURATION = registry.histogram(
+    "task_service_event_sender_duration_seconds", "Event sender call time.", ("method",)
+)
+EVENT_SENDER_ERRORS = registry.counter(
+    "task_service_event_sender_errors_total", "Event sender calls that raised.", ("method",)
+)
+CIRCUIT_BREAKER_TRANSITIONS = registry.counter(
+    "task_service_circuit_breaker_transitions_total", "Circuit breaker state changes.", ("breaker", "from_state", "to_state")
+)
+CIRCUIT_BREAKER_STATE = registry.gauge(
+    "task_service_circuit_breaker_open", "1 while the circuit breaker is open, 0.5 half-open, 0 closed.", ("breaker",)
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "task_service_http_request_duration_seconds", "REST request time per route.", ("method", "route", "status")
+)
+GRPC_REQUEST_DURATION = registry.histogram(
+    "task_service_grpc_request_duration_seconds", "gRPC request time per method.", ("method", "code")
+)
+CONCURRENCY_LIMIT = registry.gauge(
+    "task_service_concurrency_limit", "Current adaptive concurrency limit.", ("kind",)
+)
+CONCURRENCY_IN_FLIGHT = registry.gauge(
+    "task_service_concurrency_in_flight", "Requests currently admitted by the concurrency limiter.", ("kind",)
+)
+LOAD_SHED = registry.counter(
+    "task_service_load_shed_total", "Requests rejected by the concurrency limiter.", ("kind",)
+)
+DEADLINE_EXCEEDED = registry.counter(
+    "task_service_deadline_exceeded_total", "Requests that ran out of their deadline, by the stage that noticed.", ("stage",)
+)
+BULKHEAD_IN_FLIGHT = registry.gauge(
+    "task_service_bulkhead_in_flight", "Calls currently running in a repository bulkhead.", ("bulkhead",)
+)
+BULKHEAD_QUEUED = registry.gauge(
+    "task_service_bulkhead_queued", "Calls waiting for a slot in a repository bulkhead.", ("bulkhead",)
+)
+BULKHEAD_REJECTED = registry.counter(
+    "task_service_bulkhead_rejected_total", "Calls rejected because a repository bulkhead's queue was full.", ("bulkhead",)
+)
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+# Functions whose argument of the given name is the command or query being handled
+_OPERATION_FRAMES: Dict[CodeType, str] = {}
+
+UNTAGGED = "(none)"
+ALLOCATION_GROUPS = ("lineno", "filename", "traceback")
+_ALLOCATION_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+def operation_frame(argument: str):
+    """Tags samples taken inside the decorated function with the type of its `argument`.
+
+    Registration is all it does: the function itself is returned unchanged, so
+    calls cost nothing extra whether or not a profile is running.
+    """
+    def register(function):
+        _OPERATION_FRAMES[function.__code__] = argument
+        return function
+    return register
+
+class ProfilerError(Exception):
+    """A profiling request that conflicts with the profiler's current state."""
+
+class ProfilerArgumentError(ValueError):
+    """A profiling request with arguments outside of what the profiler accepts."""
+
+class Profiler:
+    """On-demand diagnostics of the live process, run from the event loop thread being examined.
+
+    Nothing runs between requests: CPU samples and stall checks are taken by a
+    thread that only exists for the requested duration, and tracemalloc only
+    traces between start_allocation_tracing and stop_allocation_tracing.
+    Stacks are reported root first as `path:qualified_name` frames, rooted at
+    the type of the mediator command or query they were taken in.
+    """
+
+    def __init__(self, max_seconds: float = 60.0):
+        self._max_seconds = max_seconds
+        self._running = set()
+        self._names: Dict[CodeType, str] = {}
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _start(self, kind: str, seconds: float):
+        if not 0 < seconds <= self._max_seconds:
+            raise ProfilerArgumentError(f"seconds must be above 0 and at most {self._max_seconds:g}")
+        if kind in self._running:
+            raise ProfilerError(f"A {kind} is already running")
+        self._running.add(kind)
+
+    async def profile_cpu(self, seconds: float, interval: float = 0.005) -> str:
+        """Samples the event loop thread's stack for `seconds` and returns them in collapsed format.
+
+        Each line is `operation;frame;...;frame count`, as read by flamegraph.pl,
+        speedscope and most other flame graph tools.
+        """
+        self._start("CPU profile", seconds)
+        try:
+            counts = await asyncio.to_thread(self._sample, threading.get_ident(), seconds, interval)
+        finally:
+            self._running.discard("CPU profile")
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def _sample(self, thread_id: int, seconds: float, interval: float) -> Counter:
+        counts = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                operation, frames = self._stack(frame)
+                counts[";".join([operation] + frames)] += 1
+            del frame
+            time.sleep(interval)
+        return counts
+
+    def _stack(self, frame: Optional[FrameType]) -> Tuple[str, List[str]]:
+        operation = UNTAGGED
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._names.get(code)
+            if name is None:
+                name = self._names[code] = f"{_short_path(code.co_filename)}:{code.co_qualname}"
+            frames.append(name)
+            argument = _OPERATION_FRAMES.get(code)
+            if argument is not None:
+                # The outermost tagged frame wins, so nested dispatches count towards their caller
+                message = frame.f_locals.get(argument)
+                if message is not None:
+                    operation = type(message).__name__
+            frame = frame.f_back
+        frames.reverse()
+        return operation, frames
+
+    def start_allocation_tracing(self, frames: int = 1):
+        """Starts tracing allocations, keeping `frames` frames of each allocation's traceback."""
+        if frames < 1:
+            raise ProfilerArgumentError("frames must be at least 1")
+        if tracemalloc.is_tracing():
+            raise ProfilerError("Allocation tracing is already started")
+        tracemalloc.start(frames)
+        self._snapshot = None
+
+    def stop_allocation_tracing(self):
+        tracemalloc.stop()
+        self._snapshot = None
+
+    async def allocation_snapshot(self, limit: int = 20, group_by: str = "lineno") -> dict:
+        """Takes a tracemalloc snapshot and reports its largest allocation sites.
+
+        From the second snapshot on, sites are ranked by their growth since the
+        previous one, which is what points at a leak.
+        """
+        if group_by not in ALLOCATION_GROUPS:
+            raise ProfilerArgumentError(f"group_by must be one of {', '.join(ALLOCATION_GROUPS)}")
+        if not tracemalloc.is_tracing():
+            raise ProfilerError("Allocation tracing is not started")
+        snapshot, statistics = await asyncio.to_thread(self._compare_snapshot, group_by)
+        current, peak = tracemalloc.get_traced_memory()
+        compared = self._snapshot is not None
+        self._snapshot = snapshot
+        top = []
+        for statistic in statistics[:limit]:
+            entry = {
+                "location": [f"{_short_path(frame.filename)}:{frame.lineno}" for frame in reversed(statistic.traceback)],
+                "size_bytes": statistic.size,
+                "count": statistic.count,
+            }
+            if compared:
+                entry["size_diff_bytes"] = statistic.size_diff
+                entry["count_diff"] = statistic.count_diff
+            top.append(entry)
+        return {"traced_bytes": current, "peak_bytes": peak, "compared_to_previous": compared, "top": top}
+
+    def _compare_snapshot(self, group_by: str):
+        snapshot = tracemalloc.take_snapshot().filter_traces(_ALLOCATION_FILTERS)
+        if self._snapshot is None:
+            return snapshot, snapshot.statistics(group_by)
+        return snapshot, snapshot.compare_to(self._snapshot, group_by)
+
+    async def measure_event_loop(self, seconds: float, interval: float = 0.01, slow_threshold: float = 0.1) -> dict:
+        """Measures how late the event loop wakes up and captures the callbacks that block it.
+
+        A watchdog thread takes the loop thread's stack whenever the loop has
+        not come back for `slow_threshold` seconds, which unlike asyncio's debug
+        mode shows where a slow callback spends its time, at no cost to the
+        rest of the loop.
+        """
+        self._start("event loop measurement", seconds)
+        heartbeat = [time.monotonic()]
+        stop = threading.Event()
+        stalls: List[dict] = []
+        watchdog = asyncio.ensure_future(asyncio.to_thread(
+            self._watch, threading.get_ident(), heartbeat, stop, stalls, interval, slow_threshold
+        ))
+        lags = []
+        try:
+            deadline = heartbeat[0] + seconds
+            while heartbeat[0] < deadline:
+                expected = time.monotonic() + interval
+                await asyncio.sleep(interval)
+                now = time.monotonic()
+                lags.append(max(0.0, now - expected))
+                heartbeat[0] = now
+        finally:
+            stop.set()
+            await watchdog
+            self._running.discard("event loop measurement")
+        lags.sort()
+        return {
+            "samples": len(lags),
+            "lag_ms": {
+                "mean": round(sum(lags) / len(lags) * 1000, 3),
+                "p50": round(lags[len(lags) // 2] * 1000, 3),
+                "p99": round(lags[min(len(lags) - 1, len(lags) * 99 // 100)] * 1000, 3),
+                "max": round(lags[-1] * 1000, 3),
+            },
+            "slow_callbacks": stalls,
+        }
+
+    def _watch(self, thread_id, heartbeat, stop, stalls, interval, slow_threshold):
+        stalled_since = None
+        while not stop.wait(interval / 2):
+            last_beat = heartbeat[0]
+            blocked = time.monotonic() - last_beat - interval
+            if blocked < slow_threshold:
+                continue
+            if last_beat != stalled_since:
+                # The stack is taken once per stall, while the slow callback is still running
+                stalled_since = last_beat
+                operation, frames = self._stack(sys._current_frames().get(thread_id))
+                stalls.append({"blocked_ms": 0.0, "operation": operation, "stack": frames})
+            stalls[-1]["blocked_ms"] = round(blocked * 1000, 3)
+
+def _short_path(filename: str) -> str:
+    # The service's own files are shown relative to the working directory, others relative
+    # to the longest sys.path entry containing them, which reads like their module name
+    for directory in [os.getcwd()] + sorted(sys.path, key=len, reverse=True):
+        if directory and filename.startswith(directory + os.sep):
+            return filename[len(directory) + 1:]
+    return filename
@@ -0,0 +1,338 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# W3C Trace Context header, used in HTTP headers, gRPC metadata and NATS message headers
+TRACEPARENT_HEADER = "traceparent"
+
+# Spans an unsampled trace buffers for the tail decision; further spans are dropped
+MAX_BUFFERED_SPANS = 1000
+
+class SpanContext:
+    """The identity of a span, as propagated between processes."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: int, span_id: int, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @classmethod
+    def parse(cls, traceparent) -> Optional["SpanContext"]:
+        """Reads a `traceparent` value; malformed or missing values start a new trace instead."""
+        if isinstance(traceparent, bytes):
+            traceparent = traceparent.decode("latin-1")
+        if not traceparent:
+            return None
+        parts = traceparent.strip().split("-")
+        if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[0] == "ff":
+            return None
+        try:
+            trace_id, span_id, flags = int(parts[1], 16), int(parts[2], 16), int(parts[3][:2], 16)
+        except ValueError:
+            return None
+        if not trace_id or not span_id:
+            return None
+        return cls(trace_id, span_id, bool(flags & 1))
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id:032x}-{self.span_id:016x}-{'01' if self.sampled else '00'}"
+
+class _LocalTrace:
+    """The spans of one trace recorded in this process, under a single local root."""
+
+    __slots__ = ("sampled", "root", "spans", "error", "kept")
+
+    def __init__(self, sampled: bool):
+        self.sampled = sampled
+        self.root = None
+        self.spans = []
+        self.error = False
+        # The tail decision, made when the local root ends
+        self.kept = None
+
+class Span(SpanContext):
+    """A timed operation; used as a context manager, it is the current span inside the block."""
+
+    __slots__ = ("name", "kind", "parent_id", "start_ns", "end_ns", "attributes", "error", "_tracer", "_trace", "_token")
+
+    def __init__(self, tracer: "Tracer", trace: _LocalTrace, name: str, kind: str, trace_id: int, parent_id: int):
+        super().__init__(trace_id, random.getrandbits(64) or 1, trace.sampled)
+        self.name = name
+        self.kind = kind
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, object] = {}
+        self.error: Optional[str] = None
+        self._tracer = tracer
+        self._trace = trace
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error: str):
+        self.error = error
+        self._trace.error = True
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        self._tracer._on_end(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and self.error is None:
+            self.record_error(f"{exc_type.__name__}: {exc}")
+        _current_span.reset(self._token)
+        self.end()
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_span_id": f"{self.parent_id:016x}" if self.parent_id else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+class _NoopSpan:
+    """Returned while tracing is disabled, so instrumented code needs no checks of its own."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def record_error(self, error: str):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[SpanContext]] = ContextVar("current_span", default=None)
+
+class SpanExporter:
+    def export(self, spans: List[dict]):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans to a file, one JSON object per line.
+
+    Each batch is one append, so the processes of a supervisor can share the file.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def export(self, spans: List[dict]):
+        os.write(self._fd, "".join(json.dumps(span, default=str) + "\n" for span in spans).encode())
+
+    def shutdown(self):
+        os.close(self._fd)
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the most recent spans in memory, for tests and in-process inspection."""
+
+    def __init__(self, max_spans: int = 10000):
+        self.spans: Deque[dict] = deque(maxlen=max_spans)
+
+    def export(self, spans: List[dict]):
+        self.spans.extend(spans)
+
+class BatchSpanProcessor:
+    """Hands finished spans to a background thread that exports them in batches.
+
+    Ending a span only appends it to a bounded deque; converting and writing it
+    happens on the thread. Spans are dropped, and counted, while the deque is full.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = 10000, batch_size: int = 512, interval: float = 1.0):
+        self._exporter = exporter
+        self._max_queue_size = max_queue_size
+        self._batch_size = batch_size
+        self._interval = interval
+        self._queue: Deque[Span] = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._exported = 0
+        self._dropped = 0
+        self._failures = 0
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, spans: Iterable[Span]):
+        for span in spans:
+            if len(self._queue) >= self._max_queue_size:
+                self._dropped += 1
+                continue
+            self._queue.append(span)
+        if len(self._queue) >= self._batch_size:
+            self._wakeup.set()
+
+    def get_metrics(self) -> dict:
+        return {
+            "queue_depth": len(self._queue),
+            "exported_total": self._exported,
+            "dropped_total": self._dropped,
+            "export_failures_total": self._failures,
+        }
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            stopping = self._stopping
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self._batch_size:
+                    batch.append(self._queue.popleft().to_dict())
+                try:
+                    self._exporter.export(batch)
+                    self._exported += len(batch)
+                except Exception as e:
+                    self._failures += 1
+                    logger.warning("Error exporting %s spans: %s", len(batch), e)
+            if stopping:
+                return
+
+    def shutdown(self):
+        """Exports the spans still queued and stops the export thread."""
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._exporter.shutdown()
+
+class Tracer:
+    """Creates spans and decides which traces are exported.
+
+    Head sampling keeps `sample_rate` of new traces, and follows the decision
+    of the caller for traces started elsewhere. With tail sampling, the spans
+    of the other traces are buffered until their local root ends, then kept if
+    any of them failed or the root took `tail_latency` seconds or more.
+    Disabled, the tracer hands out a shared no-op span.
+    """
+
+    def __init__(self):
+        self._processor: Optional[BatchSpanProcessor] = None
+        self._sample_rate = 0.0
+        self._tail_sampling = False
+        self._tail_latency_ns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._processor is not None
+
+    def configure(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float = 0.01,
+        tail_sampling: bool = True,
+        tail_latency: float = 0.5,
+        max_queue_size: int = 10000,
+        batch_size: int = 512,
+        interval: float = 1.0,
+    ):
+        self.shutdown()
+        self._sample_rate = sample_rate
+        self._tail_sampling = tail_sampling
+        self._tail_latency_ns = int(tail_latency * 1e9)
+        self._processor = BatchSpanProcessor(exporter, max_queue_size, batch_size, interval)
+
+    def shutdown(self):
+        processor, self._processor = self._processor, None
+        if processor is not None:
+            processor.shutdown()
+
+    def get_metrics(self) -> dict:
+        return self._processor.get_metrics() if self._processor else {}
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[dict] = None,
+    ):
+        """Starts a span under `parent`, by default the current span, or a new trace without either."""
+        if self._processor is None:
+            return NOOP_SPAN
+        if parent is None:
+            parent = _current_span.get()
+        if isinstance(parent, Span):
+            span = Span(self, parent._trace, name, kind, parent.trace_id, parent.span_id)
+        else:
+            # A new local root, continuing a remote trace or starting one
+            if parent is None:
+                trace = _LocalTrace(random.random() < self._sample_rate)
+                span = Span(self, trace, name, kind, random.getrandbits(128) or 1, 0)
+            else:
+                trace = _LocalTrace(parent.sampled)
+                span = Span(self, trace, name, kind, parent.trace_id, parent.span_id)
+            trace.root = span
+        if attributes:
+            span.attributes.update(attributes)
+        return span
+
+    def current_span(self) -> Optional[SpanContext]:
+        return _current_span.get()
+
+    def current_traceparent(self) -> Optional[str]:
+        """The `traceparent` to send along with outgoing calls, or None outside of a trace."""
+        span = _current_span.get()
+        return span.traceparent() if span is not None else None
+
+    def _on_end(self, span: Span):
+        processor = self._processor
+        if processor is None:
+            return
+        trace = span._trace
+        if trace.sampled:
+            processor.on_end((span,))
+        elif trace.kept is not None:
+            # A span outliving its local root, such as a background task it started
+            if trace.kept:
+                processor.on_end((span,))
+        elif span is trace.root:
+            trace.kept = self._tail_sampling and (
+                trace.error or span.end_ns - span.start_ns >= self._tail_latency_ns
+            )
+            if trace.kept:
+                trace.spans.append(span)
+                processor.on_end(trace.spans)
+            trace.spans = None
+        elif self._tail_sampling and len(trace.spans) < MAX_BUFFERED_SPANS:
+            trace.spans.append(span)
+
+tracer = Tracer()
@@ -0,0 +1,107 @@
+
+import asyncio
+from src.domain.entities import Task
+from src.infrastructure.concurrency import deadline
+from src.domain.repository import TaskRepository
+from src.infrastructure.persistence.repository_decorator import TaskRepositoryDecorator
+from typing import Optional
+
+class BatchLoadError(Exception):
+    """A failed batch lookup, as seen by every caller in the batch but one.
+
+    Only one caller gets the original error, so a batch that fails counts once
+    towards a circuit breaker that excludes this error, however many callers
+    were waiting on it.
+    """
+
+class BatchingTaskRepository(TaskRepositoryDecorator):
+    """Collects concurrent get_by_id calls into a single get_many lookup.
+
+    Ids requested within the same event-loop tick, or within `batch_window`
+    seconds when it is positive, are loaded together. A batch is dispatched
+    early once it reaches `max_batch_size` ids. A batch is loaded without a
+    deadline, since its callers may each have a different one; each caller
+    only waits for it until its own. If the backend rejects a batch as invalid
+    input, its ids are looked up one by one, so only the callers of invalid ids
+    get the error.
+    """
+
+    def __init__(self, inner: TaskRepository, batch_window: float = 0.0, max_batch_size: int = 100):
+        super().__init__(inner)
+        self._batch_window = batch_window
+        self._max_batch_size = max_batch_size
+        self._pending = {}
+        self._flush_handle = None
+        # Loads in progress are referenced here, since the event loop keeps only weak references to tasks
+        self._loads = set()
+        self._batches = 0
+        self._keys = 0
+
+    def get_metrics(self) -> dict:
+        return {
+            "batches_total": self._batches,
+            "keys_total": self._keys,
+            "average_batch_size": self._keys / self._batches if self._batches else 0.0,
+        }
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(task_id, []).append(future)
+        if len(self._pending) >= self._max_batch_size:
+            self._dispatch()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            if self._batch_window > 0:
+                self._flush_handle = loop.call_later(self._batch_window, self._dispatch)
+            else:
+                self._flush_handle = loop.call_soon(self._dispatch)
+        return await deadline.bounded("batch", lambda: future)
+
+    def _dispatch(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            load = asyncio.ensure_future(deadline.detached(lambda: self._load(batch)))
+            self._loads.add(load)
+            load.add_done_callback(self._loads.discard)
+
+    async def _load(self, batch: dict):
+        self._batches += 1
+        self._keys += len(batch)
+        try:
+            tasks = await self._inner.get_many(list(batch))
+        except ValueError:
+            await asyncio.gather(*(self._load_one(task_id, futures) for task_id, futures in batch.items()))
+            return
+        except Exception as e:
+            self._fail([future for futures in batch.values() for future in futures], e)
+            return
+        for task_id, futures in batch.items():
+            self._resolve(futures, tasks.get(task_id))
+
+    async def _load_one(self, task_id: str, futures: list):
+        try:
+            task = await self._inner.get_by_id(task_id)
+        except Exception as e:
+            self._fail(futures, e)
+            return
+        self._resolve(futures, task)
+
+    def _resolve(self, futures: list, task: Optional[Task]):
+        for index, future in enumerate(futures):
+            if future.done():
+                continue
+            # Callers asking for the same id each get their own copy to mutate
+            future.set_result(task.model_copy() if task is not None and index else task)
+
+    def _fail(self, futures: list, error: Exception):
+        for future in futures:
+            if future.done():
+                continue
+            future.set_exception(error)
+            if not isinstance(error, BatchLoadError):
+                shared = BatchLoadError(str(error))
+                shared.__cause__ = error
+                error = shared
@@ -0,0 +1,140 @@
+
+import time
+from datetime import datetime
+from collections import OrderedDict
+from src.domain.entities import Task
+from src.domain.repository import TaskRepository
+from src.infrastructure.persistence.repository_decorator import TaskRepositoryDecorator
+from typing import Dict, List, Optional
+
+class CachedTaskRepository(TaskRepositoryDecorator):
+    """Read-through LRU cache with a TTL in front of get_by_id.
+
+    Writes through this repository invalidate the affected entries; writes on
+    other replicas arrive through `invalidate`. Callers always get a copy, so
+    mutating a returned task never changes the cached one.
+    """
+
+    def __init__(self, inner: TaskRepository, max_size: int = 10000, ttl_seconds: float = 30.0):
+        super().__init__(inner)
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._entries = OrderedDict()
+        # Bumped on every invalidation so a read that raced with a write is not cached
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def invalidate(self, task_id: str):
+        self._generation += 1
+        if self._entries.pop(task_id, None) is not None:
+            self._invalidations += 1
+
+    def get_metrics(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits_total": self._hits,
+            "misses_total": self._misses,
+            "evictions_total": self._evictions,
+            "expirations_total": self._expirations,
+            "invalidations_total": self._invalidations,
+        }
+
+    def _lookup(self, task_id: str) -> Optional[Task]:
+        entry = self._entries.get(task_id)
+        if entry is not None:
+            task, expires_at = entry
+            if expires_at > time.monotonic():
+                self._hits += 1
+                self._entries.move_to_end(task_id)
+                return task.model_copy()
+            self._expirations += 1
+            del self._entries[task_id]
+        self._misses += 1
+        return None
+
+    def _store(self, task: Task):
+        self._entries[task.id] = (task.model_copy(), time.monotonic() + self._ttl)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        task = self._lookup(task_id)
+        if task is not None:
+            return task
+        generation = self._generation
+        task = await self._inner.get_by_id(task_id)
+        if task is not None and generation == self._generation:
+            self._store(task)
+        return task
+
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        tasks = {}
+        missing = []
+        for task_id in task_ids:
+            task = self._lookup(task_id)
+            if task is not None:
+                tasks[task_id] = task
+            else:
+                missing.append(task_id)
+        if missing:
+            generation = self._generation
+            loaded = await self._inner.get_many(missing)
+            if generation == self._generation:
+                for task in loaded.values():
+                    self._store(task)
+            tasks.update(loaded)
+        return tasks
+
+    # Entries are invalidated after the write, so a read racing with it is not cached either
+    async def update(self, task: Task) -> Task:
+        updated_task = await self._inner.update(task)
+        self.invalidate(task.id)
+        return updated_task
+
+    async def delete(self, task_id: str):
+        await self._inner.delete(task_id)
+        self.invalidate(task_id)
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        updated_tasks = await self._inner.update_many(tasks)
+        for task in tasks:
+            self.invalidate(task.id)
+        return updated_tasks
+
+    async def delete_many(self, task_ids: List[str]):
+        await self._inner.delete_many(task_ids)
+        for task_id in task_ids:
+            self.invalidate(task_id)
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        tasks = await self._inner.claim_tasks(
+            owner, now, lease_until, limit, exclude_location_ids, exclude_configuration_ids
+        )
+        for task in tasks:
+            self.invalidate(task.id)
+        return tasks
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        renewed = await self._inner.renew_leases(task_ids, owner, lease_until)
+        for task_id in renewed:
+            self.invalidate(task_id)
+        return renewed
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        released = await self._inner.release_lease(task_id, owner, status)
+        self.invalidate(task_id)
+        return released
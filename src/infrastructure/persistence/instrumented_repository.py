@@ -0,0 +1,107 @@
+
+import time
+from datetime import datetime
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage
+from src.domain.repository import TaskRepository
+from src.infrastructure.monitoring.metrics import REPOSITORY_DURATION, REPOSITORY_ERRORS
+from src.infrastructure.monitoring.tracing import tracer
+from src.infrastructure.persistence.repository_decorator import TaskRepositoryDecorator
+from typing import Dict, List, Optional
+
+class InstrumentedTaskRepository(TaskRepositoryDecorator):
+    """Records the latency and errors of every repository call, per method, and traces it.
+
+    stream_all is forwarded as is, since how long a stream stays open depends on its reader.
+    """
+
+    def __init__(self, inner: TaskRepository):
+        super().__init__(inner)
+        self._metrics = {}
+        self._span_attributes = {"db.backend": type(inner).__name__}
+
+    async def _measure(self, method: str, call):
+        metrics = self._metrics.get(method)
+        if metrics is None:
+            metrics = self._metrics[method] = (REPOSITORY_DURATION.labels(method), REPOSITORY_ERRORS.labels(method))
+        start = time.perf_counter()
+        try:
+            with tracer.start_span(f"repository.{method}", kind="client", attributes=self._span_attributes):
+                return await call
+        except Exception:
+            metrics[1].inc()
+            raise
+        finally:
+            metrics[0].observe(time.perf_counter() - start)
+
+    async def connect(self):
+        await self._measure("connect", self._inner.connect())
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        return await self._measure("get_by_id", self._inner.get_by_id(task_id))
+
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        return await self._measure("get_many", self._inner.get_many(task_ids))
+
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        return await self._measure("get_all", self._inner.get_all(page, limit, cursor, filters, sort))
+
+    async def create(self, task: Task) -> Task:
+        return await self._measure("create", self._inner.create(task))
+
+    async def update(self, task: Task) -> Task:
+        return await self._measure("update", self._inner.update(task))
+
+    async def delete(self, task_id: str):
+        await self._measure("delete", self._inner.delete(task_id))
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        return await self._measure("create_many", self._inner.create_many(tasks))
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        return await self._measure("update_many", self._inner.update_many(tasks))
+
+    async def delete_many(self, task_ids: List[str]):
+        await self._measure("delete_many", self._inner.delete_many(task_ids))
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        await self._measure("add_outbox_messages", self._inner.add_outbox_messages(messages))
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        return await self._measure(
+            "claim_outbox_messages", self._inner.claim_outbox_messages(owner, now, lease_until, limit)
+        )
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        await self._measure("delete_outbox_messages", self._inner.delete_outbox_messages(message_ids))
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        return await self._measure("claim_emissions", self._inner.claim_emissions(keys, now, expires_at))
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        return await self._measure("claim_tasks", self._inner.claim_tasks(
+            owner, now, lease_until, limit, exclude_location_ids, exclude_configuration_ids
+        ))
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        return await self._measure("renew_leases", self._inner.renew_leases(task_ids, owner, lease_until))
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        return await self._measure("release_lease", self._inner.release_lease(task_id, owner, status))
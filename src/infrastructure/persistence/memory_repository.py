@@ -0,0 +1,611 @@
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+from src.domain.entities import Task
+from src.domain.filters import EQUALITY_FIELDS, TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage, encode_cursor, decode_cursor
+from src.domain.repository import TaskRepository
+from src.infrastructure.persistence.timestamps import from_micros, to_micros
+from typing import AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Positions in a task record
+SEQ, ID, STATUS, CONFIGURATION_ID, LOCATION_ID, USER_ID, ROLE_ID, DUE, LEASE_OWNER, LEASE_UNTIL, ATTEMPTS = range(11)
+FIELD_POSITIONS = {
+    "status": STATUS,
+    "location_id": LOCATION_ID,
+    "configuration_id": CONFIGURATION_ID,
+    "user_id": USER_ID,
+    "role_id": ROLE_ID,
+}
+# Fields with a secondary index; the other equality filters are checked per record
+INDEXED_FIELDS = ("status", "location_id", "configuration_id")
+
+# Snapshots and journals are JSON; the version is checked before either is read
+SNAPSHOT_VERSION = 1
+_INTERNED = (STATUS, CONFIGURATION_ID, LOCATION_ID, USER_ID, ROLE_ID)
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+def _loaded(record) -> tuple:
+    """A persisted record as a tuple again, with its repeated strings interned."""
+    record = list(record)
+    for position in _INTERNED:
+        record[position] = _intern(record[position])
+    return tuple(record)
+
+def _remove(entries, entry):
+    index = bisect_left(entries, entry)
+    if index < len(entries) and entries[index] == entry:
+        del entries[index]
+
+class _DueIndex:
+    """(due, sequence) pairs in order, kept in two parallel arrays of 64-bit integers."""
+
+    def __init__(self, dues=(), sequences=()):
+        self.dues = array("q", dues)
+        self.sequences = array("q", sequences)
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def locate(self, due: int, sequence: int) -> int:
+        """Index of the first pair not below (due, sequence)."""
+        lo = bisect_left(self.dues, due)
+        return bisect_left(self.sequences, sequence, lo, bisect_right(self.dues, due, lo))
+
+    def add(self, due: int, sequence: int):
+        index = self.locate(due, sequence)
+        self.dues.insert(index, due)
+        self.sequences.insert(index, sequence)
+
+    def remove(self, due: int, sequence: int):
+        index = self.locate(due, sequence)
+        if index < len(self) and self.dues[index] == due and self.sequences[index] == sequence:
+            del self.dues[index]
+            del self.sequences[index]
+
+class MemoryTaskRepository(TaskRepository):
+    """Keeps tasks in memory as compact tuples with sorted secondary indexes.
+
+    Tasks are stored as one tuple each, with repeated strings interned, and
+    indexed by insertion sequence (the id order), by status, location and
+    configuration, and by due date; the indexes are sorted arrays of 64-bit
+    integers, so ordered pagination starts at the cursor instead of sorting.
+    Reads return new Task objects built from the records.
+
+    With a `snapshot_path`, every change is appended to a journal flushed each
+    `journal_flush_interval` seconds, and the whole state is written to a
+    snapshot every `snapshot_interval` seconds, after which older journals are
+    deleted. On connect the snapshot is loaded and the newer journals replayed,
+    so at most the last flush interval of changes is lost in a crash.
+    """
+
+    def __init__(self, snapshot_path: str = "", snapshot_interval: float = 60.0, journal_flush_interval: float = 1.0):
+        self._records: Dict[int, tuple] = {}
+        self._sequences: Dict[str, int] = {}
+        self._log = array("q")
+        self._by_field = {field: {} for field in INDEXED_FIELDS}
+        self._by_due_date = _DueIndex()
+        self._next_sequence = 0
+        self._outbox: Dict[str, tuple] = {}
+        self._next_outbox_id = 0
+        # (owner, expiry) per claimed outbox message; one process has no use for them after a restart
+        self._outbox_leases: Dict[str, tuple] = {}
+        # Expiry per claimed emission key; like the leases they are not persisted
+        self._emissions: Dict[str, datetime] = {}
+        self._emissions_prune_at = 1024
+        self._snapshot_path = snapshot_path
+        self._snapshot_interval = snapshot_interval
+        self._journal_flush_interval = journal_flush_interval
+        self._generation = 0
+        self._pending_ops = []
+        self._persister = None
+        self._stopping = asyncio.Event()
+        self._snapshots = 0
+        self._last_snapshot_duration = 0.0
+
+    # Records and indexes
+
+    def _record(self, task: Task, sequence: int) -> tuple:
+        return (
+            sequence,
+            task.id,
+            _intern(task.status),
+            _intern(task.configuration_id),
+            _intern(task.location_id),
+            _intern(task.user_id),
+            _intern(task.role_id),
+            to_micros(task.due_date),
+            task.lease_owner,
+            to_micros(task.lease_until) if task.lease_until is not None else None,
+            task.attempts,
+        )
+
+    def _task(self, record: tuple) -> Task:
+        return Task.model_construct(
+            id=record[ID],
+            status=record[STATUS],
+            configuration_id=record[CONFIGURATION_ID],
+            location_id=record[LOCATION_ID],
+            user_id=record[USER_ID],
+            role_id=record[ROLE_ID],
+            due_date=from_micros(record[DUE]),
+            lease_owner=record[LEASE_OWNER],
+            lease_until=from_micros(record[LEASE_UNTIL]),
+            attempts=record[ATTEMPTS],
+        )
+
+    def _apply_put(self, record: tuple):
+        sequence = record[SEQ]
+        old = self._records.get(sequence)
+        if old is None:
+            insort(self._log, sequence)
+            for field in INDEXED_FIELDS:
+                insort(self._by_field[field].setdefault(record[FIELD_POSITIONS[field]], array("q")), sequence)
+            self._by_due_date.add(record[DUE], sequence)
+            self._next_sequence = max(self._next_sequence, sequence + 1)
+        else:
+            for field in INDEXED_FIELDS:
+                position = FIELD_POSITIONS[field]
+                if old[position] != record[position]:
+                    self._remove_from_bucket(field, old[position], sequence)
+                    insort(self._by_field[field].setdefault(record[position], array("q")), sequence)
+            if old[DUE] != record[DUE]:
+                self._by_due_date.remove(old[DUE], sequence)
+                self._by_due_date.add(record[DUE], sequence)
+        self._records[sequence] = record
+        self._sequences[record[ID]] = sequence
+
+    def _apply_delete(self, task_id: str):
+        sequence = self._sequences.pop(task_id, None)
+        if sequence is None:
+            return
+        record = self._records.pop(sequence)
+        _remove(self._log, sequence)
+        for field in INDEXED_FIELDS:
+            self._remove_from_bucket(field, record[FIELD_POSITIONS[field]], sequence)
+        self._by_due_date.remove(record[DUE], sequence)
+
+    def _remove_from_bucket(self, field: str, value, sequence: int):
+        bucket = self._by_field[field][value]
+        _remove(bucket, sequence)
+        if not bucket:
+            del self._by_field[field][value]
+
+    def _rebuild(self, records: List[tuple]):
+        """Indexes `records`, in sequence order, in bulk instead of one insertion at a time."""
+        self._records = {record[SEQ]: record for record in records}
+        self._sequences = {record[ID]: record[SEQ] for record in records}
+        self._log = array("q", self._records)
+        for field in INDEXED_FIELDS:
+            position = FIELD_POSITIONS[field]
+            buckets = self._by_field[field] = {}
+            for record in records:
+                buckets.setdefault(record[position], []).append(record[SEQ])
+            for value, bucket in buckets.items():
+                buckets[value] = array("q", bucket)
+        by_due_date = sorted((record[DUE], record[SEQ]) for record in records)
+        self._by_due_date = _DueIndex((due for due, _ in by_due_date), (sequence for _, sequence in by_due_date))
+
+    def _put(self, record: tuple):
+        self._apply_put(record)
+        if self._snapshot_path:
+            self._pending_ops.append(("put", record))
+
+    def _record_for(self, task_id: str) -> Optional[tuple]:
+        sequence = self._sequences.get(task_id)
+        return self._records[sequence] if sequence is not None else None
+
+    # Queries
+
+    def _position(self, record: tuple, sort: TaskSort) -> tuple:
+        return (record[DUE], record[SEQ]) if sort.field == "due_date" else (record[SEQ],)
+
+    def _decode_position(self, cursor: str, sort: TaskSort) -> tuple:
+        position = decode_cursor(cursor)
+        if position.get("sort", "id") != sort.field or not isinstance(position.get("seq"), int):
+            raise ValueError("Invalid pagination cursor")
+        if sort.field != "due_date":
+            return (position["seq"],)
+        if not isinstance(position.get("due"), int):
+            raise ValueError("Invalid pagination cursor")
+        return (position["due"], position["seq"])
+
+    def _page(self, records: List[tuple], limit: int, sort: TaskSort) -> TaskPage:
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            position = self._position(records[-1], sort)
+            cursor = {"sort": sort.field, "seq": position[-1]}
+            if sort.field == "due_date":
+                cursor["due"] = position[0]
+            next_cursor = encode_cursor(cursor)
+        return TaskPage(tasks=[self._task(record) for record in records], next_cursor=next_cursor)
+
+    def _matching(self, filters: TaskFilter, sort: TaskSort, after: Optional[tuple]):
+        """Yields the records matching `filters` in `sort` order, strictly after `after`."""
+        equality = [(FIELD_POSITIONS[field], value) for field, value in filters.equality_filters().items()]
+        due_lo = to_micros(filters.due_after) if filters.due_after is not None else None
+        due_hi = to_micros(filters.due_before) if filters.due_before is not None else None
+
+        def matches(record: tuple) -> bool:
+            if any(record[position] != value for position, value in equality):
+                return False
+            if due_lo is not None and record[DUE] < due_lo:
+                return False
+            return due_hi is None or record[DUE] < due_hi
+
+        # Each source is (sequences in id order, or None for the due index, lo, hi)
+        sources = [(self._log, 0, len(self._log))]
+        for field, value in filters.equality_filters().items():
+            if field in self._by_field:
+                bucket = self._by_field[field].get(value, ())
+                sources.append((bucket, 0, len(bucket)))
+        if due_lo is not None or due_hi is not None:
+            lo = bisect_left(self._by_due_date.dues, due_lo) if due_lo is not None else 0
+            hi = bisect_left(self._by_due_date.dues, due_hi) if due_hi is not None else len(self._by_due_date)
+            sources.append((None, lo, max(lo, hi)))
+        entries, lo, hi = min(sources, key=lambda source: source[2] - source[1])
+        sequences = self._by_due_date.sequences if entries is None else entries
+
+        if (entries is None) == (sort.field == "due_date"):
+            # Already in the requested order: start at the cursor and stop early
+            if after is not None:
+                # Sequences are integers, so the first entry past `after` is at or after (due, seq + 1)
+                if entries is not None:
+                    index = bisect_left(entries, after[0] + (0 if sort.descending else 1))
+                else:
+                    index = self._by_due_date.locate(after[0], after[1] + (0 if sort.descending else 1))
+                if sort.descending:
+                    hi = min(hi, index)
+                else:
+                    lo = max(lo, index)
+            indices = range(hi - 1, lo - 1, -1) if sort.descending else range(lo, hi)
+            for index in indices:
+                record = self._records[sequences[index]]
+                if matches(record):
+                    yield record
+            return
+
+        records = [self._records[sequences[index]] for index in range(lo, hi)]
+        records = [record for record in records if matches(record)]
+        records.sort(key=lambda record: self._position(record, sort), reverse=sort.descending)
+        for record in records:
+            position = self._position(record, sort)
+            if after is None or (position < after if sort.descending else position > after):
+                yield record
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        record = self._record_for(task_id)
+        return self._task(record) if record is not None else None
+
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        records = (self._record_for(task_id) for task_id in task_ids)
+        return {record[ID]: self._task(record) for record in records if record is not None}
+
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        filters = filters or TaskFilter()
+        sort = sort or TaskSort()
+        if cursor:
+            matching = self._matching(filters, sort, self._decode_position(cursor, sort))
+            return self._page(list(islice(matching, limit + 1)), limit, sort)
+        start = (page - 1) * limit
+        matching = self._matching(filters, sort, None)
+        return self._page(list(islice(matching, start, start + limit + 1)), limit, sort)
+
+    async def stream_all(self, batch_size: int) -> AsyncIterator[Task]:
+        # Resumes each batch after the last sequence seen, so concurrent writes are safe
+        last_sequence = -1
+        while True:
+            start = bisect_right(self._log, last_sequence)
+            sequences = self._log[start:start + batch_size]
+            if not sequences:
+                return
+            last_sequence = sequences[-1]
+            for sequence in sequences:
+                # Tasks deleted since the batch was read are skipped
+                record = self._records.get(sequence)
+                if record is not None:
+                    yield self._task(record)
+            await asyncio.sleep(0)
+
+    # Writes
+
+    async def create(self, task: Task) -> Task:
+        task.id = str(uuid.uuid4())
+        self._put(self._record(task, self._next_sequence))
+        return task
+
+    async def update(self, task: Task) -> Task:
+        sequence = self._sequences.get(task.id, self._next_sequence)
+        self._put(self._record(task, sequence))
+        return task
+
+    async def delete(self, task_id: str):
+        if task_id in self._sequences:
+            self._apply_delete(task_id)
+            if self._snapshot_path:
+                self._pending_ops.append(("delete", task_id))
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        return [await self.create(task) for task in tasks]
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        return [await self.update(task) for task in tasks]
+
+    async def delete_many(self, task_ids: List[str]):
+        for task_id in task_ids:
+            await self.delete(task_id)
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        for message in messages:
+            message.id = str(self._next_outbox_id)
+            self._next_outbox_id += 1
+            self._outbox[message.id] = (message.event_type, message.payload, message.trace_parent)
+            if self._snapshot_path:
+                self._pending_ops.append(("outbox_put", message.id, message.event_type, message.payload, message.trace_parent))
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        messages = []
+        for message_id, (event_type, payload, trace_parent) in self._outbox.items():
+            if len(messages) == limit:
+                break
+            lease_owner, leased_until = self._outbox_leases.get(message_id, (None, None))
+            if leased_until is None or leased_until < now or lease_owner == owner:
+                self._outbox_leases[message_id] = (owner, lease_until)
+                messages.append(OutboxMessage(id=message_id, event_type=event_type, payload=payload, trace_parent=trace_parent))
+        return messages
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        for message_id in message_ids:
+            self._outbox_leases.pop(message_id, None)
+            if self._outbox.pop(message_id, None) is not None and self._snapshot_path:
+                self._pending_ops.append(("outbox_delete", message_id))
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        if len(self._emissions) >= self._emissions_prune_at:
+            self._emissions = {key: expiry for key, expiry in self._emissions.items() if expiry >= now}
+            self._emissions_prune_at = 2 * len(self._emissions) + 1024
+        claimed = []
+        for key in keys:
+            expiry = self._emissions.get(key)
+            if expiry is None or expiry < now:
+                self._emissions[key] = expires_at
+                claimed.append(key)
+        return claimed
+
+    # Leases
+
+    def _claimable(self, record: tuple, now: int, excluded_locations: set, excluded_configurations: set) -> bool:
+        if record[DUE] > now:
+            return False
+        if record[STATUS] == "running":
+            if record[LEASE_UNTIL] is not None and record[LEASE_UNTIL] >= now:
+                return False
+        elif record[STATUS] != "created":
+            return False
+        return record[LOCATION_ID] not in excluded_locations and record[CONFIGURATION_ID] not in excluded_configurations
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        now_us = to_micros(now)
+        excluded = (set(exclude_location_ids or ()), set(exclude_configuration_ids or ()))
+        buckets = [self._by_field["status"].get(status, ()) for status in ("created", "running")]
+        due_end = bisect_right(self._by_due_date.dues, now_us)
+        if sum(len(bucket) for bucket in buckets) < due_end:
+            # Fewer pending tasks than tasks due: read the status buckets and order them
+            records = [self._records[sequence] for bucket in buckets for sequence in bucket]
+            records = sorted(
+                (record for record in records if self._claimable(record, now_us, *excluded)),
+                key=lambda record: (record[DUE], record[SEQ]),
+            )[:limit]
+        else:
+            # Walk the due tasks in order and stop once enough are claimable
+            due_records = (self._records[self._by_due_date.sequences[index]] for index in range(due_end))
+            records = list(islice((record for record in due_records if self._claimable(record, now_us, *excluded)), limit))
+        lease_until_us = to_micros(lease_until)
+        claimed = []
+        for record in records:
+            record = record[:STATUS] + ("running",) + record[STATUS + 1:LEASE_OWNER] + (owner, lease_until_us, record[ATTEMPTS] + 1)
+            self._put(record)
+            claimed.append(self._task(record))
+        return claimed
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        lease_until_us = to_micros(lease_until)
+        renewed = []
+        for task_id in task_ids:
+            record = self._record_for(task_id)
+            if record is not None and record[STATUS] == "running" and record[LEASE_OWNER] == owner:
+                self._put(record[:LEASE_UNTIL] + (lease_until_us,) + record[ATTEMPTS:])
+                renewed.append(task_id)
+        return renewed
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        record = self._record_for(task_id)
+        if record is None or record[STATUS] != "running" or record[LEASE_OWNER] != owner:
+            return False
+        attempts = record[ATTEMPTS] - 1 if status == "created" else record[ATTEMPTS]
+        self._put(record[:STATUS] + (_intern(status),) + record[STATUS + 1:LEASE_OWNER] + (None, None, attempts))
+        return True
+
+    # Persistence
+
+    def _journal_path(self, generation: int) -> str:
+        return f"{self._snapshot_path}.journal.{generation}"
+
+    def _append_journal(self, generation: int, ops: list):
+        if not ops:
+            return
+        with open(self._journal_path(generation), "ab") as journal:
+            if journal.tell() == 0:
+                journal.write(json.dumps({"version": SNAPSHOT_VERSION}).encode() + b"\n")
+            journal.write(b"".join(json.dumps(op, separators=(",", ":")).encode() + b"\n" for op in ops))
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _write_snapshot(self, state: dict):
+        temporary = f"{self._snapshot_path}.tmp"
+        with open(temporary, "wb") as snapshot:
+            snapshot.write(json.dumps(state, separators=(",", ":")).encode())
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, self._snapshot_path)
+        for path in glob.glob(f"{glob.escape(self._snapshot_path)}.journal.*"):
+            if int(path.rsplit(".", 1)[1]) < state["generation"]:
+                os.remove(path)
+
+    def _replay(self, op: tuple):
+        kind = op[0]
+        if kind == "put":
+            self._apply_put(_loaded(op[1]))
+        elif kind == "delete":
+            self._apply_delete(op[1])
+        elif kind == "outbox_put":
+            self._outbox[op[1]] = (op[2], op[3], op[4])
+            self._next_outbox_id = max(self._next_outbox_id, int(op[1]) + 1)
+        elif kind == "outbox_delete":
+            self._outbox.pop(op[1], None)
+
+    def _read_journal(self, generation: int):
+        """Yields the journal's ops, up to its end or a write torn by a crash."""
+        with open(self._journal_path(generation), "rb") as journal:
+            try:
+                header = json.loads(journal.readline())
+            except ValueError:
+                # Torn by a crash before any op was written
+                return
+            if not isinstance(header, dict) or header.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported journal version in {self._journal_path(generation)}")
+            for line in journal:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+
+    def _read_snapshot(self) -> dict:
+        with open(self._snapshot_path, "rb") as snapshot:
+            state = json.loads(snapshot.read())
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {self._snapshot_path}")
+        return state
+
+    def _load(self):
+        if os.path.exists(self._snapshot_path):
+            state = self._read_snapshot()
+            self._generation = state["generation"]
+            self._next_outbox_id = state["next_outbox_id"]
+            self._rebuild([_loaded(record) for record in state["records"]])
+            self._next_sequence = state["next_sequence"]
+            self._outbox = {entry[0]: (entry[1], entry[2], entry[3]) for entry in state["outbox"]}
+        generations = sorted(
+            int(path.rsplit(".", 1)[1]) for path in glob.glob(f"{glob.escape(self._snapshot_path)}.journal.*")
+        )
+        replayed = 0
+        for generation in (generation for generation in generations if generation >= self._generation):
+            for op in self._read_journal(generation):
+                self._replay(op)
+                replayed += 1
+            self._generation = max(self._generation, generation)
+
+        logger.info(
+            "Loaded %s tasks and %s outbox messages from %s (%s journal entries replayed)",
+            len(self._records), len(self._outbox), self._snapshot_path, replayed,
+        )
+
+    async def flush_journal(self):
+        ops, self._pending_ops = self._pending_ops, []
+        await asyncio.to_thread(self._append_journal, self._generation, ops)
+
+    async def snapshot(self):
+        """Writes the current state to the snapshot file and drops the journals it covers."""
+        started = time.perf_counter()
+        # Changes made from here on go to the next generation's journal
+        ops, self._pending_ops = self._pending_ops, []
+        previous_generation = self._generation
+        self._generation += 1
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "generation": self._generation,
+            "next_sequence": self._next_sequence,
+            "next_outbox_id": self._next_outbox_id,
+            # Records are immutable tuples, so copying the lists is enough for a consistent view
+            "records": [self._records[sequence] for sequence in self._log],
+            "outbox": [(message_id, *message) for message_id, message in self._outbox.items()],
+        }
+        # Until the snapshot is in place the previous one plus its journal must stay complete
+        await asyncio.to_thread(self._append_journal, previous_generation, ops)
+        await asyncio.to_thread(self._write_snapshot, state)
+        self._snapshots += 1
+        self._last_snapshot_duration = time.perf_counter() - started
+
+    async def _persist(self):
+        next_snapshot = time.monotonic() + self._snapshot_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._journal_flush_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                if time.monotonic() >= next_snapshot:
+                    await self.snapshot()
+                    next_snapshot = time.monotonic() + self._snapshot_interval
+                else:
+                    await self.flush_journal()
+            except Exception as e:
+                logger.warning("Error persisting in-memory tasks: %s", e)
+
+    async def connect(self):
+        if not self._snapshot_path or self._persister is not None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self._snapshot_path)), exist_ok=True)
+        await asyncio.to_thread(self._load)
+        self._stopping.clear()
+        self._persister = asyncio.create_task(self._persist())
+
+    async def close(self):
+        if self._persister is None:
+            return
+        # A flush or snapshot in progress is finished, not cut off, before the last snapshot
+        self._stopping.set()
+        await self._persister
+        self._persister = None
+        await self.snapshot()
+
+    def get_metrics(self) -> dict:
+        return {
+            "tasks": len(self._records),
+            "outbox_messages": len(self._outbox),
+            "journal_pending": len(self._pending_ops),
+            "snapshots_total": self._snapshots,
+            "last_snapshot_seconds": self._last_snapshot_duration,
+        }
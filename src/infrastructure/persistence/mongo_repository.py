@@ -1,15 +1,138 @@
 
-from pymongo import MongoClient
+import asyncio
+import functools
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+import pymongo
+from pymongo import ASCENDING, AsyncMongoClient, IndexModel, UpdateOne
+from pymongo.errors import PyMongoError
 from src.domain.entities import Task
+from src.domain.filters import EQUALITY_FIELDS, TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
 from src.domain.repository import TaskRepository
+from src.domain.pagination import TaskPage, encode_cursor, decode_cursor
+from src.infrastructure.concurrency import deadline
 from bson import ObjectId
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Session of the transaction the current atomically() call runs in, which every operation joins
+_session: ContextVar = ContextVar("mongo_session", default=None)
+
+def within_deadline(method):
+    """Bounds the decorated call by the request's remaining deadline, if it has one.
+
+    pymongo's client-side operation timeout turns the budget into maxTimeMS on
+    the server and into socket and pool checkout timeouts on the client, so an
+    expired request stops holding a connection and a server operation. Only
+    reads are bounded: a write cut off by its deadline may still have been
+    applied, and the command would stop between its write and its event.
+    """
+    @functools.wraps(method)
+    async def bounded(self, *args, **kwargs):
+        budget = deadline.remaining()
+        if budget is None:
+            return await method(self, *args, **kwargs)
+        if budget <= 0:
+            raise deadline.exceeded("mongo")
+        try:
+            with pymongo.timeout(budget):
+                return await method(self, *args, **kwargs)
+        except PyMongoError as e:
+            if e.timeout and deadline.remaining() <= 0:
+                raise deadline.exceeded("mongo") from e
+            raise
+    return bounded
+
+def _object_id(task_id: str) -> ObjectId:
+    # A ValueError, like other invalid client input, rather than bson's InvalidId
+    if not ObjectId.is_valid(task_id):
+        raise ValueError(f"Invalid task id: {task_id!r}")
+    return ObjectId(task_id)
 
 class MongoTaskRepository(TaskRepository):
-    def __init__(self, connection_string: str):
-        self.client = MongoClient(connection_string)
+    # Compound indexes backing the task filters: the equality field first, then
+    # the due_date sort/range and _id as the keyset tie-breaker, and the
+    # equality field followed by _id alone for the default sort by id.
+    INDEXES = [
+        *(
+            IndexModel([(field, ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)])
+            for field in EQUALITY_FIELDS
+        ),
+        *(IndexModel([(field, ASCENDING), ("_id", ASCENDING)]) for field in EQUALITY_FIELDS),
+        IndexModel([("due_date", ASCENDING), ("_id", ASCENDING)]),
+        # Expired leases of running tasks are claimed again
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+    ]
+
+    def __init__(
+        self,
+        connection_string: str,
+        max_pool_size: int = 100,
+        min_pool_size: int = 0,
+        compressors: str = "",
+        prewarm: bool = True,
+        ensure_indexes: bool = True,
+    ):
+        client_options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+        }
+        if compressors:
+            client_options["compressors"] = compressors
+        self.client = AsyncMongoClient(connection_string, **client_options)
         self.db = self.client.tasks_db
         self.collection = self.db.tasks
+        self.outbox = self.db.outbox
+        self.emissions = self.db.emissions
+        self._min_pool_size = min_pool_size
+        self._prewarm = prewarm
+        self._ensure_indexes = ensure_indexes
+
+    async def connect(self):
+        """Opens the client, creates missing indexes and, if enabled, pre-warms the connection pool."""
+        await self.client.aconnect()
+        if self._ensure_indexes:
+            # A no-op for indexes that already exist with the same keys
+            names = await self.collection.create_indexes(self.INDEXES)
+            logger.info("MongoDB task indexes ensured: %s", ", ".join(names))
+            # Claimed emissions are removed by the server once they expire
+            await self.emissions.create_index("expires_at", expireAfterSeconds=0)
+        if not self._prewarm:
+            return
+        # Concurrent pings each check out their own pooled connection, so the
+        # handshakes happen now instead of on the first requests.
+        connections = max(1, self._min_pool_size)
+        await asyncio.gather(*(self.client.admin.command("ping") for _ in range(connections)))
+        logger.info("MongoDB connection pool pre-warmed with %s connection(s)", connections)
+
+    async def ping(self):
+        await self.client.admin.command("ping")
+
+    async def close(self):
+        await self.client.close()
+
+    async def atomically(self, work: Callable[[], Awaitable[T]]) -> T:
+        """Runs `work` in a multi-document transaction, which needs a replica set.
+
+        The transaction is retried as a whole on transient errors, so `work` may run more than once.
+        """
+        if _session.get() is not None:
+            return await work()
+
+        async def run(session):
+            token = _session.set(session)
+            try:
+                return await work()
+            finally:
+                _session.reset(token)
+
+        async with self.client.start_session() as session:
+            return await session.with_transaction(run)
 
     def _from_mongo(self, document: dict) -> Task:
         """Converts a MongoDB document to a Task entity."""
@@ -21,29 +144,253 @@ class MongoTaskRepository(TaskRepository):
     def _to_mongo(self, task: Task) -> dict:
         """Converts a Task entity to a MongoDB document."""
         data = task.model_dump()
+        # The lease is left out of serialized tasks but stored like any other field
+        data["lease_owner"] = task.lease_owner
+        data["lease_until"] = task.lease_until
         if data.get("id"):
             data["_id"] = ObjectId(data.pop("id"))
         return data
 
+    @within_deadline
     async def get_by_id(self, task_id: str) -> Optional[Task]:
-        document = self.collection.find_one({"_id": ObjectId(task_id)})
+        document = await self.collection.find_one({"_id": _object_id(task_id)}, session=_session.get())
         return self._from_mongo(document)
 
-    async def get_all(self, page: int, limit: int) -> List[Task]:
-        start = (page - 1) * limit
-        documents = self.collection.find().skip(start).limit(limit)
-        return [self._from_mongo(doc) for doc in documents]
+    @within_deadline
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        object_ids = [_object_id(task_id) for task_id in task_ids]
+        if not object_ids:
+            return {}
+        documents = self.collection.find({"_id": {"$in": object_ids}}, session=_session.get())
+        tasks = [self._from_mongo(doc) async for doc in documents]
+        return {task.id: task for task in tasks}
+
+    def _build_query(self, filters: TaskFilter) -> dict:
+        query = filters.equality_filters()
+        due_range = {}
+        if filters.due_after is not None:
+            due_range["$gte"] = filters.due_after
+        if filters.due_before is not None:
+            due_range["$lt"] = filters.due_before
+        if due_range:
+            query["due_date"] = due_range
+        return query
+
+    def _keyset_query(self, cursor: str, sort: TaskSort) -> dict:
+        position = decode_cursor(cursor)
+        if position.get("sort", "id") != sort.field or not ObjectId.is_valid(position.get("id")):
+            raise ValueError("Invalid pagination cursor")
+        last_id = ObjectId(position["id"])
+        operator = "$lt" if sort.descending else "$gt"
+        if sort.field == "id":
+            return {"_id": {operator: last_id}}
+        try:
+            last_due = datetime.fromisoformat(position["due"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid pagination cursor")
+        return {"$or": [
+            {"due_date": {operator: last_due}},
+            {"due_date": last_due, "_id": {operator: last_id}},
+        ]}
+
+    @within_deadline
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        filters = filters or TaskFilter()
+        sort = sort or TaskSort()
+        query = self._build_query(filters)
+        direction = -1 if sort.descending else 1
+        sort_keys = [("_id", direction)]
+        if sort.field == "due_date":
+            sort_keys.insert(0, ("due_date", direction))
+
+        # One extra document is fetched to tell whether another page follows
+        if cursor:
+            query = {"$and": [query, self._keyset_query(cursor, sort)]}
+            documents = self.collection.find(query).sort(sort_keys).limit(limit + 1)
+        else:
+            start = (page - 1) * limit
+            documents = self.collection.find(query).sort(sort_keys).skip(start).limit(limit + 1)
+        tasks = [self._from_mongo(doc) async for doc in documents]
+        if len(tasks) <= limit:
+            return TaskPage(tasks=tasks)
+        tasks = tasks[:limit]
+        position = {"sort": sort.field, "id": tasks[-1].id}
+        if sort.field == "due_date":
+            position["due"] = tasks[-1].due_date.isoformat()
+        return TaskPage(tasks=tasks, next_cursor=encode_cursor(position))
+
+    async def stream_all(self, batch_size: int) -> AsyncIterator[Task]:
+        documents = self.collection.find().sort("_id", 1).batch_size(batch_size)
+        try:
+            async for document in documents:
+                yield self._from_mongo(document)
+        finally:
+            await documents.close()
 
     async def create(self, task: Task) -> Task:
         document = self._to_mongo(task)
-        result = self.collection.insert_one(document)
+        result = await self.collection.insert_one(document, session=_session.get())
         task.id = str(result.inserted_id)
         return task
 
     async def update(self, task: Task) -> Task:
         document = self._to_mongo(task)
-        self.collection.update_one({"_id": ObjectId(task.id)}, {"$set": document})
+        await self.collection.update_one({"_id": _object_id(task.id)}, {"$set": document}, session=_session.get())
         return task
 
     async def delete(self, task_id: str):
-        self.collection.delete_one({"_id": ObjectId(task_id)})
+        await self.collection.delete_one({"_id": _object_id(task_id)}, session=_session.get())
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        if not tasks:
+            return []
+        result = await self.collection.insert_many([self._to_mongo(task) for task in tasks], session=_session.get())
+        for task, inserted_id in zip(tasks, result.inserted_ids):
+            task.id = str(inserted_id)
+        return tasks
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        if not tasks:
+            return []
+        operations = [
+            UpdateOne({"_id": _object_id(task.id)}, {"$set": self._to_mongo(task)})
+            for task in tasks
+        ]
+        await self.collection.bulk_write(operations, ordered=False, session=_session.get())
+        return tasks
+
+    async def delete_many(self, task_ids: List[str]):
+        if not task_ids:
+            return
+        await self.collection.delete_many(
+            {"_id": {"$in": [_object_id(task_id) for task_id in task_ids]}}, session=_session.get()
+        )
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        # ObjectIds are generated increasing, so sorting by _id keeps events in order
+        documents = [
+            {"_id": ObjectId(), "event_type": m.event_type, "payload": m.payload, "trace_parent": m.trace_parent}
+            for m in messages
+        ]
+        if documents:
+            await self.outbox.insert_many(documents, session=_session.get())
+        for message, document in zip(messages, documents):
+            message.id = str(document["_id"])
+
+    def _outbox_message(self, document: dict) -> OutboxMessage:
+        return OutboxMessage(
+            id=str(document["_id"]),
+            event_type=document["event_type"],
+            payload=document["payload"],
+            trace_parent=document.get("trace_parent"),
+        )
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        claimable = {"$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}, {"lease_owner": owner}]}
+        candidates = self.outbox.find(claimable, {"_id": 1}).sort("_id", 1).limit(limit)
+        candidate_ids = [doc["_id"] async for doc in candidates]
+        if not candidate_ids:
+            return []
+        # As with tasks, the update checks the lease again, so racing relays never share a message
+        await self.outbox.update_many(
+            {"$and": [{"_id": {"$in": candidate_ids}}, claimable]},
+            {"$set": {"lease_owner": owner, "lease_until": lease_until}},
+        )
+        documents = self.outbox.find(
+            {"_id": {"$in": candidate_ids}, "lease_owner": owner, "lease_until": lease_until}
+        ).sort("_id", 1)
+        return [self._outbox_message(doc) async for doc in documents]
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        if message_ids:
+            await self.outbox.delete_many({"_id": {"$in": [ObjectId(message_id) for message_id in message_ids]}})
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        if not keys:
+            return []
+        # Each update only takes a key that is new or expired, marking it with this call's
+        # token, so when instances race for a key exactly one of them finds its token on it.
+        # Missing expiries compare as null, which sorts before any date.
+        token = ObjectId()
+        expired = {"$lt": [{"$ifNull": ["$expires_at", None]}, now]}
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                [{"$set": {
+                    "claim": {"$cond": [expired, token, "$claim"]},
+                    "expires_at": {"$cond": [expired, expires_at, "$expires_at"]},
+                }}],
+                upsert=True,
+            )
+            for key in keys
+        ]
+        await self.emissions.bulk_write(operations, ordered=False, session=_session.get())
+        documents = self.emissions.find({"_id": {"$in": keys}, "claim": token}, {"_id": 1}, session=_session.get())
+        claimed = {doc["_id"] async for doc in documents}
+        return [key for key in keys if key in claimed]
+
+    def _claimable_query(self, now: datetime) -> dict:
+        return {"$or": [
+            {"status": "created", "due_date": {"$lte": now}},
+            {"status": "running", "lease_until": {"$lt": now}},
+        ]}
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        query = self._claimable_query(now)
+        if exclude_location_ids:
+            query["location_id"] = {"$nin": exclude_location_ids}
+        if exclude_configuration_ids:
+            query["configuration_id"] = {"$nin": exclude_configuration_ids}
+        candidates = self.collection.find(query, {"_id": 1}).sort("due_date", 1).limit(limit)
+        candidate_ids = [doc["_id"] async for doc in candidates]
+        if not candidate_ids:
+            return []
+        # The claimable condition is checked again by the update, so when replicas
+        # race for the same candidates each task is taken by exactly one of them.
+        # The unique lease (owner, lease_until) then tells which ones this call got.
+        await self.collection.update_many(
+            {"$and": [{"_id": {"$in": candidate_ids}}, self._claimable_query(now)]},
+            {"$set": {"status": "running", "lease_owner": owner, "lease_until": lease_until}, "$inc": {"attempts": 1}},
+        )
+        documents = self.collection.find(
+            {"_id": {"$in": candidate_ids}, "lease_owner": owner, "lease_until": lease_until}
+        ).sort("due_date", 1)
+        return [self._from_mongo(doc) async for doc in documents]
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        if not task_ids:
+            return []
+        query = {
+            "_id": {"$in": [_object_id(task_id) for task_id in task_ids]},
+            "status": "running",
+            "lease_owner": owner,
+        }
+        await self.collection.update_many(query, {"$set": {"lease_until": lease_until}})
+        documents = self.collection.find({**query, "lease_until": lease_until}, {"_id": 1})
+        return [str(doc["_id"]) async for doc in documents]
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        result = await self.collection.update_one(
+            {"_id": _object_id(task_id), "status": "running", "lease_owner": owner},
+            {
+                "$set": {"status": status, "lease_owner": None, "lease_until": None},
+                "$inc": {"attempts": -1 if status == "created" else 0},
+            },
+            session=_session.get(),
+        )
+        return result.matched_count == 1
@@ -0,0 +1,93 @@
+
+from datetime import datetime
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage
+from src.domain.repository import TaskRepository
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class TaskRepositoryDecorator(TaskRepository):
+    """Forwards every call to the wrapped repository; subclasses override what they add."""
+
+    def __init__(self, inner: TaskRepository):
+        self._inner = inner
+
+    async def connect(self):
+        await self._inner.connect()
+
+    async def close(self):
+        await self._inner.close()
+
+    async def atomically(self, work: Callable[[], Awaitable[T]]) -> T:
+        return await self._inner.atomically(work)
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        return await self._inner.get_by_id(task_id)
+
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        return await self._inner.get_many(task_ids)
+
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        return await self._inner.get_all(page, limit, cursor, filters, sort)
+
+    def stream_all(self, batch_size: int) -> AsyncIterator[Task]:
+        return self._inner.stream_all(batch_size)
+
+    async def create(self, task: Task) -> Task:
+        return await self._inner.create(task)
+
+    async def update(self, task: Task) -> Task:
+        return await self._inner.update(task)
+
+    async def delete(self, task_id: str):
+        await self._inner.delete(task_id)
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        return await self._inner.create_many(tasks)
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        return await self._inner.update_many(tasks)
+
+    async def delete_many(self, task_ids: List[str]):
+        await self._inner.delete_many(task_ids)
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        await self._inner.add_outbox_messages(messages)
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        return await self._inner.claim_outbox_messages(owner, now, lease_until, limit)
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        await self._inner.delete_outbox_messages(message_ids)
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        return await self._inner.claim_emissions(keys, now, expires_at)
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        return await self._inner.claim_tasks(
+            owner, now, lease_until, limit, exclude_location_ids, exclude_configuration_ids
+        )
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        return await self._inner.renew_leases(task_ids, owner, lease_until)
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        return await self._inner.release_lease(task_id, owner, status)
@@ -0,0 +1,608 @@
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.domain.pagination import TaskPage, encode_cursor, decode_cursor
+from src.domain.repository import TaskRepository
+from src.infrastructure.persistence.timestamps import from_micros, to_micros
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Dates are stored as integer microseconds since the epoch, in UTC
+COLUMNS = "seq, id, status, configuration_id, location_id, user_id, role_id, due_date, lease_owner, lease_until, attempts"
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS tasks (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        status TEXT NOT NULL,
+        configuration_id TEXT NOT NULL,
+        location_id TEXT NOT NULL,
+        user_id TEXT,
+        role_id TEXT,
+        due_date INTEGER NOT NULL,
+        lease_owner TEXT,
+        lease_until INTEGER,
+        attempts INTEGER NOT NULL DEFAULT 0
+    )""",
+    # Every index ends with the implicit seq, so each one serves an equality
+    # filter in id order, and the due_date ones the due_date sort and range.
+    "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)",
+    "CREATE INDEX IF NOT EXISTS tasks_location_id ON tasks (location_id)",
+    "CREATE INDEX IF NOT EXISTS tasks_configuration_id ON tasks (configuration_id)",
+    "CREATE INDEX IF NOT EXISTS tasks_user_id ON tasks (user_id)",
+    "CREATE INDEX IF NOT EXISTS tasks_role_id ON tasks (role_id)",
+    "CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date)",
+    "CREATE INDEX IF NOT EXISTS tasks_status_due_date ON tasks (status, due_date)",
+    # Expired leases of running tasks are claimed again
+    "CREATE INDEX IF NOT EXISTS tasks_status_lease_until ON tasks (status, lease_until)",
+    """CREATE TABLE IF NOT EXISTS outbox (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        trace_parent TEXT,
+        lease_owner TEXT,
+        lease_until INTEGER
+    )""",
+    "CREATE TABLE IF NOT EXISTS emissions (key TEXT PRIMARY KEY, expires_at INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS emissions_expires_at ON emissions (expires_at)",
+]
+CLAIMABLE = "((status = 'created' AND due_date <= ?) OR (status = 'running' AND lease_until < ?))"
+# Stays below SQLite's limit on bound parameters per statement
+MAX_PARAMETERS = 900
+# Writes of the current atomically() call, which the writer thread applies as one write
+_unit: ContextVar[Optional[queue.SimpleQueue]] = ContextVar("sqlite_unit", default=None)
+# End a unit, which is then committed with the writer's transaction or rolled back
+_UNIT_DONE = object()
+_UNIT_FAILED = object()
+
+def _placeholders(values: list) -> str:
+    return ", ".join("?" * len(values))
+
+def _chunks(values: list):
+    for start in range(0, len(values), MAX_PARAMETERS):
+        yield values[start:start + MAX_PARAMETERS]
+
+def _resolve(future: asyncio.Future, succeeded: bool, value):
+    # Done already when cancelled, or answered again as the writer stops
+    if future.done():
+        return
+    if succeeded:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
+
+class SqliteTaskRepository(TaskRepository):
+    """Stores tasks in an SQLite database file in WAL mode, for single-node sites.
+
+    The event loop never runs SQLite itself. Writes are queued to one writer
+    thread, which commits everything queued since its last commit as a single
+    transaction, each write in its own savepoint so a failing one does not
+    fail the others. Reads run on a pool of threads with their own read-only
+    connections; with WAL they see the last commit and don't wait for the
+    writer. Statements are fixed strings, so each connection prepares them
+    once and reuses them from its statement cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        read_threads: int = 4,
+        max_batch_size: int = 256,
+        synchronous: str = "NORMAL",
+        busy_timeout: float = 5.0,
+    ):
+        self._path = path
+        self._read_threads = read_threads
+        self._max_batch_size = max_batch_size
+        self._synchronous = synchronous
+        self._busy_timeout = busy_timeout
+        self._writes = queue.SimpleQueue()
+        self._writer = None
+        # Why writes fail once the writer thread has stopped
+        self._writer_error: Optional[Exception] = None
+        self._readers = None
+        self._reader_connections = []
+        self._local = threading.local()
+        self._commits = 0
+        self._writes_committed = 0
+
+    def _open(self, read_only: bool = False) -> sqlite3.Connection:
+        # Autocommit mode: the writer opens its transactions explicitly
+        connection = sqlite3.connect(
+            self._path,
+            timeout=self._busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        connection.execute(f"PRAGMA synchronous = {self._synchronous}")
+        if read_only:
+            connection.execute("PRAGMA query_only = 1")
+        else:
+            connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    # Writer thread
+
+    def _write_loop(self, connection: sqlite3.Connection):
+        error = RuntimeError("SQLite repository is closed")
+        writes = []
+        try:
+            while True:
+                batch = [self._writes.get()]
+                while len(batch) < self._max_batch_size:
+                    try:
+                        batch.append(self._writes.get_nowait())
+                    except queue.Empty:
+                        break
+                writes = [write for write in batch if write is not None]
+                if writes:
+                    self._commit(connection, writes)
+                if len(writes) < len(batch):
+                    return
+        except BaseException as e:
+            logger.critical("SQLite writer thread stopped: %s", e)
+            error = RuntimeError(f"SQLite writer thread stopped: {e}")
+            for write in writes:
+                self._answer(write, False, error)
+            raise
+        finally:
+            connection.close()
+            # Nothing queued from here on would ever be committed
+            self._writer_error = error
+            self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                write = self._writes.get_nowait()
+            except queue.Empty:
+                return
+            if write is not None:
+                self._answer(write, False, self._writer_error)
+
+    @staticmethod
+    def _answer(write: tuple, succeeded: bool, value):
+        _, future, loop = write
+        try:
+            loop.call_soon_threadsafe(_resolve, future, succeeded, value)
+        except RuntimeError:
+            pass  # The caller's event loop is already closed
+
+    def _commit(self, connection: sqlite3.Connection, writes: list):
+        results = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for write, _, _ in writes:
+                connection.execute("SAVEPOINT write")
+                try:
+                    results.append((True, write(connection)))
+                except Exception as e:
+                    connection.execute("ROLLBACK TO write")
+                    results.append((False, e))
+                connection.execute("RELEASE write")
+            connection.execute("COMMIT")
+            self._commits += 1
+            self._writes_committed += len(writes)
+        except Exception as e:
+            logger.error("SQLite commit of %s writes failed: %s", len(writes), e)
+            if connection.in_transaction:
+                try:
+                    connection.execute("ROLLBACK")
+                except sqlite3.Error as rollback_error:
+                    # SQLite may have rolled back already; the writes are failed either way
+                    logger.error("SQLite rollback failed: %s", rollback_error)
+            results = [(False, e)] * len(writes)
+        # Callers are answered only once their write is committed
+        for write, (succeeded, value) in zip(writes, results):
+            self._answer(write, succeeded, value)
+
+    def _apply_unit(self, connection: sqlite3.Connection, unit: queue.SimpleQueue):
+        # Blocks the writer while the unit's work runs, so nothing else is committed in between
+        while True:
+            item = unit.get()
+            if item is _UNIT_DONE:
+                return
+            if item is _UNIT_FAILED:
+                raise RuntimeError("Atomic write failed")
+            write = item[0]
+            connection.execute("SAVEPOINT unit_write")
+            try:
+                result = (True, write(connection))
+            except Exception as e:
+                connection.execute("ROLLBACK TO unit_write")
+                result = (False, e)
+            connection.execute("RELEASE unit_write")
+            self._answer(item, *result)
+
+    async def _write(self, write: Callable[[sqlite3.Connection], object]):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._writer_error is not None:
+            raise self._writer_error
+        unit = _unit.get()
+        (self._writes if unit is None else unit).put((write, future, loop))
+        if self._writer_error is not None:
+            # The writer stopped after the check above and may not have seen this write
+            self._fail_pending()
+        return await future
+
+    async def atomically(self, work: Callable[[], Awaitable[T]]) -> T:
+        """Runs `work` with its writes applied in one savepoint of the writer's transaction.
+
+        The writer applies them as they come and holds back every other write
+        until `work` returns; they are only committed, or rolled back if it fails,
+        afterwards.
+        """
+        if _unit.get() is not None:
+            return await work()
+        unit = queue.SimpleQueue()
+        committed = asyncio.ensure_future(self._write(lambda connection: self._apply_unit(connection, unit)))
+        token = _unit.set(unit)
+        try:
+            result = await work()
+        except BaseException:
+            unit.put(_UNIT_FAILED)
+            await asyncio.gather(committed, return_exceptions=True)
+            raise
+        finally:
+            _unit.reset(token)
+        unit.put(_UNIT_DONE)
+        await committed
+        return result
+
+    async def _read(self, read: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._run_read, read, args)
+
+    def _run_read(self, read: Callable, args: tuple):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._open(read_only=True)
+            self._reader_connections.append(connection)
+        return read(connection, *args)
+
+    async def connect(self):
+        if self._writer is not None:
+            return
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._open()
+        for statement in SCHEMA:
+            connection.execute(statement)
+        self._writer_error = None
+        self._writer = threading.Thread(target=self._write_loop, args=(connection,), name="sqlite-writer", daemon=True)
+        self._writer.start()
+        self._readers = ThreadPoolExecutor(self._read_threads, thread_name_prefix="sqlite-reader")
+        logger.info("SQLite task repository opened at %s", self._path)
+
+    async def ping(self):
+        # Through the writer, which fails if the thread has died or the database is locked or read-only
+        await self._write(lambda connection: connection.execute("SELECT 1").fetchone())
+
+    async def close(self):
+        if self._writer is None:
+            return
+        self._writes.put(None)
+        await asyncio.to_thread(self._writer.join)
+        await asyncio.to_thread(self._readers.shutdown)
+        for connection in self._reader_connections:
+            connection.close()
+        self._writer = None
+        self._readers = None
+        self._reader_connections = []
+
+    # Rows
+
+    def _task(self, row: tuple) -> Task:
+        return Task.model_construct(
+            id=row[1],
+            status=row[2],
+            configuration_id=row[3],
+            location_id=row[4],
+            user_id=row[5],
+            role_id=row[6],
+            due_date=from_micros(row[7]),
+            lease_owner=row[8],
+            lease_until=from_micros(row[9]),
+            attempts=row[10],
+        )
+
+    def _values(self, task: Task) -> tuple:
+        return (
+            task.status,
+            task.configuration_id,
+            task.location_id,
+            task.user_id,
+            task.role_id,
+            to_micros(task.due_date),
+            task.lease_owner,
+            to_micros(task.lease_until) if task.lease_until is not None else None,
+            task.attempts,
+            task.id,
+        )
+
+    # Reads
+
+    def _select_many(self, connection: sqlite3.Connection, task_ids: List[str]) -> List[tuple]:
+        rows = []
+        for chunk in _chunks(task_ids):
+            rows.extend(connection.execute(f"SELECT {COLUMNS} FROM tasks WHERE id IN ({_placeholders(chunk)})", chunk))
+        return rows
+
+    def _select_page(self, connection: sqlite3.Connection, sql: str, params: list) -> List[tuple]:
+        return connection.execute(sql, params).fetchall()
+
+    async def get_by_id(self, task_id: str) -> Optional[Task]:
+        rows = await self._read(self._select_many, [task_id])
+        return self._task(rows[0]) if rows else None
+
+    async def get_many(self, task_ids: List[str]) -> Dict[str, Task]:
+        rows = await self._read(self._select_many, list(task_ids))
+        return {row[1]: self._task(row) for row in rows}
+
+    def _keyset(self, cursor: str, sort: TaskSort) -> tuple:
+        position = decode_cursor(cursor)
+        if position.get("sort", "id") != sort.field or not isinstance(position.get("seq"), int):
+            raise ValueError("Invalid pagination cursor")
+        operator = "<" if sort.descending else ">"
+        if sort.field != "due_date":
+            return f"seq {operator} ?", [position["seq"]]
+        if not isinstance(position.get("due"), int):
+            raise ValueError("Invalid pagination cursor")
+        return f"(due_date, seq) {operator} (?, ?)", [position["due"], position["seq"]]
+
+    async def get_all(
+        self,
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilter] = None,
+        sort: Optional[TaskSort] = None,
+    ) -> TaskPage:
+        filters = filters or TaskFilter()
+        sort = sort or TaskSort()
+        conditions, params = [], []
+        for field, value in filters.equality_filters().items():
+            conditions.append(f"{field} = ?")
+            params.append(value)
+        if filters.due_after is not None:
+            conditions.append("due_date >= ?")
+            params.append(to_micros(filters.due_after))
+        if filters.due_before is not None:
+            conditions.append("due_date < ?")
+            params.append(to_micros(filters.due_before))
+        if cursor:
+            condition, position = self._keyset(cursor, sort)
+            conditions.append(condition)
+            params.extend(position)
+        direction = "DESC" if sort.descending else "ASC"
+        order = f"due_date {direction}, seq {direction}" if sort.field == "due_date" else f"seq {direction}"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # One extra row is fetched to tell whether another page follows
+        sql = f"SELECT {COLUMNS} FROM tasks {where} ORDER BY {order} LIMIT ?"
+        params.append(limit + 1)
+        if not cursor:
+            sql += " OFFSET ?"
+            params.append((page - 1) * limit)
+        rows = await self._read(self._select_page, sql, params)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            position = {"sort": sort.field, "seq": rows[-1][0]}
+            if sort.field == "due_date":
+                position["due"] = rows[-1][7]
+            next_cursor = encode_cursor(position)
+        return TaskPage(tasks=[self._task(row) for row in rows], next_cursor=next_cursor)
+
+    async def stream_all(self, batch_size: int) -> AsyncIterator[Task]:
+        sql = f"SELECT {COLUMNS} FROM tasks WHERE seq > ? ORDER BY seq LIMIT ?"
+        last_sequence = 0
+        while True:
+            rows = await self._read(self._select_page, sql, [last_sequence, batch_size])
+            for row in rows:
+                yield self._task(row)
+            if len(rows) < batch_size:
+                return
+            last_sequence = rows[-1][0]
+
+    # Writes
+
+    def _insert(self, connection: sqlite3.Connection, tasks: List[Task]):
+        connection.executemany(
+            f"INSERT INTO tasks ({COLUMNS.replace('seq, id', 'id')}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(values[-1],) + values[:-1] for values in map(self._values, tasks)],
+        )
+
+    def _update(self, connection: sqlite3.Connection, tasks: List[Task]):
+        connection.executemany(
+            "UPDATE tasks SET status = ?, configuration_id = ?, location_id = ?, user_id = ?, role_id = ?,"
+            " due_date = ?, lease_owner = ?, lease_until = ?, attempts = ? WHERE id = ?",
+            [self._values(task) for task in tasks],
+        )
+
+    def _delete(self, connection: sqlite3.Connection, task_ids: List[str]):
+        for chunk in _chunks(task_ids):
+            connection.execute(f"DELETE FROM tasks WHERE id IN ({_placeholders(chunk)})", chunk)
+
+    async def create(self, task: Task) -> Task:
+        return (await self.create_many([task]))[0]
+
+    async def update(self, task: Task) -> Task:
+        return (await self.update_many([task]))[0]
+
+    async def delete(self, task_id: str):
+        await self.delete_many([task_id])
+
+    async def create_many(self, tasks: List[Task]) -> List[Task]:
+        if not tasks:
+            return []
+        for task in tasks:
+            task.id = str(uuid.uuid4())
+        await self._write(lambda connection: self._insert(connection, tasks))
+        return tasks
+
+    async def update_many(self, tasks: List[Task]) -> List[Task]:
+        if tasks:
+            await self._write(lambda connection: self._update(connection, tasks))
+        return tasks
+
+    async def delete_many(self, task_ids: List[str]):
+        if task_ids:
+            await self._write(lambda connection: self._delete(connection, list(task_ids)))
+
+    def _insert_outbox(self, connection: sqlite3.Connection, messages: List[OutboxMessage]):
+        for message in messages:
+            cursor = connection.execute(
+                "INSERT INTO outbox (event_type, payload, trace_parent) VALUES (?, ?, ?)",
+                (message.event_type, message.payload, message.trace_parent),
+            )
+            message.id = str(cursor.lastrowid)
+
+    def _claim_outbox(self, connection: sqlite3.Connection, owner: str, now: int, lease_until: int, limit: int) -> List[tuple]:
+        return connection.execute(
+            "UPDATE outbox SET lease_owner = ?, lease_until = ? WHERE seq IN"
+            " (SELECT seq FROM outbox WHERE lease_until IS NULL OR lease_until < ? OR lease_owner = ? ORDER BY seq LIMIT ?)"
+            " RETURNING seq, event_type, payload, trace_parent",
+            (owner, lease_until, now, owner, limit),
+        ).fetchall()
+
+    def _delete_outbox(self, connection: sqlite3.Connection, message_ids: List[int]):
+        for chunk in _chunks(message_ids):
+            connection.execute(f"DELETE FROM outbox WHERE seq IN ({_placeholders(chunk)})", chunk)
+
+    async def add_outbox_messages(self, messages: List[OutboxMessage]):
+        if messages:
+            await self._write(lambda connection: self._insert_outbox(connection, messages))
+
+    def _outbox_messages(self, rows: List[tuple]) -> List[OutboxMessage]:
+        return [
+            OutboxMessage(id=str(seq), event_type=event_type, payload=payload, trace_parent=trace_parent)
+            for seq, event_type, payload, trace_parent in rows
+        ]
+
+    async def claim_outbox_messages(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[OutboxMessage]:
+        rows = await self._write(
+            lambda connection: self._claim_outbox(connection, owner, to_micros(now), to_micros(lease_until), limit)
+        )
+        # RETURNING gives no order guarantee
+        return self._outbox_messages(sorted(rows))
+
+    async def delete_outbox_messages(self, message_ids: List[str]):
+        if message_ids:
+            sequences = [int(message_id) for message_id in message_ids]
+            await self._write(lambda connection: self._delete_outbox(connection, sequences))
+
+    def _claim_emissions(self, connection: sqlite3.Connection, keys: List[str], now: int, expires_at: int) -> List[str]:
+        connection.execute("DELETE FROM emissions WHERE expires_at < ?", (now,))
+        claimed = []
+        for key in keys:
+            cursor = connection.execute("INSERT OR IGNORE INTO emissions (key, expires_at) VALUES (?, ?)", (key, expires_at))
+            if cursor.rowcount == 1:
+                claimed.append(key)
+        return claimed
+
+    async def claim_emissions(self, keys: List[str], now: datetime, expires_at: datetime) -> List[str]:
+        if not keys:
+            return []
+        return await self._write(
+            lambda connection: self._claim_emissions(connection, list(keys), to_micros(now), to_micros(expires_at))
+        )
+
+    # Leases
+
+    def _claim(
+        self,
+        connection: sqlite3.Connection,
+        owner: str,
+        now: int,
+        lease_until: int,
+        limit: int,
+        exclude_location_ids: List[str],
+        exclude_configuration_ids: List[str],
+    ) -> List[tuple]:
+        # The select and update run in the writer's transaction, so no other claim interleaves
+        conditions, params = [CLAIMABLE], [now, now]
+        if exclude_location_ids:
+            conditions.append(f"location_id NOT IN ({_placeholders(exclude_location_ids)})")
+            params.extend(exclude_location_ids)
+        if exclude_configuration_ids:
+            conditions.append(f"configuration_id NOT IN ({_placeholders(exclude_configuration_ids)})")
+            params.extend(exclude_configuration_ids)
+        sequences = [row[0] for row in connection.execute(
+            f"SELECT seq FROM tasks WHERE {' AND '.join(conditions)} ORDER BY due_date, seq LIMIT ?", params + [limit]
+        )]
+        if not sequences:
+            return []
+        rows = connection.execute(
+            "UPDATE tasks SET status = 'running', lease_owner = ?, lease_until = ?, attempts = attempts + 1"
+            f" WHERE seq IN ({_placeholders(sequences)}) RETURNING {COLUMNS}",
+            [owner, lease_until] + sequences,
+        ).fetchall()
+        return sorted(rows, key=lambda row: (row[7], row[0]))
+
+    def _renew(self, connection: sqlite3.Connection, task_ids: List[str], owner: str, lease_until: int) -> List[str]:
+        renewed = []
+        for chunk in _chunks(task_ids):
+            renewed.extend(row[0] for row in connection.execute(
+                f"UPDATE tasks SET lease_until = ? WHERE id IN ({_placeholders(chunk)})"
+                " AND status = 'running' AND lease_owner = ? RETURNING id",
+                [lease_until] + chunk + [owner],
+            ))
+        return renewed
+
+    def _release(self, connection: sqlite3.Connection, task_id: str, owner: str, status: str) -> bool:
+        cursor = connection.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, lease_until = NULL, attempts = attempts - ?"
+            " WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (status, int(status == "created"), task_id, owner),
+        )
+        return cursor.rowcount == 1
+
+    async def claim_tasks(
+        self,
+        owner: str,
+        now: datetime,
+        lease_until: datetime,
+        limit: int,
+        exclude_location_ids: Optional[List[str]] = None,
+        exclude_configuration_ids: Optional[List[str]] = None,
+    ) -> List[Task]:
+        rows = await self._write(lambda connection: self._claim(
+            connection,
+            owner,
+            to_micros(now),
+            to_micros(lease_until),
+            limit,
+            list(exclude_location_ids or ()),
+            list(exclude_configuration_ids or ()),
+        ))
+        return [self._task(row) for row in rows]
+
+    async def renew_leases(self, task_ids: List[str], owner: str, lease_until: datetime) -> List[str]:
+        if not task_ids:
+            return []
+        renewed = set(await self._write(lambda connection: self._renew(connection, list(task_ids), owner, to_micros(lease_until))))
+        return [task_id for task_id in task_ids if task_id in renewed]
+
+    async def release_lease(self, task_id: str, owner: str, status: str) -> bool:
+        return await self._write(lambda connection: self._release(connection, task_id, owner, status))
+
+    def get_metrics(self) -> dict:
+        return {
+            "write_queue": self._writes.qsize(),
+            "commits_total": self._commits,
+            "writes_total": self._writes_committed,
+        }
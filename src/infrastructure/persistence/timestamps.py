@@ -0,0 +1,16 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def to_micros(value: datetime) -> int:
+    """Exact microseconds since the epoch; naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+def from_micros(micros: Optional[int]) -> Optional[datetime]:
+    # Returned as naive UTC, as the Mongo repository does
+    return None if micros is None else _NAIVE_EPOCH + timedelta(microseconds=micros)
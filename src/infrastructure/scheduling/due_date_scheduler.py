@@ -0,0 +1,239 @@
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from src.domain.entities import Task
+from src.domain.events import TaskDueEvent, TaskOverdueEvent
+from src.domain.filters import TaskFilter, TaskSort, due_timestamp
+from src.domain.repository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+DUE = 0
+OVERDUE = 1
+
+# Statuses of tasks that are still pending: not yet picked up, or being worked on
+PENDING_STATUSES = ("created", "running")
+
+class DueDateScheduler:
+    """Emits TaskDueEvent when a pending task's due date arrives and
+    TaskOverdueEvent when it is still pending `overdue_after` seconds later.
+
+    Only tasks due within the next `horizon` seconds are held in memory, in a
+    single heap served by one background loop; the window is refilled from the
+    repository as time moves on. About `max_pending` tasks are held at most: when
+    the window is denser than that it is cut short and the rest is loaded later.
+    Each batch of tasks is read again before its events fire, so tasks finished
+    elsewhere in the meantime are dropped.
+    On start the window reaches back `overdue_after` seconds, so an event may be
+    fired again after a restart. Events are published through the mediator,
+    which claims each one in the repository first: however many replicas or
+    restarts fire an event, it is emitted once.
+    """
+
+    def __init__(
+        self,
+        task_repository: TaskRepository,
+        horizon: float = 3600.0,
+        overdue_after: float = 3600.0,
+        max_pending: int = 100000,
+        batch_size: int = 500,
+        poll_interval: float = 60.0,
+        max_retry_delay: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._task_repository = task_repository
+        self._publish: Optional[Callable[[Dict[str, object], datetime, datetime], Awaitable[List[str]]]] = None
+        self._horizon = horizon
+        self._overdue_after = overdue_after
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_retry_delay = max_retry_delay
+        self._clock = clock
+        # Heap of (fire time, kind, task id, due date). Cancelled or rescheduled
+        # entries stay in the heap until popped; `_pending` holds the live ones.
+        self._heap = []
+        self._pending = {}
+        self._loaded_until = self._accept_until = clock() - overdue_after
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._due_total = 0
+        self._overdue_total = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Due date scheduler started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Due date scheduler stopped")
+
+    def use_publisher(self, publish: Callable[[Dict[str, object], datetime, datetime], Awaitable[List[str]]]):
+        """Publishes events with `publish(events by key, now, expires_at)`, which returns the keys it emitted."""
+        self._publish = publish
+
+    def get_metrics(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "heap_size": len(self._heap),
+            "due_total": self._due_total,
+            "overdue_total": self._overdue_total,
+            "loaded_until": self._loaded_until,
+        }
+
+    def schedule(self, tasks: List[Task]):
+        """Tracks newly created tasks that fall inside the loaded window."""
+        for task in tasks:
+            if task.status != "created":
+                continue
+            due = due_timestamp(task.due_date)
+            if due >= self._accept_until:
+                continue  # Picked up when the window reaches it
+            if len(self._pending) >= self._max_pending:
+                # No room: shrink the window so the task is loaded from the repository later
+                self._loaded_until = self._accept_until = min(self._loaded_until, due)
+                continue
+            self._push(due, DUE, task.id, task.due_date)
+
+    def cancel(self, task_ids: List[str]):
+        """Stops tracking completed or deleted tasks."""
+        for task_id in task_ids:
+            self._pending.pop(task_id, None)
+        # Drop cancelled entries once they make up most of the heap
+        if len(self._heap) > 2 * len(self._pending) + 1024:
+            self._heap = [entry for entry in self._heap if self._pending.get(entry[2]) == entry[:2]]
+            heapq.heapify(self._heap)
+
+    def _push(self, fire_at: float, kind: int, task_id: str, due_date: datetime):
+        if self._pending.get(task_id) == (fire_at, kind):
+            return
+        self._pending[task_id] = (fire_at, kind)
+        heapq.heappush(self._heap, (fire_at, kind, task_id, due_date))
+        if self._heap[0][2] == task_id:
+            self._wakeup.set()
+
+    def _needs_load(self) -> bool:
+        return len(self._pending) < self._max_pending and self._loaded_until < self._clock() + self._horizon / 2
+
+    async def load_window(self):
+        """Loads the pending tasks due before now + horizon that are not loaded yet."""
+        start, until = self._loaded_until, self._clock() + self._horizon
+        if until <= start or len(self._pending) >= self._max_pending:
+            return
+        filters = TaskFilter(
+            status="created",
+            due_after=datetime.fromtimestamp(start, timezone.utc),
+            due_before=datetime.fromtimestamp(until, timezone.utc),
+        )
+        # Tasks created while pages are loading may be behind the repository cursor
+        self._accept_until = until
+        loaded_until, cursor = start, None
+        try:
+            while True:
+                limit = max(1, min(self._batch_size, self._max_pending - len(self._pending)))
+                page = await self._task_repository.get_all(1, limit, cursor, filters, TaskSort(field="due_date"))
+                for task in page.tasks:
+                    self._push(due_timestamp(task.due_date), DUE, task.id, task.due_date)
+                cursor = page.next_cursor
+                if not cursor:
+                    loaded_until = until
+                    break
+                last_due = due_timestamp(page.tasks[-1].due_date)
+                if len(self._pending) >= self._max_pending and last_due > start:
+                    # Tasks due from here on are dropped when popped and loaded again later
+                    loaded_until = last_due
+                    logger.warning("Due date scheduler holds %s tasks; window cut short", len(self._pending))
+                    break
+        finally:
+            self._loaded_until = self._accept_until = min(loaded_until, self._accept_until)
+
+    async def fire_due(self) -> int:
+        """Fires one batch of due and overdue events and returns how many were fired.
+
+        Events already emitted by another replica are not emitted again.
+        """
+        now = self._clock()
+        entries = []
+        while self._heap and self._heap[0][0] <= now and len(entries) < self._batch_size:
+            entry = heapq.heappop(self._heap)
+            if self._pending.get(entry[2]) != entry[:2]:
+                continue
+            del self._pending[entry[2]]
+            # Past a window that was cut short; the task is loaded again with the next one
+            if entry[1] == DUE and entry[0] >= self._loaded_until:
+                continue
+            entries.append(entry)
+        if not entries:
+            return 0
+
+        popped = entries
+        # Keys are kept for as long as a restarted scheduler could fire their event again
+        expires_at = datetime.fromtimestamp(now + self._horizon + 2 * self._overdue_after, timezone.utc)
+        try:
+            # Only local commands cancel entries; tasks completed or deleted by another
+            # replica or by the worker pool are found to be no longer pending here
+            tasks = await self._task_repository.get_many(list({entry[2] for entry in entries}))
+            entries = [entry for entry in entries if entry[2] in tasks and tasks[entry[2]].status in PENDING_STATUSES]
+            if not entries:
+                return 0
+            # The key is the same on every replica that fires the event
+            events = {
+                f"{'due' if kind == DUE else 'overdue'}:{task_id}:{due_timestamp(due_date)!r}": (
+                    TaskDueEvent if kind == DUE else TaskOverdueEvent
+                )(task_id=task_id, due_date=due_date)
+                for _, kind, task_id, due_date in entries
+            }
+            emitted = await self._publish(events, datetime.fromtimestamp(now, timezone.utc), expires_at)
+        except Exception:
+            for entry in popped:
+                self._push(*entry)
+            raise
+
+        for fire_at, kind, task_id, due_date in entries:
+            if kind == DUE and self._overdue_after > 0:
+                self._push(fire_at + self._overdue_after, OVERDUE, task_id, due_date)
+        for key in emitted:
+            if key.startswith("due:"):
+                self._due_total += 1
+            else:
+                self._overdue_total += 1
+        return len(entries)
+
+    async def _run(self):
+        retry_delay = 1.0
+        while True:
+            # Cleared before working so a schedule() during the batch is not missed
+            self._wakeup.clear()
+            try:
+                if self._needs_load():
+                    await self.load_window()
+                fired = await self.fire_due()
+                retry_delay = 1.0
+            except Exception as e:
+                logger.warning("Error running due date scheduler, retrying in %.1fs: %s", retry_delay, e)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self._max_retry_delay)
+                continue
+            if fired == self._batch_size:
+                continue
+            now = self._clock()
+            delay = self._poll_interval
+            if len(self._pending) < self._max_pending:
+                delay = min(delay, self._loaded_until - self._horizon / 2 - now)
+            if self._heap:
+                delay = min(delay, self._heap[0][0] - now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(delay, 0.01))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,274 @@
+
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import socket
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from src.application.commands_queries import CompleteTaskCommand
+from src.domain.entities import Task
+from src.domain.mediator import Mediator
+from src.domain.repository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+def default_task_handler(task: dict):
+    """Executing a task without a dedicated handler simply completes it."""
+    logger.info("Executing task %s for configuration %s", task["id"], task["configuration_id"])
+
+def load_handler(path: str) -> Callable:
+    """Resolves a "package.module:function" path to the task handler."""
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+class TaskWorkerPool:
+    """Claims due tasks under a lease and runs their handler.
+
+    Claims are atomic in the repository, so replicas share the work without
+    executing a task twice while its lease is held. Leases are renewed while
+    the handler runs; a task whose handler fails keeps its lease until it
+    expires and is then claimed again, which spaces out retries. After
+    `max_attempts` claims (0 for no limit) a failing task is moved to the
+    terminal "failed" status instead, as is one claimed again past its last
+    attempt because the worker running it died.
+
+    Handlers receive the task as a dict and run on the event loop ("asyncio",
+    sync or async handlers), a thread pool ("thread") or a process pool
+    ("process", module-level handlers only). At most `concurrency` tasks run at
+    once, and at most `location_concurrency`/`configuration_concurrency` per
+    location or configuration on this replica (0 for no limit).
+    """
+
+    def __init__(
+        self,
+        task_repository: TaskRepository,
+        mediator: Mediator,
+        handler: Callable = default_task_handler,
+        executor: str = "asyncio",
+        concurrency: int = 10,
+        processes: int = 0,
+        location_concurrency: int = 0,
+        configuration_concurrency: int = 0,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+        max_retry_delay: float = 30.0,
+        max_attempts: int = 0,
+    ):
+        if executor not in ("asyncio", "thread", "process"):
+            raise ValueError(f"Unknown worker executor '{executor}'")
+        self._task_repository = task_repository
+        self._mediator = mediator
+        self._handler = handler
+        self._executor_type = executor
+        self._concurrency = concurrency
+        self._processes = processes
+        self._location_concurrency = location_concurrency
+        self._configuration_concurrency = configuration_concurrency
+        self._lease = timedelta(seconds=lease_seconds)
+        self._poll_interval = poll_interval
+        self._max_retry_delay = max_retry_delay
+        self._max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._executor = None
+        self._running = {}
+        self._handling = set()
+        self._by_location = Counter()
+        self._by_configuration = Counter()
+        self._wakeup = asyncio.Event()
+        self._claimer = None
+        self._renewer = None
+        self._claimed = 0
+        self._completed = 0
+        self._failed = 0
+        self._completion_failures = 0
+        self._released = 0
+        self._lost = 0
+        self._abandoned = 0
+
+    def start(self):
+        if self._claimer is not None:
+            return
+        if self._executor_type == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self._concurrency)
+        elif self._executor_type == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self._processes or None)
+        self._claimer = asyncio.create_task(self._run())
+        self._renewer = asyncio.create_task(self._renew_loop())
+        logger.info("Task worker pool %s started with %s executor", self.owner, self._executor_type)
+
+    async def stop(self):
+        """Stops claiming and hands the leases of unfinished tasks back."""
+        if self._claimer is None:
+            return
+        for loop_task in (self._claimer, self._renewer):
+            loop_task.cancel()
+        await asyncio.gather(self._claimer, self._renewer, return_exceptions=True)
+        self._claimer = self._renewer = None
+        running = list(self._running.values())
+        for execution in running:
+            execution.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        logger.info("Task worker pool %s stopped", self.owner)
+
+    def get_metrics(self) -> dict:
+        return {
+            "running": len(self._running),
+            "claimed_total": self._claimed,
+            "completed_total": self._completed,
+            "failed_total": self._failed,
+            "completion_failures_total": self._completion_failures,
+            "released_total": self._released,
+            "lost_leases_total": self._lost,
+            "abandoned_total": self._abandoned,
+        }
+
+    def _saturated(self, counts: Counter, limit: int) -> list:
+        return [key for key, count in counts.items() if count >= limit] if limit else []
+
+    def _has_room(self, task: Task) -> bool:
+        if self._location_concurrency and self._by_location[task.location_id] >= self._location_concurrency:
+            return False
+        if (
+            self._configuration_concurrency
+            and self._by_configuration[task.configuration_id] >= self._configuration_concurrency
+        ):
+            return False
+        return True
+
+    async def claim_once(self) -> int:
+        """Claims as many due tasks as there are free slots and starts them."""
+        capacity = self._concurrency - len(self._running)
+        if capacity <= 0:
+            return 0
+        now = datetime.now(timezone.utc)
+        tasks = await self._task_repository.claim_tasks(
+            self.owner,
+            now,
+            now + self._lease,
+            capacity,
+            self._saturated(self._by_location, self._location_concurrency),
+            self._saturated(self._by_configuration, self._configuration_concurrency),
+        )
+        self._claimed += len(tasks)
+        started = 0
+        for task in tasks:
+            if self._max_attempts and task.attempts > self._max_attempts:
+                await self._abandon(task)
+                continue
+            # One claim can return several tasks of a location that only has room for some
+            if not self._has_room(task):
+                await self._task_repository.release_lease(task.id, self.owner, "created")
+                self._released += 1
+                continue
+            self._by_location[task.location_id] += 1
+            self._by_configuration[task.configuration_id] += 1
+            self._running[task.id] = asyncio.create_task(self._execute(task))
+            started += 1
+        return started
+
+    def _last_attempt(self, task: Task) -> bool:
+        return bool(self._max_attempts) and task.attempts >= self._max_attempts
+
+    async def _abandon(self, task: Task):
+        if await self._task_repository.release_lease(task.id, self.owner, "failed"):
+            self._abandoned += 1
+            logger.error("Task %s failed after %s attempts", task.id, task.attempts)
+
+    async def _call_handler(self, task: Task):
+        payload = task.model_dump(mode="json")
+        if self._executor is None:
+            result = self._handler(payload)
+            if inspect.isawaitable(result):
+                await result
+        else:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._handler, payload)
+
+    async def _execute(self, task: Task):
+        self._handling.add(task.id)
+        try:
+            await self._call_handler(task)
+        except asyncio.CancelledError:
+            # Stopping or lease lost: whoever holds the lease gets the task back
+            if await self._task_repository.release_lease(task.id, self.owner, "created"):
+                self._released += 1
+            raise
+        except Exception:
+            self._failed += 1
+            if self._last_attempt(task):
+                logger.exception("Task %s failed its last attempt", task.id)
+                self._handling.discard(task.id)
+                await self._abandon(task)
+            else:
+                logger.exception("Task %s failed; it is retried once its lease expires", task.id)
+        else:
+            self._handling.discard(task.id)
+            try:
+                completed = await self._mediator.handle_command(
+                    CompleteTaskCommand(task_id=task.id, lease_owner=self.owner)
+                )
+            except Exception:
+                self._completion_failures += 1
+                logger.exception("Task %s ran but could not be completed; it runs again once its lease expires", task.id)
+            else:
+                if completed is not None:
+                    self._completed += 1
+        finally:
+            self._handling.discard(task.id)
+            del self._running[task.id]
+            self._by_location[task.location_id] -= 1
+            self._by_configuration[task.configuration_id] -= 1
+            self._by_location += Counter()  # Drops keys that reached zero
+            self._by_configuration += Counter()
+            self._wakeup.set()
+
+    async def _run(self):
+        retry_delay = self._poll_interval
+        while True:
+            # Cleared before claiming so a slot freed during the claim is not missed
+            self._wakeup.clear()
+            try:
+                started = await self.claim_once()
+                retry_delay = self._poll_interval
+            except Exception as e:
+                logger.warning("Error claiming tasks, retrying in %.1fs: %s", retry_delay, e)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self._max_retry_delay)
+                continue
+            if started and len(self._running) < self._concurrency:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def renew_once(self):
+        """Extends the leases of running tasks and stops the ones whose lease was lost."""
+        task_ids = list(self._running)
+        if not task_ids:
+            return
+        renewed = set(await self._task_repository.renew_leases(
+            task_ids, self.owner, datetime.now(timezone.utc) + self._lease
+        ))
+        for task_id in task_ids:
+            # Tasks past their handler are already being completed
+            if task_id not in renewed and task_id in self._handling:
+                # Thread and process handlers keep running, but their result is discarded
+                self._lost += 1
+                logger.warning("Lease on task %s was lost; stopping its execution", task_id)
+                self._running[task_id].cancel()
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self._lease.total_seconds() / 3)
+            try:
+                await self.renew_once()
+            except Exception as e:
+                logger.warning("Error renewing task leases: %s", e)
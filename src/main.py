@@ -1,34 +1,192 @@
-
+import contextlib
+import logging
+import signal
+import socket
 import uvicorn
 import asyncio
+from typing import List, Optional
 from src.infrastructure.di_factories import Container
 from src.infrastructure.api.rest_api import app as rest_app
-from src.infrastructure.api.grpc_api import serve as grpc_serve
-from src.config import setup_logging, config
+from src.infrastructure.api.grpc_api import start_server as grpc_start_server
+from src.config import config
+from src.infrastructure.monitoring.logging_pipeline import build_log_handler, parse_logger_rates
+from src.infrastructure.monitoring.metrics import registry
+from src.infrastructure.monitoring.tracing import FileSpanExporter, tracer
+from src.supervisor import Supervisor
 
-async def main():
-    setup_logging()
-    
-    container = Container()
-    container.wire(modules=[__name__, "src.infrastructure.api.rest_api", "src.infrastructure.api.grpc_api"])
-    
-    # Start the gRPC server - the container is injected automatically
-    grpc_server = grpc_serve()
-    
-    # Start the REST API server
-    uvicorn_config = uvicorn.Config(
-        rest_app, 
-        host="0.0.0.0", 
-        port=config.REST_PORT, 
-        log_level=config.LOG_LEVEL.lower(),
-        log_config=None  # Use the standard logging configuration
+logger = logging.getLogger(__name__)
+
+def setup_logging(background: Optional[bool] = None) -> logging.Handler:
+    handler = build_log_handler(
+        log_format=config.LOG_FORMAT,
+        use_queue=config.LOG_ASYNC if background is None else background,
+        queue_size=config.LOG_QUEUE_SIZE,
+        sample_rate=config.LOG_SAMPLE_RATE,
+        sample_rates=parse_logger_rates(config.LOG_SAMPLE_RATES),
+        rate_limit=config.LOG_RATE_LIMIT,
+        rate_limit_burst=config.LOG_RATE_LIMIT_BURST,
+        rate_limits=parse_logger_rates(config.LOG_RATE_LIMITS),
     )
-    uvicorn_server = uvicorn.Server(uvicorn_config)
-    
-    await asyncio.gather(
-        grpc_server,
-        uvicorn_server.serve()
+    # Forced, so worker processes replace the handler inherited from the supervisor
+    logging.basicConfig(level=config.LOG_LEVEL, handlers=[handler], force=True)
+    if hasattr(handler, "start"):
+        handler.start()
+    return handler
+
+def setup_tracing():
+    if not config.TRACING_ENABLED:
+        return
+    tracer.configure(
+        FileSpanExporter(config.TRACING_FILE_PATH),
+        sample_rate=config.TRACING_SAMPLE_RATE,
+        tail_sampling=config.TRACING_TAIL_SAMPLING,
+        tail_latency=config.TRACING_TAIL_LATENCY,
+        max_queue_size=config.TRACING_QUEUE_SIZE,
+        batch_size=config.TRACING_EXPORT_BATCH_SIZE,
+        interval=config.TRACING_EXPORT_INTERVAL,
     )
 
+def register_metric_collectors(container: Container, log_handler=None):
+    # Components that keep their own counters are exported on /metrics as gauges
+    components = {
+        "task_service_repository": container.task_repository_backend(),
+        "task_service_task_loader": container.task_loader() if config.TASK_LOADER_ENABLED else None,
+        "task_service_task_cache": container.task_repository() if config.TASK_CACHE_ENABLED else None,
+        "task_service_nats_publisher": container.event_sender_backend(),
+        "task_service_outbox_relay": container.outbox_relay(),
+        "task_service_scheduler": container.scheduler(),
+        "task_service_worker_pool": container.worker_pool(),
+        "task_service_logging": log_handler,
+        "task_service_tracing": tracer if tracer.enabled else None,
+    }
+    for prefix, component in components.items():
+        if component is not None and hasattr(component, "get_metrics"):
+            registry.register_collector(prefix, component.get_metrics)
+
+async def startup(container: Container, primary: bool = True):
+    # Open backend connections before the servers accept traffic
+    await container.task_repository().connect()
+    await container.event_sender().connect()
+    cache_invalidator = container.cache_invalidator()
+    if cache_invalidator:
+        await cache_invalidator.start()
+    # Every worker process relays the outbox; messages are claimed under a lease, so each is sent by one
+    outbox_relay = container.outbox_relay()
+    if outbox_relay:
+        outbox_relay.start()
+    scheduler = container.scheduler()
+    if scheduler and primary:
+        scheduler.start()
+    worker_pool = container.worker_pool()
+    if worker_pool:
+        worker_pool.start()
+    # Ready once the connections above are open and the first probe round has run
+    health_monitor = container.health_monitor()
+    for name, component in (("repository", container.task_repository_backend()), ("event_sender", container.event_sender_backend())):
+        if hasattr(component, "ping"):
+            health_monitor.register(name, component.ping)
+    await health_monitor.start()
+    health_monitor.mark_started()
+
+async def shutdown(container: Container):
+    await container.health_monitor().stop()
+    # Unfinished tasks go back to "created" for another replica to claim
+    worker_pool = container.worker_pool()
+    if worker_pool:
+        await worker_pool.stop()
+    scheduler = container.scheduler()
+    if scheduler:
+        await scheduler.stop()
+    # Undelivered outbox messages stay in the repository for the next start
+    outbox_relay = container.outbox_relay()
+    if outbox_relay:
+        await outbox_relay.stop()
+    cache_invalidator = container.cache_invalidator()
+    if cache_invalidator:
+        await cache_invalidator.stop()
+    # Flush queued events before the repository goes away
+    await container.event_sender().close()
+    await container.task_repository().close()
+    # Spans of the shutdown itself are written too
+    tracer.shutdown()
+
+class RestServer(uvicorn.Server):
+    # Signals are handled in run() for both servers
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+async def run(
+    roles=("rest", "grpc"),
+    rest_sockets: Optional[List[socket.socket]] = None,
+    primary: bool = True,
+):
+    """Serves the given APIs until SIGINT or SIGTERM, then drains them and shuts down."""
+    log_handler = setup_logging()
+    setup_tracing()
+
+    container = Container()
+    container.wire(modules=[__name__, "src.infrastructure.api.rest_api", "src.infrastructure.api.grpc_api"])
+    register_metric_collectors(container, log_handler)
+    await startup(container, primary)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopping.set)
+
+    grpc_server = None
+    uvicorn_server = None
+    waiters = [asyncio.create_task(stopping.wait())]
+    try:
+        # The container is injected into the gRPC server automatically
+        if "grpc" in roles:
+            grpc_server = await grpc_start_server()
+            waiters.append(asyncio.create_task(grpc_server.wait_for_termination()))
+        if "rest" in roles:
+            uvicorn_config = uvicorn.Config(
+                rest_app,
+                host="0.0.0.0",
+                port=config.REST_PORT,
+                log_level=config.LOG_LEVEL.lower(),
+                log_config=None  # Use the standard logging configuration
+            )
+            uvicorn_server = RestServer(uvicorn_config)
+            waiters.append(asyncio.create_task(uvicorn_server.serve(sockets=rest_sockets)))
+        # Either a stop signal or a server that exited on its own ends the process
+        done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Probes fail while in-flight requests drain, so no new traffic is routed here
+        container.health_monitor().mark_stopping()
+        if stopping.is_set() and config.SERVER_DRAIN_DELAY > 0:
+            # New requests are still served until load balancers have seen the failing probes
+            logger.info("Draining for %ss before closing the servers", config.SERVER_DRAIN_DELAY)
+            await asyncio.sleep(config.SERVER_DRAIN_DELAY)
+        if uvicorn_server:
+            uvicorn_server.should_exit = True
+        if grpc_server:
+            await grpc_server.stop(config.SERVER_SHUTDOWN_GRACE)
+        await asyncio.gather(*waiters[1:], return_exceptions=True)
+        waiters[0].cancel()
+        await shutdown(container)
+    for waiter in done:
+        waiter.result()
+
+def serve_worker(roles, rest_sockets: Optional[List[socket.socket]], primary: bool):
+    """Entry point of the processes forked by the supervisor."""
+    try:
+        asyncio.run(run(roles, rest_sockets, primary))
+    finally:
+        # Forked processes skip the exit hooks that would flush the log queue
+        logging.shutdown()
+
+async def main():
+    await run()
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if config.SERVER_WORKERS > 1 or config.SERVER_GRPC_WORKERS > 0:
+        # The supervisor forks, so it logs without a background thread
+        setup_logging(background=False)
+        Supervisor.from_config(serve_worker).run()
+    else:
+        asyncio.run(main())
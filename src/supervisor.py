@@ -0,0 +1,168 @@
+import logging
+import multiprocessing
+import signal
+import socket
+import time
+from multiprocessing.connection import wait
+from typing import Callable, List, Optional, Tuple
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this after starting is restarted with a growing delay
+MIN_HEALTHY_UPTIME = 10.0
+
+class WorkerSlot:
+    def __init__(self, index: int, roles: Tuple[str, ...], primary: bool):
+        self.index = index
+        self.roles = roles
+        self.primary = primary
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.restart_delay = 0.0
+        self.restart_at = 0.0
+        self.restarts = 0
+
+class Supervisor:
+    """Forks the worker processes that serve the APIs and keeps them running.
+
+    The REST socket is bound once here and inherited by the workers, while gRPC
+    workers each bind the port with SO_REUSEPORT; either way the kernel spreads
+    connections across processes. Every worker builds its own container, so
+    repository and event sender connections are per process.
+
+    Workers that exit are restarted, with a delay that doubles up to
+    `max_restart_delay` while they keep exiting right after starting. SIGINT or
+    SIGTERM stops the workers with SIGTERM and kills those still running after
+    `shutdown_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        target: Callable,
+        workers: int = 1,
+        grpc_workers: int = 0,
+        shutdown_timeout: float = 30.0,
+        max_restart_delay: float = 30.0,
+        rest_port: Optional[int] = None,
+    ):
+        if workers < 1:
+            raise ValueError("At least one worker process is required")
+        if config.SCHEDULER_ENABLED and workers + grpc_workers > 1:
+            # Tasks created in other processes would never reach the primary's in-memory schedule
+            raise ValueError("The due date scheduler requires a single serving process")
+        if config.REPOSITORY_TYPE == "memory" and workers + grpc_workers > 1:
+            # Each process would hold different tasks and overwrite the others' snapshots
+            raise ValueError("The memory repository requires a single serving process")
+        self._target = target
+        self._shutdown_timeout = shutdown_timeout
+        self._max_restart_delay = max_restart_delay
+        self._rest_port = config.REST_PORT if rest_port is None else rest_port
+        self._context = multiprocessing.get_context("fork")
+        self._rest_socket = None
+        self._stopping = False
+        roles = ("rest",) if grpc_workers else ("rest", "grpc")
+        self._slots = [WorkerSlot(index, roles, index == 0) for index in range(workers)]
+        self._slots += [WorkerSlot(workers + index, ("grpc",), False) for index in range(grpc_workers)]
+
+    @classmethod
+    def from_config(cls, target: Callable) -> "Supervisor":
+        return cls(
+            target,
+            workers=config.SERVER_WORKERS,
+            grpc_workers=config.SERVER_GRPC_WORKERS,
+            shutdown_timeout=config.SERVER_SHUTDOWN_TIMEOUT,
+        )
+
+    def _bind_rest_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("0.0.0.0", self._rest_port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _start(self, slot: WorkerSlot):
+        sockets = [self._rest_socket] if "rest" in slot.roles and self._rest_socket else None
+        slot.process = self._context.Process(
+            target=self._target,
+            args=(slot.roles, sockets, slot.primary),
+            name=f"task-service-worker-{slot.index}",
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        logger.info("Started worker %s (pid %s) serving %s", slot.index, slot.process.pid, "+".join(slot.roles))
+
+    def start(self):
+        if any("rest" in slot.roles for slot in self._slots) and self._rest_port:
+            self._rest_socket = self._bind_rest_socket()
+        if config.REPOSITORY_TYPE == "mock":
+            logger.warning("Each worker process keeps its own tasks with the mock repository")
+        for slot in self._slots:
+            self._start(slot)
+
+    def check_workers(self) -> int:
+        """Restarts the workers that exited once their restart delay passed; returns how many were restarted."""
+        now = time.monotonic()
+        restarted = 0
+        for slot in self._slots:
+            if slot.process.is_alive():
+                continue
+            if not slot.restart_at:
+                uptime = now - slot.started_at
+                if uptime < MIN_HEALTHY_UPTIME:
+                    slot.restart_delay = min(max(slot.restart_delay * 2, 0.5), self._max_restart_delay)
+                else:
+                    slot.restart_delay = 0.0
+                slot.restart_at = now + slot.restart_delay
+                logger.warning(
+                    "Worker %s (pid %s) exited with code %s; restarting in %.1fs",
+                    slot.index, slot.process.pid, slot.process.exitcode, slot.restart_delay,
+                )
+            if now >= slot.restart_at:
+                slot.process.close()
+                slot.restart_at = 0.0
+                slot.restarts += 1
+                self._start(slot)
+                restarted += 1
+        return restarted
+
+    def stop(self):
+        processes = [slot.process for slot in self._slots if slot.process is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self._shutdown_timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Worker pid %s did not stop in time; killing it", process.pid)
+                process.kill()
+                process.join()
+        if self._rest_socket is not None:
+            self._rest_socket.close()
+            self._rest_socket = None
+        logger.info("All worker processes stopped")
+
+    def get_metrics(self) -> dict:
+        return {
+            "workers": len(self._slots),
+            "alive": sum(1 for slot in self._slots if slot.process is not None and slot.process.is_alive()),
+            "restarts_total": sum(slot.restarts for slot in self._slots),
+        }
+
+    def _request_stop(self, signal_number, frame):
+        self._stopping = True
+
+    def run(self):
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, self._request_stop)
+        self.start()
+        try:
+            while not self._stopping:
+                sentinels: List[int] = [slot.process.sentinel for slot in self._slots if slot.process.is_alive()]
+                wait(sentinels, timeout=0.5)
+                if not self._stopping:
+                    self.check_workers()
+        finally:
+            self.stop()
@@ -54,6 +54,30 @@ describe('gRPC API Integration Tests', () => {
         });
     });
 
+    it('should stream all tasks', (done) => {
+        const tasks = [];
+        const call = client.streamTasks({ batch_size: 2 });
+        call.on('data', (task) => tasks.push(task));
+        call.on('error', done);
+        call.on('end', () => {
+            expect(tasks.map((task) => task.id)).to.include(taskId);
+            done();
+        });
+    });
+
+    it('should create tasks in a batch', (done) => {
+        const create = [1, 2].map(() => ({
+            configuration_id: uuidv4(),
+            location_id: locationId,
+            due_date: dueDate
+        }));
+        client.batchTasks({ create }, (err, response) => {
+            expect(err).to.be.null;
+            expect(response.created).to.have.lengthOf(2);
+            done();
+        });
+    });
+
     it('should complete a task', (done) => {
         client.completeTask({ task_id: taskId }, (err, response) => {
             expect(err).to.be.null;
@@ -38,6 +38,40 @@ describe('RESTful API Integration Tests', () => {
         expect(response.data).to.be.an('array');
     });
 
+    it('should page through tasks with a cursor', async () => {
+        await axios.post(`${API_URL}/tasks`, {
+            configuration_id: uuidv4(),
+            location_id: locationId,
+            due_date: dueDate.toISOString(),
+        });
+        const firstPage = await axios.get(`${API_URL}/tasks`, { params: { limit: 1 } });
+        expect(firstPage.data).to.have.lengthOf(1);
+        const cursor = firstPage.headers['x-next-cursor'];
+        expect(cursor).to.be.a('string');
+
+        const secondPage = await axios.get(`${API_URL}/tasks`, { params: { limit: 1, cursor } });
+        expect(secondPage.status).to.equal(200);
+        expect(secondPage.data).to.be.an('array');
+        expect(secondPage.data[0].id).to.not.equal(firstPage.data[0].id);
+    });
+
+    it('should create, complete and delete tasks in a batch', async () => {
+        const created = await axios.post(`${API_URL}/tasks/batch`, {
+            create: [1, 2].map(() => ({
+                configuration_id: uuidv4(),
+                location_id: locationId,
+                due_date: dueDate.toISOString(),
+            })),
+        });
+        expect(created.status).to.equal(200);
+        expect(created.data.created).to.have.lengthOf(2);
+        const [first, second] = created.data.created.map((task) => task.id);
+
+        const response = await axios.post(`${API_URL}/tasks/batch`, { complete: [first], delete: [second] });
+        expect(response.data.completed[0]).to.have.property('status', 'completed');
+        expect(response.data.deleted).to.deep.equal([second]);
+    });
+
     it('should complete a task', async () => {
         const response = await axios.put(`${API_URL}/tasks/${taskId}/complete`);
         expect(response.status).to.equal(200);
@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+
+class FakeClock:
+    """A time source for code taking a `clock` callable; tests move it by setting `now`."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+async def read_outbox(repository, limit: int = 10):
+    """The outbox messages no relay holds, claimed under a lease that expires at once."""
+    now = datetime.now(timezone.utc)
+    return await repository.claim_outbox_messages("test-reader", now, now, limit)
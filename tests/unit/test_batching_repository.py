@@ -0,0 +1,111 @@
+
+import asyncio
+import pytest
+import uuid
+from datetime import datetime
+from src.application.commands_queries import CompleteTasksCommand, CreateTaskCommand, GetTaskQuery
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.persistence.batching_repository import BatchLoadError, BatchingTaskRepository
+
+class RecordingRepository(MockTaskRepository):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.lookups = []
+        self.fail = fail
+
+    async def get_many(self, task_ids):
+        self.lookups.append(list(task_ids))
+        if self.fail:
+            raise Exception("Repository failure")
+        return await super().get_many(task_ids)
+
+async def create_tasks(repository, count):
+    mediator = AppMediator(repository, MockDomainEventSender(), CircuitBreakerMonitor())
+    return [
+        await mediator.handle_command(
+            CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id=f"loc{i}", due_date=datetime.now())
+        )
+        for i in range(count)
+    ]
+
+@pytest.mark.asyncio
+async def test_lookups_in_the_same_tick_are_batched():
+    backend = RecordingRepository()
+    tasks = await create_tasks(backend, 3)
+    loader = BatchingTaskRepository(backend)
+
+    results = await asyncio.gather(
+        *(loader.get_by_id(task.id) for task in tasks),
+        loader.get_by_id(tasks[0].id),
+        loader.get_by_id("missing"),
+    )
+
+    assert [result.id for result in results[:4]] == [tasks[0].id, tasks[1].id, tasks[2].id, tasks[0].id]
+    assert results[4] is None
+    assert backend.lookups == [[tasks[0].id, tasks[1].id, tasks[2].id, "missing"]]
+    assert results[0] is not results[3]
+    assert loader.get_metrics()["batches_total"] == 1
+
+@pytest.mark.asyncio
+async def test_full_batches_are_sent_early():
+    backend = RecordingRepository()
+    tasks = await create_tasks(backend, 3)
+    loader = BatchingTaskRepository(backend, batch_window=10, max_batch_size=2)
+
+    await asyncio.gather(*(loader.get_by_id(task.id) for task in tasks[:2]))
+
+    assert backend.lookups == [[tasks[0].id, tasks[1].id]]
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_caller_in_the_batch():
+    loader = BatchingTaskRepository(RecordingRepository(fail=True))
+
+    results = await asyncio.gather(loader.get_by_id("a"), loader.get_by_id("b"), return_exceptions=True)
+
+    assert all(str(result) == "Repository failure" for result in results)
+    # Only one caller gets the original error, so the failure counts once on a breaker
+    assert [type(result) for result in results] == [Exception, BatchLoadError]
+    await asyncio.sleep(0)
+    assert not loader._loads
+
+class InvalidIdRepository(RecordingRepository):
+    async def get_by_id(self, task_id):
+        if task_id == "invalid":
+            raise ValueError("Invalid task id")
+        return await super().get_by_id(task_id)
+
+    async def get_many(self, task_ids):
+        if "invalid" in task_ids:
+            raise ValueError("Invalid task id")
+        return await super().get_many(task_ids)
+
+@pytest.mark.asyncio
+async def test_an_invalid_id_only_fails_its_own_lookup():
+    backend = InvalidIdRepository()
+    tasks = await create_tasks(backend, 1)
+    loader = BatchingTaskRepository(backend)
+
+    found, invalid = await asyncio.gather(loader.get_by_id(tasks[0].id), loader.get_by_id("invalid"), return_exceptions=True)
+
+    assert found.id == tasks[0].id
+    assert isinstance(invalid, ValueError)
+
+@pytest.mark.asyncio
+async def test_mediator_lookups_share_one_batch():
+    backend = RecordingRepository()
+    tasks = await create_tasks(backend, 3)
+    mediator = AppMediator(BatchingTaskRepository(backend), MockDomainEventSender(), CircuitBreakerMonitor())
+
+    await asyncio.gather(
+        mediator.handle_query(GetTaskQuery(task_id=tasks[0].id)),
+        mediator.handle_query(GetTaskQuery(task_id=tasks[1].id)),
+        mediator.handle_command(CompleteTasksCommand(task_ids=[tasks[1].id, tasks[2].id])),
+    )
+
+    # The single lookups are batched; a batch command already makes one lookup of its own
+    assert sorted(sorted(lookup) for lookup in backend.lookups) == sorted([
+        sorted([tasks[0].id, tasks[1].id]), sorted([tasks[1].id, tasks[2].id]),
+    ])
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime
+import pytest
+from aiobreaker import CircuitBreaker, CircuitBreakerError
+from src.application.commands_queries import CreateTaskCommand, GetAllTasksQuery, StreamTasksQuery
+from src.config import config
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.concurrency.adaptive_limiter import OverloadedError
+from src.infrastructure.concurrency.bulkhead import Bulkhead
+from src.infrastructure.messaging.outbox_relay import OutboxRelay
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+
+class SlowScanRepository(MockTaskRepository):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def get_all(self, *args, **kwargs):
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return await super().get_all(*args, **kwargs)
+
+class BreakingCursorRepository(MockTaskRepository):
+    def __init__(self):
+        super().__init__()
+        self.broken = False
+
+    async def stream_all(self, batch_size):
+        async for task in super().stream_all(batch_size):
+            if self.broken:
+                raise ConnectionError("cursor lost")
+            yield task
+
+def create_command():
+    return CreateTaskCommand(configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1))
+
+@pytest.mark.asyncio
+async def test_calls_over_the_limit_queue_until_the_queue_is_full():
+    bulkhead = Bulkhead("test_bulkhead", CircuitBreaker(), max_concurrent=1, max_queued=1)
+    gate = asyncio.Event()
+
+    async def work(value):
+        await gate.wait()
+        return value
+
+    running = asyncio.ensure_future(bulkhead.call(work, 1))
+    queued = asyncio.ensure_future(bulkhead.call(work, 2))
+    await asyncio.sleep(0)
+    with pytest.raises(OverloadedError, match="test bulkhead"):
+        await bulkhead.call(work, 3)
+
+    gate.set()
+    assert await asyncio.gather(running, queued) == [1, 2]
+    assert await bulkhead.call(work, 4) == 4
+
+@pytest.mark.asyncio
+async def test_slow_and_failing_scans_leave_writes_alone(monkeypatch):
+    monkeypatch.setattr(config, "REPOSITORY_SCAN_CONCURRENCY", 2)
+    monkeypatch.setattr(config, "REPOSITORY_SCAN_QUEUE", 1)
+    monitor = CircuitBreakerMonitor()
+    repository = SlowScanRepository()
+    mediator = AppMediator(repository, MockDomainEventSender(), monitor)
+
+    # Distinct queries, so single-flight does not merge them
+    scans = [asyncio.ensure_future(mediator.handle_query(GetAllTasksQuery(limit=limit))) for limit in (1, 2, 3)]
+    await asyncio.sleep(0)
+    with pytest.raises(OverloadedError):
+        await mediator.handle_query(GetAllTasksQuery(limit=4))
+    task = await asyncio.wait_for(mediator.handle_command(create_command()), 1)
+    assert task.id
+
+    repository.error = ConnectionError("scan timed out")
+    repository.release.set()
+    await asyncio.gather(*scans, return_exceptions=True)
+    try:
+        for limit in range(5, 5 + config.CIRCUIT_BREAKER_FAIL_MAX):
+            with pytest.raises((ConnectionError, CircuitBreakerError)):
+                await mediator.handle_query(GetAllTasksQuery(limit=limit))
+
+        status = monitor.get_status()
+        assert status["dependencies"]["repository_scan"] == "OPEN"
+        assert status["dependencies"]["repository_write"] == "CLOSED"
+        assert status["status"] == "degraded"
+        assert (await mediator.handle_command(create_command())).id
+    finally:
+        # The monitor is shared by every test
+        mediator._scan_bulkhead.breaker.close()
+
+@pytest.mark.asyncio
+async def test_a_command_and_its_outbox_messages_share_one_write_slot():
+    repository = MockTaskRepository()
+    sender = MockDomainEventSender()
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=OutboxRelay(repository, sender))
+    slots = []
+    call = mediator._write_bulkhead.call
+
+    async def counting_call(fn, *args):
+        slots.append(fn)
+        return await call(fn, *args)
+
+    mediator._write_bulkhead.call = counting_call
+    task = await mediator.handle_command(create_command())
+
+    assert len(slots) == 1
+    assert [message.to_event().task_id for message in repository._outbox.values()] == [task.id]
+
+@pytest.mark.asyncio
+async def test_cursor_failures_while_streaming_count_towards_the_scan_breaker():
+    monitor = CircuitBreakerMonitor()
+    repository = BreakingCursorRepository()
+    mediator = AppMediator(repository, MockDomainEventSender(), monitor)
+    for _ in range(2):
+        await mediator.handle_command(create_command())
+    try:
+        # The connection is lost in the middle of a stream, and later streams fail as they open
+        with pytest.raises(ConnectionError):
+            async for _ in await mediator.handle_query(StreamTasksQuery(batch_size=1)):
+                repository.broken = True
+        for _ in range(config.CIRCUIT_BREAKER_FAIL_MAX - 1):
+            with pytest.raises((ConnectionError, CircuitBreakerError)):
+                async for _ in await mediator.handle_query(StreamTasksQuery(batch_size=1)):
+                    pass
+
+        assert monitor.get_status()["dependencies"]["repository_scan"] == "OPEN"
+        assert mediator._scan_bulkhead._in_flight == 0
+    finally:
+        mediator._scan_bulkhead.breaker.close()
+
+def test_stream_batch_sizes_default_to_the_config_and_must_be_positive(monkeypatch):
+    monkeypatch.setattr(config, "STREAM_BATCH_SIZE", 42)
+    assert StreamTasksQuery().batch_size == 42
+    with pytest.raises(ValueError):
+        StreamTasksQuery(batch_size=0)
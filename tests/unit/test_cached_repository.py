@@ -0,0 +1,79 @@
+
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from src.application.commands_queries import CreateTaskCommand, CompleteTaskCommand, DeleteTaskCommand, GetTaskQuery
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.persistence.cached_repository import CachedTaskRepository
+
+class CountingRepository(MockTaskRepository):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_by_id(self, task_id):
+        self.reads += 1
+        return await super().get_by_id(task_id)
+
+@pytest.fixture
+def backend():
+    return CountingRepository()
+
+async def create_task(mediator):
+    return await mediator.handle_command(
+        CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id="loc1", due_date=datetime.now())
+    )
+
+@pytest.mark.asyncio
+async def test_repeated_reads_are_served_from_cache(backend):
+    cache = CachedTaskRepository(backend)
+    mediator = AppMediator(cache, MockDomainEventSender(), CircuitBreakerMonitor())
+    task = await create_task(mediator)
+
+    for _ in range(3):
+        assert (await mediator.handle_query(GetTaskQuery(task_id=task.id))).id == task.id
+
+    assert backend.reads == 1
+    assert cache.get_metrics()["hits_total"] == 2
+    assert cache.get_metrics()["misses_total"] == 1
+
+@pytest.mark.asyncio
+async def test_complete_and_delete_invalidate_entries(backend):
+    cache = CachedTaskRepository(backend)
+    mediator = AppMediator(cache, MockDomainEventSender(), CircuitBreakerMonitor())
+    task = await create_task(mediator)
+    await mediator.handle_query(GetTaskQuery(task_id=task.id))
+
+    await mediator.handle_command(CompleteTaskCommand(task_id=task.id))
+    assert (await mediator.handle_query(GetTaskQuery(task_id=task.id))).status == "completed"
+
+    await mediator.handle_command(DeleteTaskCommand(task_id=task.id))
+    assert await mediator.handle_query(GetTaskQuery(task_id=task.id)) is None
+
+@pytest.mark.asyncio
+async def test_entries_are_evicted_and_expired(backend):
+    cache = CachedTaskRepository(backend, max_size=1, ttl_seconds=-1)
+    mediator = AppMediator(cache, MockDomainEventSender(), CircuitBreakerMonitor())
+    first, second = await create_task(mediator), await create_task(mediator)
+
+    await cache.get_by_id(first.id)
+    await cache.get_by_id(second.id)
+    assert cache.get_metrics()["evictions_total"] == 1
+
+    await cache.get_by_id(second.id)
+    assert cache.get_metrics()["expirations_total"] == 1
+
+@pytest.mark.asyncio
+async def test_cached_tasks_are_not_shared_with_callers(backend):
+    cache = CachedTaskRepository(backend)
+    task = await create_task(AppMediator(backend, MockDomainEventSender(), CircuitBreakerMonitor()))
+    due_date = task.due_date
+    await cache.get_by_id(task.id)
+
+    cached = await cache.get_by_id(task.id)
+    cached.due_date += timedelta(days=1)
+
+    assert (await cache.get_by_id(task.id)).due_date == due_date
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from datetime import datetime
+import grpc
+import pytest
+from fastapi.testclient import TestClient
+from src.application.commands_queries import CreateTaskCommand, GetTaskQuery
+from src.domain.entities import Task
+from src.infrastructure.api import task_pb2, task_pb2_grpc
+from src.infrastructure.api.deadline_propagation import TIMEOUT_HEADER, GrpcDeadlineInterceptor
+from src.infrastructure.api.grpc_api import TaskService
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.concurrency import deadline
+from src.infrastructure.concurrency.deadline import DeadlineExceededError
+from src.infrastructure.di_factories import Container
+from src.infrastructure.mocks.latency_repository import LatencyInjectingTaskRepository
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.concurrency.single_flight import SingleFlight
+from src.infrastructure.monitoring.metrics import DEADLINE_EXCEEDED
+from src.infrastructure.persistence.batching_repository import BatchingTaskRepository
+
+class RecordingEventSender(MockDomainEventSender):
+    def __init__(self):
+        self.events = []
+
+    async def send(self, event):
+        self.events.append(event)
+
+def slow_mediator(latency):
+    repository = MockTaskRepository()
+    return AppMediator(LatencyInjectingTaskRepository(repository, latency), RecordingEventSender(), CircuitBreakerMonitor()), repository
+
+@pytest.mark.asyncio
+async def test_nested_deadlines_keep_the_earliest_and_bound_calls():
+    expired = DEADLINE_EXCEEDED.labels("test")
+    before = expired.value
+    assert deadline.remaining() is None
+
+    with deadline.deadline_after(0.05):
+        with deadline.deadline_after(10):
+            assert 0 < deadline.remaining() <= 0.05
+        with pytest.raises(DeadlineExceededError) as error:
+            await deadline.bounded("test", lambda: asyncio.sleep(1))
+        assert error.value.stage == "test"
+
+    async def own_timeout():
+        raise TimeoutError("the call's own")
+    with deadline.deadline_after(10):
+        with pytest.raises(TimeoutError, match="the call's own"):
+            await deadline.bounded("test", own_timeout)
+    assert deadline.remaining() is None
+    assert expired.value == before + 1
+
+@pytest.mark.asyncio
+async def test_expired_queries_are_cut_off_without_opening_the_breaker():
+    # Every caller joins the first, still running, single-flight call and leaves at its own deadline
+    mediator, repository = slow_mediator(0.5)
+    task = await mediator.handle_command(CreateTaskCommand(configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1)))
+
+    for _ in range(10):
+        started = time.monotonic()
+        with deadline.deadline_after(0.02):
+            with pytest.raises(DeadlineExceededError):
+                await mediator.handle_query(GetTaskQuery(task_id=task.id))
+        assert time.monotonic() - started < 0.15
+    assert (await mediator.handle_query(GetTaskQuery(task_id=task.id))).id == task.id
+
+    # Commands are rejected before they write anything once the budget is spent
+    with deadline.deadline_after(0):
+        with pytest.raises(DeadlineExceededError):
+            await mediator.handle_command(CreateTaskCommand(configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1)))
+    assert len(repository._tasks) == 1
+
+    # A command that started in time finishes, event included, even after its deadline passes
+    events = mediator._event_sender.events
+    with deadline.deadline_after(0.1):
+        created = await mediator.handle_command(CreateTaskCommand(configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1)))
+    assert created.id in repository._tasks
+    assert events[-1].task_id == created.id
+
+class CallRecordingRepository(MockTaskRepository):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def create(self, task):
+        # Records when the call is made, not when its coroutine runs
+        self.calls.append(task)
+        return super().create(task)
+
+@pytest.mark.asyncio
+async def test_calls_cut_off_during_their_round_trip_never_start():
+    repository = CallRecordingRepository()
+    slow = LatencyInjectingTaskRepository(repository, 0.5)
+    task = Task(status="created", configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1))
+    with deadline.deadline_after(0.02):
+        with pytest.raises(DeadlineExceededError):
+            await deadline.bounded("test", lambda: slow.create(task))
+
+    assert repository.calls == []
+    assert slow.round_trips == 1
+
+class DeadlineRecordingRepository(MockTaskRepository):
+    def __init__(self):
+        super().__init__()
+        self.budgets = []
+
+    async def get_many(self, task_ids):
+        self.budgets.append(deadline.remaining())
+        await asyncio.sleep(0.05)
+        return await super().get_many(task_ids)
+
+@pytest.mark.asyncio
+async def test_shared_work_runs_without_the_deadline_of_the_caller_that_started_it():
+    backend = DeadlineRecordingRepository()
+    task = await backend.create(Task(status="created", configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1)))
+    repository = BatchingTaskRepository(backend)
+
+    async def with_deadline(timeout, call):
+        with deadline.deadline_after(timeout):
+            return await call()
+
+    impatient, patient = await asyncio.gather(
+        with_deadline(0.01, lambda: repository.get_by_id(task.id)),
+        repository.get_by_id(task.id),
+        return_exceptions=True,
+    )
+    assert isinstance(impatient, DeadlineExceededError)
+    assert patient.id == task.id
+    assert backend.budgets == [None]
+
+    flight = SingleFlight()
+    impatient, patient = await asyncio.gather(
+        with_deadline(0.01, lambda: flight.do("key", lambda: backend.get_many([task.id]))),
+        with_deadline(10, lambda: flight.do("key", lambda: backend.get_many([task.id]))),
+        return_exceptions=True,
+    )
+    assert isinstance(impatient, DeadlineExceededError)
+    assert list(patient) == [task.id]
+    assert backend.budgets == [None, None]
+
+def test_rest_requests_take_their_deadline_from_a_header():
+    container = Container()
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    client = TestClient(app)
+    try:
+        body = {"configuration_id": "config", "location_id": "loc1", "due_date": "2024-05-01T10:30:00"}
+        assert client.post("/tasks/", json=body, headers={TIMEOUT_HEADER: "5000"}).status_code == 201
+        assert client.post("/tasks/", json=body, headers={TIMEOUT_HEADER: "soon"}).status_code == 201
+        response = client.post("/tasks/", json=body, headers={TIMEOUT_HEADER: "0"})
+        assert response.status_code == 504
+        assert response.json()["detail"] == "Deadline exceeded in api"
+    finally:
+        container.unwire()
+
+@pytest.mark.asyncio
+async def test_grpc_deadlines_bound_the_mediator():
+    mediator, _ = slow_mediator(0.3)
+    task = await mediator.handle_command(CreateTaskCommand(configuration_id="c", location_id="l", due_date=datetime(2030, 1, 1)))
+    server = grpc.aio.server(interceptors=[GrpcDeadlineInterceptor()])
+    task_pb2_grpc.add_TaskServiceServicer_to_server(TaskService(mediator), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    expired = DEADLINE_EXCEEDED.labels("mediator")
+    before = expired.value
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = task_pb2_grpc.TaskServiceStub(channel)
+            with pytest.raises(grpc.aio.AioRpcError) as error:
+                await stub.GetTask(task_pb2.GetTaskRequest(task_id=task.id), timeout=0.05)
+            assert error.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+            assert (await stub.GetTask(task_pb2.GetTaskRequest(task_id=task.id), timeout=5)).id == task.id
+        assert expired.value == before + 1
+    finally:
+        await server.stop(None)
@@ -0,0 +1,149 @@
+
+import pytest
+from datetime import datetime, timezone
+from src.application.commands_queries import CreateTaskCommand, CreateTasksCommand, CompleteTaskCommand, DeleteTaskCommand
+from src.domain.events import TaskDueEvent, TaskOverdueEvent
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.scheduling.due_date_scheduler import DueDateScheduler
+from .fakes import FakeClock
+
+class RecordingEventSender(MockDomainEventSender):
+    """Records the scheduled events; the mediator sends its create and delete events here too."""
+
+    def __init__(self):
+        self.events = []
+
+    async def send(self, event):
+        if isinstance(event, (TaskDueEvent, TaskOverdueEvent)):
+            self.events.append(event)
+
+def due(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+@pytest.fixture
+def clock():
+    return FakeClock(1_000_000.0)
+
+@pytest.fixture
+def repository():
+    return MockTaskRepository()
+
+@pytest.fixture
+def sender():
+    return RecordingEventSender()
+
+def create(mediator, at):
+    return mediator.handle_command(CreateTaskCommand(configuration_id="config", location_id="loc", due_date=due(at)))
+
+def build(repository, sender, clock, **options):
+    scheduler = DueDateScheduler(repository, horizon=100, overdue_after=50, clock=clock, **options)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), scheduler=scheduler)
+    return scheduler, mediator
+
+@pytest.mark.asyncio
+async def test_due_and_overdue_events_follow_the_clock(repository, sender, clock):
+    scheduler, mediator = build(repository, sender, clock)
+    await scheduler.load_window()
+    later = await create(mediator, clock.now + 20)
+    sooner = await create(mediator, clock.now + 10)
+
+    assert await scheduler.fire_due() == 0
+    clock.now += 20
+    assert await scheduler.fire_due() == 2
+    assert [(type(event), event.task_id) for event in sender.events] == [
+        (TaskDueEvent, sooner.id), (TaskDueEvent, later.id)
+    ]
+
+    clock.now += 50
+    assert await scheduler.fire_due() == 2
+    assert [type(event) for event in sender.events[2:]] == [TaskOverdueEvent, TaskOverdueEvent]
+    assert scheduler.get_metrics()["pending"] == 0
+
+@pytest.mark.asyncio
+async def test_completed_and_deleted_tasks_are_not_reported(repository, sender, clock):
+    scheduler, mediator = build(repository, sender, clock)
+    await scheduler.load_window()
+    completed = await create(mediator, clock.now + 10)
+    deleted = await create(mediator, clock.now + 10)
+    await mediator.handle_command(CompleteTaskCommand(task_id=completed.id))
+    await mediator.handle_command(DeleteTaskCommand(task_id=deleted.id))
+
+    clock.now += 100
+    assert await scheduler.fire_due() == 0
+    assert sender.events == []
+
+@pytest.mark.asyncio
+async def test_tasks_finished_outside_this_scheduler_are_not_reported(repository, sender, clock):
+    scheduler, mediator = build(repository, sender, clock)
+    await scheduler.load_window()
+    completed = await create(mediator, clock.now + 10)
+    deleted = await create(mediator, clock.now + 10)
+    pending = await create(mediator, clock.now + 10)
+
+    clock.now += 10
+    assert await scheduler.fire_due() == 3
+    # Another replica, or the worker pool, finishes tasks without cancelling them here
+    completed.status = "completed"
+    await repository.update(completed)
+    await repository.delete(deleted.id)
+
+    clock.now += 50
+    assert await scheduler.fire_due() == 1
+    assert [(type(event), event.task_id) for event in sender.events[3:]] == [(TaskOverdueEvent, pending.id)]
+
+@pytest.mark.asyncio
+async def test_tasks_beyond_the_horizon_are_loaded_later(repository, sender, clock):
+    scheduler, mediator = build(repository, sender, clock)
+    await scheduler.load_window()
+    task = await create(mediator, clock.now + 500)
+    assert scheduler.get_metrics()["pending"] == 0
+
+    clock.now += 450
+    await scheduler.load_window()
+    assert scheduler.get_metrics()["pending"] == 1
+    clock.now += 50
+    await scheduler.fire_due()
+    assert [event.task_id for event in sender.events] == [task.id]
+
+@pytest.mark.asyncio
+async def test_dense_windows_stay_within_max_pending(repository, sender, clock):
+    scheduler, mediator = build(repository, sender, clock, max_pending=4, batch_size=2)
+    start = clock.now
+    await mediator.handle_command(CreateTasksCommand(tasks=[
+        CreateTaskCommand(configuration_id="config", location_id="loc", due_date=due(start + i + 1))
+        for i in range(10)
+    ]))
+
+    fired = 0
+    while fired < 20:
+        await scheduler.load_window()
+        # A window may go one task over when it resumes exactly at a task's due date
+        assert scheduler.get_metrics()["pending"] <= 5
+        clock.now += 1
+        fired += await scheduler.fire_due()
+        assert clock.now < start + 200
+
+    due_ids = [event.task_id for event in sender.events if isinstance(event, TaskDueEvent)]
+    assert len(due_ids) == len(set(due_ids)) == 10
+
+@pytest.mark.asyncio
+async def test_replicas_emit_each_event_once(repository, sender, clock):
+    scheduler, mediator = build(repository, sender, clock)
+    other, _ = build(repository, sender, clock)
+    task = await create(mediator, clock.now + 10)
+    await scheduler.load_window()
+    await other.load_window()
+
+    clock.now += 60
+    assert await scheduler.fire_due() == 1
+    assert await other.fire_due() == 1
+    assert [(type(event), event.task_id) for event in sender.events] == [(TaskDueEvent, task.id)]
+    assert scheduler.get_metrics()["due_total"] + other.get_metrics()["due_total"] == 1
+
+    clock.now += 10
+    assert await other.fire_due() == 1
+    assert await scheduler.fire_due() == 1
+    assert [type(event) for event in sender.events] == [TaskDueEvent, TaskOverdueEvent]
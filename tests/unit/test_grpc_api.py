@@ -0,0 +1,73 @@
+import grpc
+import pytest
+from src.config import config
+from src.infrastructure.api import task_pb2, task_pb2_grpc
+from src.infrastructure.api.grpc_api import AdminService, TaskService
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.concurrency.adaptive_limiter import OverloadedError
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.monitoring.profiler import Profiler
+
+@pytest.mark.asyncio
+async def test_invalid_batches_are_rejected_as_invalid_arguments():
+    mediator = AppMediator(MockTaskRepository(), MockDomainEventSender(), CircuitBreakerMonitor())
+    server = grpc.aio.server()
+    task_pb2_grpc.add_TaskServiceServicer_to_server(TaskService(mediator), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = task_pb2_grpc.TaskServiceStub(channel)
+            oversized = task_pb2.BatchTasksRequest(delete_task_ids=[str(i) for i in range(config.BATCH_MAX_SIZE + 1)])
+            with pytest.raises(grpc.aio.AioRpcError) as error:
+                await stub.BatchTasks(oversized)
+            assert error.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+    finally:
+        await server.stop(None)
+
+@pytest.mark.asyncio
+async def test_bad_profiler_arguments_are_invalid_and_state_conflicts_are_preconditions(monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    server = grpc.aio.server()
+    task_pb2_grpc.add_AdminServiceServicer_to_server(AdminService(Profiler(max_seconds=1)), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    metadata = (("authorization", "Bearer secret"),)
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = task_pb2_grpc.AdminServiceStub(channel)
+            with pytest.raises(grpc.aio.AioRpcError) as error:
+                await stub.ProfileCpu(task_pb2.ProfileCpuRequest(seconds=3600), metadata=metadata)
+            assert error.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+            with pytest.raises(grpc.aio.AioRpcError) as error:
+                await stub.GetAllocationSnapshot(task_pb2.AllocationSnapshotRequest(), metadata=metadata)
+            assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+    finally:
+        await server.stop(None)
+
+class ShedScanMediator:
+    async def handle_query(self, query):
+        # The scan bulkhead rejects a stream when it opens, on its first item
+        async def tasks():
+            raise OverloadedError("repository scan", 1, 2.5)
+            yield
+        return tasks()
+
+@pytest.mark.asyncio
+async def test_shed_streams_are_rejected_as_resource_exhausted():
+    server = grpc.aio.server()
+    task_pb2_grpc.add_TaskServiceServicer_to_server(TaskService(ShedScanMediator()), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            call = task_pb2_grpc.TaskServiceStub(channel).StreamTasks(task_pb2.StreamTasksRequest())
+            with pytest.raises(grpc.aio.AioRpcError) as error:
+                async for _ in call:
+                    pass
+            assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+            assert ("grpc-retry-pushback-ms", "2500") in tuple(error.value.trailing_metadata())
+    finally:
+        await server.stop(None)
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from aiobreaker import CircuitBreaker
+from fastapi.testclient import TestClient
+from src.infrastructure.api import health_pb2
+from src.infrastructure.api.grpc_api import HealthService
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.di_factories import Container
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.monitoring.health_monitor import HealthMonitor
+
+class Dependency:
+    def __init__(self):
+        self.pings = 0
+        self.error = None
+        self.delay = 0.0
+
+    async def ping(self):
+        self.pings += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+@pytest.mark.asyncio
+async def test_probes_run_in_the_background_and_results_are_cached():
+    monitor = HealthMonitor(CircuitBreakerMonitor(), interval=0.05, timeout=0.02)
+    database, broker = Dependency(), Dependency()
+    monitor.register("database", database.ping)
+    monitor.register("broker", broker.ping)
+    assert monitor.readiness()["status"] == "starting"
+
+    await monitor.start()
+    monitor.mark_started()
+    try:
+        for _ in range(100):
+            assert monitor.readiness()["status"] == "healthy"
+        assert database.pings == 1
+
+        broker.delay = 0.1
+        database.error = ConnectionError("refused")
+        await asyncio.sleep(0.08)
+        readiness = monitor.readiness()
+        assert readiness["status"] == "down"
+        assert readiness["dependencies"]["broker"]["error"] == "timed out after 0.02s"
+        assert readiness["dependencies"]["database"]["error"] == "ConnectionError: refused"
+        assert monitor.liveness() == {"status": "alive"}
+
+        monitor.mark_stopping()
+        assert monitor.readiness()["status"] == "stopping"
+    finally:
+        await monitor.stop()
+
+def test_an_open_breaker_fails_readiness():
+    breakers = CircuitBreakerMonitor()
+    monitor = HealthMonitor(breakers)
+    monitor.mark_started()
+    breaker = CircuitBreaker()
+    breakers.register("test_dependency", breaker)
+    try:
+        breaker.open()
+        readiness = monitor.readiness()
+        assert readiness["status"] == "down"
+        assert readiness["circuit_breakers"]["test_dependency"] == "OPEN"
+        breaker.half_open()
+        assert monitor.readiness()["status"] == "degraded"
+        assert monitor.is_ready()
+    finally:
+        breakers.breakers.pop("test_dependency")
+
+def test_rest_probes_are_gated_until_startup_completes():
+    container = Container()
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    client = TestClient(app)
+    try:
+        assert client.get("/health/live").json() == {"status": "alive"}
+        response = client.get("/health/ready")
+        assert (response.status_code, response.json()["status"]) == (503, "starting")
+
+        container.health_monitor().mark_started()
+        assert client.get("/health/ready").status_code == 200
+        assert client.get("/health").json()["status"] == "healthy"
+    finally:
+        container.unwire()
+
+class AbortingContext:
+    async def abort(self, code, details):
+        raise RuntimeError(code)
+
+@pytest.mark.asyncio
+async def test_grpc_health_check_and_watch():
+    monitor = HealthMonitor(CircuitBreakerMonitor())
+    service = HealthService(monitor, watch_interval=1)
+    request = health_pb2.HealthCheckRequest(service="task.TaskService")
+
+    assert (await service.Check(request, AbortingContext())).status == health_pb2.HealthCheckResponse.NOT_SERVING
+    with pytest.raises(RuntimeError):
+        await service.Check(health_pb2.HealthCheckRequest(service="other"), AbortingContext())
+
+    watch = service.Watch(health_pb2.HealthCheckRequest(), AbortingContext())
+    assert (await watch.__anext__()).status == health_pb2.HealthCheckResponse.NOT_SERVING
+    update = asyncio.ensure_future(watch.__anext__())
+    await asyncio.sleep(0)
+    monitor.mark_started()
+    assert (await asyncio.wait_for(update, 0.5)).status == health_pb2.HealthCheckResponse.SERVING
+    await watch.aclose()
@@ -0,0 +1,113 @@
+
+import asyncio
+import pytest
+from dependency_injector import providers
+from fastapi.testclient import TestClient
+from src.application.commands_queries import GetTaskQuery, StreamTasksQuery
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.concurrency.adaptive_limiter import AdaptiveConcurrencyLimiter, OverloadedError
+from src.infrastructure.concurrency.deadline import DeadlineExceededError
+from src.infrastructure.di_factories import Container
+from src.infrastructure.load_shedding_mediator import LoadSheddingMediator
+from .fakes import FakeClock
+
+async def run_calls(limiter, clock, latency, count, concurrency=1):
+    # Calls are recorded with `concurrency - 1` others in flight
+    async def call():
+        clock.now += latency
+    for _ in range(count):
+        limiter._in_flight += concurrency - 1
+        try:
+            await limiter.run("query", call)
+        finally:
+            limiter._in_flight -= concurrency - 1
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_are_rejected_immediately():
+    limiter = AdaptiveConcurrencyLimiter("test_reject", initial_limit=2, min_limit=1, retry_after=0.5)
+    release = asyncio.Event()
+    running = [asyncio.create_task(limiter.run("query", release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError) as rejected:
+        await limiter.run("query", release.wait)
+    assert rejected.value.retry_after == 0.5
+
+    release.set()
+    await asyncio.gather(*running)
+    assert limiter.get_metrics()["rejected_total"] == 1
+    assert limiter.get_metrics()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_limit_follows_latency():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter("test_adapt", initial_limit=20, min_limit=5, max_limit=100, clock=clock)
+
+    await run_calls(limiter, clock, 0.01, 50, concurrency=20)
+    grown = limiter.limit
+    assert grown > 20
+
+    await run_calls(limiter, clock, 0.1, 50, concurrency=5)
+    assert limiter.limit < grown / 2
+
+    # Idle capacity does not grow the limit
+    limiter = AdaptiveConcurrencyLimiter("test_idle", initial_limit=20, clock=clock)
+    await run_calls(limiter, clock, 0.01, 50)
+    assert limiter.limit == 20
+
+@pytest.mark.asyncio
+async def test_only_successes_are_sampled_and_timeouts_shrink_the_limit():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter("test_failures", initial_limit=20, min_limit=5, clock=clock)
+    await run_calls(limiter, clock, 0.1, 20, concurrency=20)
+    grown = limiter.limit
+
+    # Instant failures, like invalid input, neither count as fast calls nor as slow ones
+    async def invalid():
+        raise ValueError("invalid input")
+    for _ in range(50):
+        with pytest.raises(ValueError):
+            await limiter.run("query", invalid)
+    assert limiter.limit == grown
+    await run_calls(limiter, clock, 0.1, 1)
+    assert limiter.limit == grown
+
+    async def expired():
+        clock.now += 0.01
+        raise DeadlineExceededError("test")
+    with pytest.raises(DeadlineExceededError):
+        await limiter.run("query", expired)
+    assert limiter.limit < grown
+
+class StubMediator:
+    async def handle_command(self, command):
+        return None
+
+    async def handle_query(self, query):
+        return query
+
+@pytest.mark.asyncio
+async def test_streams_bypass_the_read_limit():
+    read_limiter = AdaptiveConcurrencyLimiter("test_stream_read", initial_limit=0, min_limit=0)
+    mediator = LoadSheddingMediator(StubMediator(), read_limiter, AdaptiveConcurrencyLimiter("test_stream_write"))
+
+    query = StreamTasksQuery(batch_size=10)
+    assert await mediator.handle_query(query) is query
+    with pytest.raises(OverloadedError):
+        await mediator.handle_query(GetTaskQuery(task_id="1"))
+
+def test_rest_rejects_with_503_and_retry_after():
+    class OverloadedMediator(StubMediator):
+        async def handle_query(self, query):
+            raise OverloadedError("read", 10, 1.5)
+
+    container = Container()
+    container.mediator.override(providers.Object(OverloadedMediator()))
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    try:
+        response = TestClient(app).get("/tasks/some-id")
+    finally:
+        container.unwire()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
@@ -0,0 +1,82 @@
+
+import io
+import json
+import logging
+from src.infrastructure.monitoring.logging_pipeline import (
+    AsyncLogHandler,
+    RateLimitFilter,
+    SamplingFilter,
+    build_log_handler,
+    parse_logger_rates,
+)
+from .fakes import FakeClock
+
+class CountingArgument:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "argument"
+
+def make_record(name="src.api", level=logging.INFO, msg="message", args=()):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+def test_sampling_keeps_its_share_per_logger_and_never_drops_warnings():
+    sampling = SamplingFilter(1.0, parse_logger_rates("src.api=0.25, src.api.health=0"))
+
+    kept = [sampling.filter(make_record()) for _ in range(100)]
+    assert sum(kept) == 25
+    assert not any(sampling.filter(make_record("src.api.health")) for _ in range(10))
+    assert all(sampling.filter(make_record("src.other")) for _ in range(10))
+    assert sampling.filter(make_record("src.api.health", logging.WARNING))
+    assert sampling.dropped == 85
+
+def test_rate_limit_refills_per_logger():
+    clock = FakeClock()
+    rate_limit = RateLimitFilter(rate=2, burst=3, clock=clock)
+
+    assert [rate_limit.filter(make_record()) for _ in range(4)] == [True, True, True, False]
+    assert rate_limit.filter(make_record("src.other"))
+    assert rate_limit.filter(make_record(level=logging.ERROR))
+
+    clock.now = 0.5
+    assert rate_limit.filter(make_record())
+    assert not rate_limit.filter(make_record())
+    assert rate_limit.dropped == 2
+
+def test_async_handler_writes_json_on_its_thread_and_skips_filtered_records():
+    stream = io.StringIO()
+    handler = build_log_handler(log_format="json", sample_rates={"src.noisy": 0}, stream=stream)
+    logger = logging.getLogger("src.test_logging_pipeline")
+    noisy = logging.getLogger("src.noisy")
+    for log in (logger, noisy):
+        log.addHandler(handler)
+        log.propagate = False
+        log.setLevel(logging.INFO)
+    argument = CountingArgument()
+
+    handler.start()
+    try:
+        noisy.info("Filtered %s", argument)
+        logger.info("Task %s created", "abc", extra={"task_id": "abc"})
+    finally:
+        handler.stop()
+        for log in (logger, noisy):
+            log.removeHandler(handler)
+
+    assert argument.formatted == 0
+    [line] = stream.getvalue().splitlines()
+    entry = json.loads(line)
+    assert entry["message"] == "Task abc created"
+    assert entry["task_id"] == "abc"
+    assert entry["level"] == "INFO"
+    assert handler.get_metrics()["sampled_out_total"] == 1
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = AsyncLogHandler(logging.StreamHandler(io.StringIO()), queue_size=2)
+
+    for _ in range(5):
+        handler.handle(make_record())
+
+    assert handler.get_metrics() == {"queued": 2, "dropped_queue_full_total": 3}
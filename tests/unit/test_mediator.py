@@ -8,13 +8,18 @@ from src.application.commands_queries import (
     CreateTaskCommand,
     CompleteTaskCommand,
     DeleteTaskCommand,
+    CreateTasksCommand,
+    CompleteTasksCommand,
+    DeleteTasksCommand,
     GetTaskQuery,
     GetAllTasksQuery,
+    StreamTasksQuery,
 )
 from src.infrastructure.mocks.mock_repository import MockTaskRepository
 from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
 from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
 from aiobreaker import CircuitBreakerError
+from src.config import config
 import asyncio
 
 @pytest.fixture
@@ -67,9 +72,29 @@ async def test_get_all_tasks_handler(mediator):
     await mediator.handle_command(CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id="loc2", due_date=datetime.now()))
     
     query = GetAllTasksQuery(page=1, limit=2)
-    tasks = await mediator.handle_query(query)
+    task_page = await mediator.handle_query(query)
     
-    assert len(tasks) == 2
+    assert len(task_page.tasks) == 2
+
+@pytest.mark.asyncio
+async def test_get_all_tasks_handler_with_cursor(mediator):
+    created_ids = []
+    for i in range(5):
+        task = await mediator.handle_command(CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id=f"loc{i}", due_date=datetime.now()))
+        created_ids.append(task.id)
+    await mediator.handle_command(DeleteTaskCommand(task_id=created_ids[2]))
+
+    first_page = await mediator.handle_query(GetAllTasksQuery(limit=2))
+    second_page = await mediator.handle_query(GetAllTasksQuery(limit=2, cursor=first_page.next_cursor))
+
+    assert [task.id for task in first_page.tasks] == created_ids[:2]
+    assert [task.id for task in second_page.tasks] == created_ids[3:]
+    assert second_page.next_cursor is None
+
+@pytest.mark.asyncio
+async def test_get_all_tasks_handler_rejects_invalid_cursor(mediator):
+    with pytest.raises(ValueError):
+        await mediator.handle_query(GetAllTasksQuery(cursor="not-a-cursor"))
 
 @pytest.mark.asyncio
 async def test_complete_task_handler(mediator):
@@ -93,6 +118,59 @@ async def test_delete_task_handler(mediator):
     
     assert retrieved_task is None
 
+@pytest.mark.asyncio
+async def test_stream_tasks_handler(mediator):
+    created_ids = []
+    for i in range(5):
+        task = await mediator.handle_command(CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id=f"loc{i}", due_date=datetime.now()))
+        created_ids.append(task.id)
+
+    streamed_ids = []
+    async for task in await mediator.handle_query(StreamTasksQuery(batch_size=2)):
+        streamed_ids.append(task.id)
+        if len(streamed_ids) == 1:
+            # Deleting a task that has not been read yet removes it from the stream
+            await mediator.handle_command(DeleteTaskCommand(task_id=created_ids[4]))
+
+    assert streamed_ids == created_ids[:4]
+
+    # The same holds for a task in the batch being read
+    streamed_ids = []
+    async for task in await mediator.handle_query(StreamTasksQuery(batch_size=10)):
+        streamed_ids.append(task.id)
+        if len(streamed_ids) == 1:
+            await mediator.handle_command(DeleteTaskCommand(task_id=created_ids[3]))
+
+    assert streamed_ids == created_ids[:3]
+
+@pytest.mark.asyncio
+async def test_batch_task_handlers(mediator):
+    create_commands = [
+        CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id=f"loc{i}", due_date=datetime.now())
+        for i in range(3)
+    ]
+    created_tasks = await mediator.handle_command(CreateTasksCommand(tasks=create_commands))
+    assert [task.location_id for task in created_tasks] == ["loc0", "loc1", "loc2"]
+    assert all(task.id for task in created_tasks)
+
+    repository = mediator._task_repository
+    repository.get_by_id = AsyncMock(side_effect=AssertionError("looked up one at a time"))
+    completed_tasks = await mediator.handle_command(
+        CompleteTasksCommand(task_ids=[created_tasks[0].id, "missing-task", created_tasks[0].id])
+    )
+    del repository.get_by_id
+    assert [task.id for task in completed_tasks] == [created_tasks[0].id]
+    assert completed_tasks[0].status == "completed"
+
+    await mediator.handle_command(DeleteTasksCommand(task_ids=[task.id for task in created_tasks]))
+    task_page = await mediator.handle_query(GetAllTasksQuery())
+    assert task_page.tasks == []
+
+@pytest.mark.asyncio
+async def test_batch_task_handlers_reject_oversized_batches(mediator):
+    with pytest.raises(ValueError):
+        await mediator.handle_command(DeleteTasksCommand(task_ids=[str(i) for i in range(config.BATCH_MAX_SIZE + 1)]))
+
 @pytest.mark.asyncio
 async def test_repository_circuit_breaker_opens_after_failures(monitor):
     mediator = AppMediator(FailingRepository(), MockDomainEventSender(), monitor)
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import random
+import time
+import pytest
+from datetime import datetime, timedelta
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.persistence.memory_repository import MemoryTaskRepository
+from .fakes import read_outbox
+
+START = datetime(2030, 1, 1)
+
+def new_task(rng: random.Random) -> Task:
+    return Task(
+        status=rng.choice(["created", "completed"]),
+        configuration_id=f"config{rng.randrange(3)}",
+        location_id=f"loc{rng.randrange(4)}",
+        user_id=rng.choice([None, "user0", "user1"]),
+        due_date=START + timedelta(hours=rng.randrange(48)),
+    )
+
+async def fetch_all(repository, limit, filters, sort):
+    ids, cursor = [], None
+    while True:
+        page = await repository.get_all(1, limit, cursor=cursor, filters=filters, sort=sort)
+        ids.extend(task.id for task in page.tasks)
+        cursor = page.next_cursor
+        if not cursor:
+            return ids
+
+@pytest.mark.asyncio
+async def test_queries_match_the_mock_repository():
+    rng = random.Random(7)
+    memory, mock = MemoryTaskRepository(), MockTaskRepository()
+    for _ in range(200):
+        # The mock indexes unknown ids on update, so both get the same ids in the same order
+        await mock.update((await memory.create(new_task(rng))).model_copy())
+    for task_id in rng.sample(list(memory._sequences), 40):
+        task = await memory.get_by_id(task_id)
+        task.status = "running"
+        task.due_date += timedelta(hours=5)
+        await memory.update(task)
+        await mock.update(task.model_copy())
+    for task_id in rng.sample(list(memory._sequences), 20):
+        await memory.delete(task_id)
+        await mock.delete(task_id)
+
+    for _ in range(50):
+        filters = TaskFilter(
+            status=rng.choice([None, "created", "running"]),
+            location_id=rng.choice([None, "loc1", "loc2"]),
+            user_id=rng.choice([None, "user0"]),
+            due_after=rng.choice([None, START + timedelta(hours=10)]),
+            due_before=rng.choice([None, START + timedelta(hours=30)]),
+        )
+        sort = TaskSort(field=rng.choice(["id", "due_date"]), descending=rng.random() < 0.5)
+        limit = rng.randrange(1, 20)
+        assert await fetch_all(memory, limit, filters, sort) == await fetch_all(mock, limit, filters, sort)
+        page = rng.randrange(1, 4)
+        offset = [task.id for task in (await memory.get_all(page, limit, filters=filters, sort=sort)).tasks]
+        assert offset == [task.id for task in (await mock.get_all(page, limit, filters=filters, sort=sort)).tasks]
+
+@pytest.mark.asyncio
+async def test_reads_return_copies_in_utc():
+    repository = MemoryTaskRepository()
+    task = await repository.create(Task(
+        status="created", configuration_id="config", location_id="loc",
+        due_date=datetime.fromisoformat("2030-01-01T12:00:00.000001+02:00"),
+    ))
+
+    found = await repository.get_by_id(task.id)
+    found.status = "completed"
+    assert (await repository.get_by_id(task.id)).status == "created"
+    assert found.due_date == datetime(2030, 1, 1, 10, 0, 0, 1)
+
+@pytest.mark.asyncio
+async def test_claims_the_earliest_due_tasks():
+    repository = MemoryTaskRepository()
+    tasks = [
+        await repository.create(Task(
+            status=status, configuration_id="config", location_id=location, due_date=START + timedelta(minutes=minutes),
+        ))
+        for status, location, minutes in [
+            ("created", "loc", 3), ("completed", "loc", 0), ("created", "excluded", 1), ("created", "loc", 2), ("created", "loc", 90),
+        ]
+    ]
+
+    claimed = await repository.claim_tasks("worker", START + timedelta(minutes=10), START + timedelta(minutes=11), 5, ["excluded"])
+    assert [task.id for task in claimed] == [tasks[3].id, tasks[0].id]
+    assert await repository.claim_tasks("other", START + timedelta(minutes=10), START + timedelta(minutes=11), 5, ["excluded"]) == []
+    # An expired lease can be claimed again
+    reclaimed = await repository.claim_tasks("other", START + timedelta(minutes=12), START + timedelta(minutes=20), 1)
+    assert [(task.id, task.lease_owner) for task in reclaimed] == [(tasks[2].id, "other")]
+
+    assert not await repository.release_lease(tasks[3].id, "other", "completed")
+    assert await repository.release_lease(tasks[3].id, "worker", "completed")
+    assert (await repository.get_by_id(tasks[3].id)).lease_owner is None
+    # Handing a task back unrun gives its attempt back
+    assert [task.attempts for task in reclaimed] == [1]
+    assert await repository.release_lease(tasks[2].id, "other", "created")
+    assert (await repository.get_by_id(tasks[2].id)).attempts == 0
+
+@pytest.mark.asyncio
+async def test_restart_loads_the_snapshot_and_replays_the_journal(tmp_path):
+    path = str(tmp_path / "tasks.snapshot")
+    repository = MemoryTaskRepository(path, snapshot_interval=3600, journal_flush_interval=3600)
+    await repository.connect()
+    tasks = [await repository.create(Task(status="created", configuration_id="config", location_id="loc", due_date=START)) for _ in range(3)]
+    await repository.add_outbox_messages([OutboxMessage(event_type="created", payload="1")])
+    await repository.snapshot()
+
+    await repository.delete(tasks[1].id)
+    tasks[2].status = "completed"
+    await repository.update(tasks[2])
+    await repository.add_outbox_messages([OutboxMessage(event_type="completed", payload="2")])
+    await repository.flush_journal()
+    # A crash: the changes after the snapshot survive only in the journal, whose last write is torn
+    await repository.create(Task(status="created", configuration_id="lost", location_id="loc", due_date=START))
+    with open(repository._journal_path(repository._generation), "ab") as journal:
+        journal.write(b"\xff\x00")
+    repository._persister.cancel()
+
+    restarted = MemoryTaskRepository(path, snapshot_interval=3600, journal_flush_interval=3600)
+    await restarted.connect()
+    try:
+        page = await restarted.get_all(1, 10)
+        assert [(task.id, task.status) for task in page.tasks] == [(tasks[0].id, "created"), (tasks[2].id, "completed")]
+        assert [message.payload for message in await read_outbox(restarted)] == ["1", "2"]
+        created = await restarted.create(Task(status="created", configuration_id="config", location_id="loc", due_date=START))
+        assert (await restarted.get_all(1, 10)).tasks[-1].id == created.id
+    finally:
+        await restarted.close()
+    assert len(list(tmp_path.glob("tasks.snapshot.journal.*"))) <= 1
+
+@pytest.mark.asyncio
+async def test_files_of_another_version_are_rejected(tmp_path):
+    path = tmp_path / "tasks.snapshot"
+    path.write_text(json.dumps({"version": 99, "generation": 1, "next_sequence": 0, "next_outbox_id": 0, "records": [], "outbox": []}))
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        await MemoryTaskRepository(str(path)).connect()
+
+    path.unlink()
+    (tmp_path / "tasks.snapshot.journal.0").write_text(json.dumps({"version": 99}) + "\n")
+    with pytest.raises(ValueError, match="Unsupported journal version"):
+        await MemoryTaskRepository(str(path)).connect()
+
+@pytest.mark.asyncio
+async def test_tasks_deleted_while_streaming_are_skipped():
+    repository = MemoryTaskRepository()
+    tasks = [await repository.create(Task(status="created", configuration_id="config", location_id="loc", due_date=START)) for _ in range(5)]
+    streamed = []
+    async for task in repository.stream_all(10):
+        streamed.append(task.id)
+        if len(streamed) == 1:
+            await repository.delete(tasks[3].id)
+    assert streamed == [task.id for task in tasks[:3]] + [tasks[4].id]
+
+@pytest.mark.asyncio
+async def test_close_lets_the_write_in_progress_finish(tmp_path):
+    repository = MemoryTaskRepository(str(tmp_path / "tasks.snapshot"), snapshot_interval=3600, journal_flush_interval=0.01)
+    await repository.connect()
+    append = repository._append_journal
+    writing = []
+
+    def slow_append(generation, ops):
+        writing.append(generation)
+        time.sleep(0.05)
+        append(generation, ops)
+        writing.remove(generation)
+
+    repository._append_journal = slow_append
+    await repository.create(Task(status="created", configuration_id="config", location_id="loc", due_date=START))
+    await asyncio.sleep(0.03)
+    assert writing
+
+    def checked_append(generation, ops):
+        # The final snapshot's journal write would otherwise run alongside the flush
+        assert not writing, "writes overlap"
+        append(generation, ops)
+
+    repository._append_journal = checked_append
+    await repository.close()
+    assert writing == []
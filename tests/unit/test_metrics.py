@@ -0,0 +1,61 @@
+
+import pytest
+import uuid
+from datetime import datetime
+from fastapi.testclient import TestClient
+from src.application.commands_queries import CreateTaskCommand, GetTaskQuery
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.monitoring.metrics import HANDLER_DURATION, REPOSITORY_DURATION, MetricsRegistry
+from src.infrastructure.persistence.instrumented_repository import InstrumentedTaskRepository
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    child = histogram.labels("/tasks/")
+    for value in (0.05, 0.1, 0.5, 2.0):
+        child.observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/tasks/",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/tasks/",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/tasks/",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/tasks/"} 4' in lines
+
+def test_label_values_are_escaped_and_collectors_rendered():
+    registry = MetricsRegistry()
+    registry.counter("events_total", "Events.", ("name",)).labels('a"b').inc(2)
+    registry.register_collector("relay", lambda: {"relayed_total": 3, "state": "running"})
+
+    lines = registry.render().splitlines()
+    assert 'events_total{name="a\\"b"} 2' in lines
+    assert "relay_relayed_total 3" in lines
+    assert not any(line.startswith("relay_state") for line in lines)
+
+@pytest.mark.asyncio
+async def test_mediator_and_repository_calls_are_measured():
+    handler_child = HANDLER_DURATION.labels("query", "GetTaskQuery")
+    repository_child = REPOSITORY_DURATION.labels("get_by_id")
+    handled, loaded = handler_child.count, repository_child.count
+
+    repository = InstrumentedTaskRepository(MockTaskRepository())
+    mediator = AppMediator(repository, MockDomainEventSender(), CircuitBreakerMonitor())
+    task = await mediator.handle_command(
+        CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id="loc1", due_date=datetime.now())
+    )
+    await mediator.handle_query(GetTaskQuery(task_id=task.id))
+
+    assert handler_child.count == handled + 1
+    assert repository_child.count == loaded + 1
+
+def test_metrics_endpoint_reports_routes():
+    client = TestClient(app)
+    client.get("/metrics")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'task_service_http_request_duration_seconds_count{method="GET",route="/metrics",status="200"}' in response.text
@@ -0,0 +1,170 @@
+
+import asyncio
+import pytest
+from src.domain.events import TaskDeletedEvent
+from src.infrastructure.messaging import nats_event_sender
+from src.infrastructure.messaging.nats_event_sender import NatsEventSender
+from src.infrastructure.monitoring.tracing import InMemorySpanExporter, tracer
+
+# Fake NATS client that acknowledges publishes when told to
+class FakeJetStream:
+    def __init__(self, failures=0):
+        self.published = []
+        self.pending = []
+        self.headers = []
+        self.failures = failures
+        self.streams_added = 0
+
+    async def add_stream(self, name, subjects):
+        self.streams_added += 1
+
+    async def publish_async(self, subject, payload, headers=None):
+        self.headers.append(headers)
+        ack = asyncio.get_running_loop().create_future()
+        if self.failures:
+            self.failures -= 1
+            ack.set_exception(Exception("NATS unavailable"))
+        else:
+            self.pending.append((payload, ack))
+        return ack
+
+    async def publish(self, subject, payload, timeout=None, headers=None):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("NATS unavailable")
+        self.published.append(payload)
+
+    def ack_all(self):
+        for payload, ack in self.pending:
+            self.published.append(payload)
+            ack.set_result(None)
+        self.pending = []
+
+class FakeNats:
+    def __init__(self, js):
+        self.js = js
+        self.closed = False
+
+    def jetstream(self, publish_async_max_pending):
+        return self.js
+
+    async def close(self):
+        self.closed = True
+
+@pytest.fixture
+def js(monkeypatch):
+    js = FakeJetStream()
+    connections = []
+
+    async def connect(url):
+        await asyncio.sleep(0)
+        connections.append(url)
+        return FakeNats(js)
+
+    monkeypatch.setattr(nats_event_sender.nats, "connect", connect)
+    js.connections = connections
+    return js
+
+async def wait_until(predicate):
+    for _ in range(100):
+        if predicate():
+            return
+        await asyncio.sleep(0)
+    raise AssertionError("condition not reached")
+
+@pytest.mark.asyncio
+async def test_concurrent_first_sends_connect_once(js):
+    sender = NatsEventSender("nats://test", "subject", "stream")
+    await asyncio.gather(*(sender.send(TaskDeletedEvent(task_id=str(i))) for i in range(5)))
+
+    assert len(js.connections) == 1
+    assert js.streams_added == 1
+    await wait_until(lambda: len(js.pending) == 5)
+    js.ack_all()
+    await sender.close()
+
+@pytest.mark.asyncio
+async def test_send_returns_before_ack_and_flush_waits_for_it(js):
+    sender = NatsEventSender("nats://test", "subject", "stream")
+    await sender.connect()
+    await sender.send(TaskDeletedEvent(task_id="1"))
+
+    await wait_until(lambda: sender.get_metrics()["in_flight"] == 1)
+    flush = asyncio.create_task(sender.flush())
+    await asyncio.sleep(0)
+    assert not flush.done()
+
+    js.ack_all()
+    await flush
+    assert sender.get_metrics()["published_total"] == 1
+    await sender.close()
+
+@pytest.mark.asyncio
+async def test_full_window_and_queue_apply_backpressure(js):
+    sender = NatsEventSender("nats://test", "subject", "stream", queue_size=2, max_in_flight=2)
+    await sender.connect()
+    for i in range(4):
+        await sender.send(TaskDeletedEvent(task_id=str(i)))
+    await wait_until(lambda: sender.get_metrics()["queue_depth"] == 2)
+
+    blocked = asyncio.create_task(sender.send(TaskDeletedEvent(task_id="5")))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    js.ack_all()
+    await blocked
+    await wait_until(lambda: len(js.pending) == 2)
+    js.ack_all()
+    await wait_until(lambda: len(js.pending) == 1)
+    js.ack_all()
+    await sender.close()
+    assert len(js.published) == 5
+
+@pytest.mark.asyncio
+async def test_failed_publishes_are_retried(js):
+    js.failures = 1
+    sender = NatsEventSender("nats://test", "subject", "stream")
+    await sender.connect()
+    await sender.send(TaskDeletedEvent(task_id="1"))
+    await sender.flush()
+
+    assert sender.get_metrics()["retries_total"] == 1
+    assert js.published == [TaskDeletedEvent(task_id="1").model_dump_json().encode()]
+    await sender.close()
+
+@pytest.mark.asyncio
+async def test_events_failing_every_retry_are_dropped_and_fail_the_flush(js, monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(nats_event_sender.asyncio, "sleep", lambda delay: sleep(0))
+    js.failures = 3
+    sender = NatsEventSender("nats://test", "subject", "stream", max_retries=2)
+    await sender.connect()
+    await sender.send(TaskDeletedEvent(task_id="1"))
+    with pytest.raises(ConnectionError, match="1 events"):
+        await sender.flush()
+
+    assert sender.get_metrics()["failed_total"] == 1
+    assert sender.get_metrics()["in_flight"] == 0
+    await sender.send(TaskDeletedEvent(task_id="2"))
+    await wait_until(lambda: len(js.pending) == 1)
+    js.ack_all()
+    await sender.flush()
+    assert js.published == [TaskDeletedEvent(task_id="2").model_dump_json().encode()]
+    await sender.close()
+
+@pytest.mark.asyncio
+async def test_events_carry_the_trace_they_were_sent_in(js):
+    tracer.configure(InMemorySpanExporter(), sample_rate=1)
+    sender = NatsEventSender("nats://test", "subject", "stream")
+    try:
+        await sender.send(TaskDeletedEvent(task_id="untraced"))
+        with tracer.start_span("request") as span:
+            await sender.send_batch([TaskDeletedEvent(task_id="1"), TaskDeletedEvent(task_id="2")])
+        await wait_until(lambda: len(js.pending) == 3)
+        js.ack_all()
+        await sender.close()
+    finally:
+        tracer.shutdown()
+
+    assert js.headers[0] == {"Event-Type": "TaskDeletedEvent"}
+    assert js.headers[1] == js.headers[2] == {"Event-Type": "TaskDeletedEvent", "traceparent": span.traceparent()}
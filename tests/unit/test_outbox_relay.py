@@ -0,0 +1,133 @@
+
+import asyncio
+import pytest
+import uuid
+from aiobreaker import CircuitBreakerError
+from datetime import datetime, timedelta, timezone
+from src.application.commands_queries import CreateTaskCommand, DeleteTaskCommand
+from src.domain.events import TaskCreatedEvent, TaskDeletedEvent
+from src.config import config
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.messaging.outbox_relay import OutboxRelay
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+
+class RecordingEventSender(MockDomainEventSender):
+    def __init__(self, failures=0):
+        self.events = []
+        self.failures = failures
+
+    async def send(self, event):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("Event sender failure")
+        self.events.append(event)
+
+@pytest.fixture
+def repository():
+    return MockTaskRepository()
+
+async def create_and_delete(mediator):
+    task = await mediator.handle_command(
+        CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id="loc1", due_date=datetime.now())
+    )
+    await mediator.handle_command(DeleteTaskCommand(task_id=task.id))
+    return task
+
+@pytest.mark.asyncio
+async def test_writes_do_not_wait_on_a_failing_sender(repository):
+    sender = RecordingEventSender(failures=100)
+    relay = OutboxRelay(repository, sender)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=relay)
+
+    await create_and_delete(mediator)
+
+    assert len(repository._outbox) == 2
+    assert sender.events == []
+
+@pytest.mark.asyncio
+async def test_relay_delivers_in_order_and_empties_outbox(repository):
+    sender = RecordingEventSender()
+    relay = OutboxRelay(repository, sender, batch_size=1)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=relay)
+    task = await create_and_delete(mediator)
+
+    assert await relay.relay_once() == 1
+    assert await relay.relay_once() == 1
+    assert await relay.relay_once() == 0
+
+    assert [type(event) for event in sender.events] == [TaskCreatedEvent, TaskDeletedEvent]
+    assert all(event.task_id == task.id for event in sender.events)
+    assert relay.get_metrics()["relayed_total"] == 2
+
+@pytest.mark.asyncio
+async def test_relay_retries_without_losing_events(repository):
+    sender = RecordingEventSender(failures=1)
+    relay = OutboxRelay(repository, sender, poll_interval=0.01)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=relay)
+    await create_and_delete(mediator)
+
+    relay.start()
+    for _ in range(100):
+        if len(sender.events) == 2:
+            break
+        await asyncio.sleep(0.01)
+    await relay.stop()
+
+    assert [type(event) for event in sender.events] == [TaskCreatedEvent, TaskDeletedEvent]
+    assert repository._outbox == {}
+    assert relay.get_metrics()["failures_total"] == 1
+
+class HangingFlushEventSender(RecordingEventSender):
+    async def flush(self):
+        await asyncio.Event().wait()
+
+@pytest.mark.asyncio
+async def test_batches_not_sent_within_the_lease_are_kept(repository):
+    sender = HangingFlushEventSender()
+    relay = OutboxRelay(repository, sender, lease_seconds=0.02)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=relay)
+    await create_and_delete(mediator)
+    try:
+        with pytest.raises(TimeoutError):
+            await relay.relay_once()
+        assert len(repository._outbox) == 2
+    finally:
+        mediator._event_sender_breaker.close()
+
+@pytest.mark.asyncio
+async def test_relays_of_several_replicas_claim_each_message_once(repository):
+    sender = RecordingEventSender()
+    first = OutboxRelay(repository, sender, batch_size=1, lease_seconds=60)
+    second = OutboxRelay(repository, sender, batch_size=1, lease_seconds=60)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=first)
+    await create_and_delete(mediator)
+
+    # The first relay dies after claiming its batch; the second one skips it until the lease expires
+    now = datetime.now(timezone.utc)
+    claimed = await repository.claim_outbox_messages(first.owner, now, now + timedelta(seconds=60), 1)
+    assert await second.relay_once() == 1
+    assert await second.relay_once() == 0
+    assert [type(event) for event in sender.events] == [TaskDeletedEvent]
+
+    later = now + timedelta(seconds=61)
+    assert await repository.claim_outbox_messages(second.owner, later, later + timedelta(seconds=60), 1) == claimed
+
+@pytest.mark.asyncio
+async def test_relay_failures_open_the_event_sender_breaker(repository):
+    sender = RecordingEventSender(failures=100)
+    relay = OutboxRelay(repository, sender)
+    mediator = AppMediator(repository, sender, CircuitBreakerMonitor(), outbox_relay=relay)
+    await create_and_delete(mediator)
+    try:
+        for _ in range(config.CIRCUIT_BREAKER_FAIL_MAX):
+            with pytest.raises(Exception):
+                await relay.relay_once()
+        failures = sender.failures
+        with pytest.raises(CircuitBreakerError):
+            await relay.relay_once()
+        assert sender.failures == failures
+        assert len(repository._outbox) == 2
+    finally:
+        mediator._event_sender_breaker.close()
@@ -0,0 +1,94 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.config import config
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.di_factories import Container
+from src.infrastructure.monitoring.profiler import Profiler, ProfilerArgumentError, ProfilerError, operation_frame
+
+class ReportQuery:
+    pass
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+@operation_frame("query")
+async def handle(query, work):
+    work()
+    await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_cpu_samples_are_collapsed_stacks_rooted_at_the_operation():
+    profiler = Profiler()
+    profile = asyncio.ensure_future(profiler.profile_cpu(0.3, interval=0.001))
+    while not profile.done():
+        await handle(ReportQuery(), lambda: spin(0.01))
+
+    lines = profile.result().splitlines()
+    stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+    hot = [stack for stack in stacks if stack.startswith("ReportQuery;") and stack.endswith(":spin")]
+    assert hot and "tests/unit/test_profiler.py:handle" in hot[0].split(";")
+    assert not any(stack.endswith(":spin") for stack in stacks if stack not in hot)
+
+    with pytest.raises(ProfilerArgumentError):
+        await profiler.profile_cpu(120)
+
+@pytest.mark.asyncio
+async def test_event_loop_stalls_are_reported_with_the_blocking_stack():
+    profiler = Profiler()
+    measurement = asyncio.ensure_future(profiler.measure_event_loop(0.5, slow_threshold=0.1))
+    await asyncio.sleep(0.1)
+    await handle(ReportQuery(), lambda: time.sleep(0.3))
+    report = await measurement
+
+    assert report["samples"] > 0
+    assert report["lag_ms"]["max"] >= 250
+    [stall] = report["slow_callbacks"]
+    assert stall["operation"] == "ReportQuery"
+    assert stall["blocked_ms"] >= 150
+    assert stall["stack"][-2:] == ["tests/unit/test_profiler.py:handle", "tests/unit/test_profiler.py:test_event_loop_stalls_are_reported_with_the_blocking_stack.<locals>.<lambda>"]
+
+@pytest.mark.asyncio
+async def test_allocation_snapshots_report_growth_since_the_previous_one():
+    profiler = Profiler()
+    with pytest.raises(ProfilerError):
+        await profiler.allocation_snapshot()
+    profiler.start_allocation_tracing()
+    try:
+        first = await profiler.allocation_snapshot()
+        retained = [bytearray(1000) for _ in range(2000)]
+        second = await profiler.allocation_snapshot(limit=5)
+    finally:
+        profiler.stop_allocation_tracing()
+
+    assert not first["compared_to_previous"]
+    assert second["compared_to_previous"]
+    [location] = second["top"][0]["location"]
+    assert location.startswith("tests/unit/test_profiler.py:")
+    assert second["top"][0]["size_diff_bytes"] >= 2000 * 1000
+    assert len(retained) == 2000
+
+def test_admin_endpoints_need_the_admin_token(monkeypatch):
+    container = Container()
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    client = TestClient(app)
+    try:
+        monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+        assert client.get("/admin/profile/cpu", params={"seconds": 0.05}).status_code == 404
+
+        monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+        assert client.get("/admin/profile/cpu", params={"seconds": 0.05}).status_code == 401
+        headers = {"Authorization": "Bearer secret"}
+        response = client.get("/admin/profile/cpu", params={"seconds": 0.05}, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert client.get("/admin/profile/cpu", params={"seconds": 3600}, headers=headers).status_code == 400
+        assert client.post("/admin/profile/allocations", params={"frames": 0}, headers=headers).status_code == 400
+        assert client.get("/admin/profile/allocations", headers=headers).status_code == 409
+        report = client.get("/admin/profile/event-loop", params={"seconds": 0.1}, headers=headers).json()
+        assert report["samples"] > 0 and report["slow_callbacks"] == []
+    finally:
+        container.unwire()
@@ -0,0 +1,40 @@
+
+import pytest
+from fastapi.testclient import TestClient
+from src.infrastructure.api.rest_api import NEXT_CURSOR_HEADER, app
+from src.infrastructure.di_factories import Container
+
+@pytest.fixture
+def client():
+    container = Container()
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    yield TestClient(app)
+    container.unwire()
+
+def test_create_parses_a_typed_body(client):
+    response = client.post(
+        "/tasks/", json={"configuration_id": "config", "location_id": "loc1", "due_date": "2024-05-01T10:30:00"}
+    )
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["due_date"] == "2024-05-01T10:30:00"
+    assert response.json()["status"] == "created"
+    assert response.json()["attempts"] == 0
+    # Worker leases are internal
+    assert "lease_owner" not in response.json()
+    assert "lease_until" not in client.get("/openapi.json").json()["components"]["schemas"]["Task"]["properties"]
+
+    assert client.post("/tasks/", json={"configuration_id": "config"}).status_code == 422
+
+def test_list_is_serialized_as_a_plain_array_with_a_cursor_header(client):
+    for _ in range(3):
+        client.post("/tasks/", json={"configuration_id": "list", "location_id": "loc1", "due_date": "2024-05-01T10:30:00"})
+
+    response = client.get("/tasks/", params={"configuration_id": "list", "limit": 2})
+
+    assert response.status_code == 200
+    assert [task["configuration_id"] for task in response.json()] == ["list", "list"]
+    assert response.headers[NEXT_CURSOR_HEADER]
+    task_id = response.json()[0]["id"]
+    assert client.get(f"/tasks/{task_id}").json()["id"] == task_id
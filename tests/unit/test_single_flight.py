@@ -0,0 +1,70 @@
+
+import asyncio
+import pytest
+import uuid
+from datetime import datetime
+from src.application.commands_queries import CreateTaskCommand, GetTaskQuery
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.concurrency.single_flight import SingleFlight
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+
+class SlowRepository(MockTaskRepository):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_by_id(self, task_id):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return await super().get_by_id(task_id)
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_share_one_call():
+    repository = SlowRepository()
+    mediator = AppMediator(repository, MockDomainEventSender(), CircuitBreakerMonitor())
+    task = await mediator.handle_command(
+        CreateTaskCommand(configuration_id=str(uuid.uuid4()), location_id="loc1", due_date=datetime.now())
+    )
+
+    results = await asyncio.gather(*(mediator.handle_query(GetTaskQuery(task_id=task.id)) for _ in range(10)))
+    await mediator.handle_query(GetTaskQuery(task_id="other"))
+
+    assert all(result.id == task.id for result in results)
+    assert repository.reads == 2
+    metrics = mediator.get_single_flight_metrics()["GetTaskQuery"]
+    assert metrics["calls_total"] == 11
+    assert metrics["shared_total"] == 9
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(single_flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        await single_flight.do("key", failing)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    single_flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    first = asyncio.create_task(single_flight.do("key", slow))
+    second = asyncio.create_task(single_flight.do("key", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "result"
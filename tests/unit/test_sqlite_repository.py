@@ -0,0 +1,159 @@
+import asyncio
+import random
+import sqlite3
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from src.domain.entities import Task
+from src.domain.filters import TaskFilter, TaskSort
+from src.domain.outbox import OutboxMessage
+from src.infrastructure.persistence.memory_repository import MemoryTaskRepository
+from src.infrastructure.persistence.sqlite_repository import SqliteTaskRepository
+from .fakes import read_outbox
+
+START = datetime(2030, 1, 1)
+
+@pytest_asyncio.fixture
+async def repository(tmp_path):
+    repository = SqliteTaskRepository(str(tmp_path / "tasks.db"), read_threads=2)
+    await repository.connect()
+    yield repository
+    await repository.close()
+
+def new_task(status="created", location_id="loc", minutes=0) -> Task:
+    return Task(status=status, configuration_id="config", location_id=location_id, due_date=START + timedelta(minutes=minutes))
+
+async def fetch_all(repository, limit, filters, sort):
+    ids, cursor = [], None
+    while True:
+        page = await repository.get_all(1, limit, cursor=cursor, filters=filters, sort=sort)
+        ids.extend(task.id for task in page.tasks)
+        cursor = page.next_cursor
+        if not cursor:
+            return ids
+
+@pytest.mark.asyncio
+async def test_queries_match_the_memory_repository(repository):
+    rng = random.Random(3)
+    memory = MemoryTaskRepository()
+    ids = {}
+    for _ in range(150):
+        task = Task(
+            status=rng.choice(["created", "running", "completed"]),
+            configuration_id=f"config{rng.randrange(3)}",
+            location_id=f"loc{rng.randrange(4)}",
+            user_id=rng.choice([None, "user0"]),
+            due_date=START + timedelta(hours=rng.randrange(48)),
+        )
+        expected = await memory.create(task.model_copy())
+        ids[(await repository.create(task)).id] = expected.id
+
+    for _ in range(40):
+        filters = TaskFilter(
+            status=rng.choice([None, "created", "running"]),
+            location_id=rng.choice([None, "loc1"]),
+            user_id=rng.choice([None, "user0"]),
+            due_after=rng.choice([None, START + timedelta(hours=10)]),
+            due_before=rng.choice([None, START + timedelta(hours=30)]),
+        )
+        sort = TaskSort(field=rng.choice(["id", "due_date"]), descending=rng.random() < 0.5)
+        limit = rng.randrange(1, 15)
+        found = [ids[task_id] for task_id in await fetch_all(repository, limit, filters, sort)]
+        assert found == await fetch_all(memory, limit, filters, sort)
+        page = (await repository.get_all(2, limit, filters=filters, sort=sort)).tasks
+        assert [ids[task.id] for task in page] == [task.id for task in (await memory.get_all(2, limit, filters=filters, sort=sort)).tasks]
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_commits(repository):
+    def fail(connection):
+        connection.execute("INSERT INTO tasks (id) VALUES ('incomplete')")
+
+    results = await asyncio.gather(
+        *(repository.create(new_task(minutes=i)) for i in range(50)),
+        repository._write(fail),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[-1], sqlite3.IntegrityError)
+    assert len(await repository.get_many([task.id for task in results[:-1]])) == 50
+    assert repository.get_metrics()["commits_total"] < 50
+    assert repository.get_metrics()["writes_total"] == 51
+
+class WriterKilled(BaseException):
+    pass
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+async def test_writes_fail_once_the_writer_thread_stops(repository):
+    def kill(connection):
+        raise WriterKilled()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(repository._write(kill), repository.create(new_task()), return_exceptions=True), 1
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(RuntimeError, match="writer thread stopped"):
+        await asyncio.wait_for(repository.create(new_task()), 1)
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(repository.ping(), 1)
+
+@pytest.mark.asyncio
+async def test_claims_leases_outbox_and_emissions_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    repository = SqliteTaskRepository(path)
+    await repository.connect()
+    tasks = [
+        await repository.create(new_task(status, location, minutes))
+        for status, location, minutes in [("created", "loc", 3), ("completed", "loc", 0), ("created", "excluded", 1), ("created", "loc", 2)]
+    ]
+    claimed = await repository.claim_tasks("worker", START + timedelta(minutes=10), START + timedelta(minutes=11), 5, ["excluded"])
+    assert [task.id for task in claimed] == [tasks[3].id, tasks[0].id]
+    assert await repository.renew_leases([tasks[0].id, tasks[2].id], "worker", START + timedelta(minutes=20)) == [tasks[0].id]
+    assert await repository.release_lease(tasks[3].id, "worker", "completed")
+    await repository.add_outbox_messages([OutboxMessage(event_type="completed", payload="{}")])
+    assert len(await repository.claim_outbox_messages("relay", START, START + timedelta(minutes=1), 10)) == 1
+    assert await repository.claim_emissions(["due:a", "due:b"], START, START + timedelta(minutes=1)) == ["due:a", "due:b"]
+    await repository.close()
+
+    reopened = SqliteTaskRepository(path)
+    await reopened.connect()
+    try:
+        assert (await reopened.get_by_id(tasks[3].id)).status == "completed"
+        running = await reopened.get_by_id(tasks[0].id)
+        assert (running.lease_owner, running.lease_until) == ("worker", START + timedelta(minutes=20))
+        # Only the expired lease can be taken over
+        reclaimed = await reopened.claim_tasks("other", START + timedelta(minutes=15), START + timedelta(minutes=30), 5)
+        assert [(task.id, task.attempts) for task in reclaimed] == [(tasks[2].id, 1)]
+        assert await reopened.release_lease(tasks[2].id, "other", "created")
+        assert (await reopened.get_by_id(tasks[2].id)).attempts == 0
+        assert running.attempts == 1
+        assert await reopened.claim_outbox_messages("other", START, START + timedelta(minutes=2), 10) == []
+        messages = await reopened.claim_outbox_messages("other", START + timedelta(minutes=2), START + timedelta(minutes=3), 10)
+        assert [message.event_type for message in messages] == ["completed"]
+        await reopened.delete_outbox_messages([message.id for message in messages])
+        assert await reopened.claim_emissions(["due:a", "due:c"], START, START + timedelta(minutes=1)) == ["due:c"]
+        assert await reopened.claim_emissions(["due:a"], START + timedelta(minutes=2), START + timedelta(minutes=3)) == ["due:a"]
+        assert await read_outbox(reopened) == []
+    finally:
+        await reopened.close()
+
+@pytest.mark.asyncio
+async def test_atomic_writes_commit_together_or_not_at_all(repository):
+    async def create_with_event(fail):
+        task = await repository.create(new_task())
+        await repository.add_outbox_messages([OutboxMessage(event_type="TaskCreatedEvent", payload=task.id)])
+        if fail:
+            raise ConnectionError("publisher went away")
+        return task
+
+    with pytest.raises(ConnectionError):
+        await repository.atomically(lambda: create_with_event(True))
+    assert (await repository.get_all(1, 10)).tasks == []
+    assert await read_outbox(repository) == []
+
+    # Writes queued while a unit runs are committed after it, on their own
+    other = asyncio.ensure_future(repository.create(new_task(location_id="other")))
+    task = await repository.atomically(lambda: create_with_event(False))
+    await other
+    assert {found.location_id for found in (await repository.get_all(1, 10)).tasks} == {"loc", "other"}
+    assert [message.payload for message in await read_outbox(repository)] == [task.id]
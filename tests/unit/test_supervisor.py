@@ -0,0 +1,49 @@
+
+import os
+import signal
+import time
+import pytest
+from src.supervisor import Supervisor
+
+def idle_worker(roles, rest_sockets, primary):
+    time.sleep(60)
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.05)
+
+def test_split_roles_and_single_primary():
+    supervisor = Supervisor(idle_worker, workers=2, grpc_workers=1, rest_port=0)
+
+    assert [(slot.roles, slot.primary) for slot in supervisor._slots] == [
+        (("rest",), True),
+        (("rest",), False),
+        (("grpc",), False),
+    ]
+
+def test_crashed_worker_is_restarted_and_stop_terminates_all():
+    supervisor = Supervisor(idle_worker, workers=2, rest_port=0, shutdown_timeout=5)
+    supervisor.start()
+    try:
+        crashed = supervisor._slots[1].process
+        crashed_pid = crashed.pid
+        os.kill(crashed_pid, signal.SIGKILL)
+        wait_until(lambda: not crashed.is_alive())
+
+        assert supervisor.check_workers() == 0  # A worker that dies right away is restarted after a delay
+        wait_until(lambda: supervisor.check_workers() == 1)
+        assert supervisor.get_metrics() == {"workers": 2, "alive": 2, "restarts_total": 1}
+        assert supervisor._slots[1].process.pid != crashed_pid
+    finally:
+        supervisor.stop()
+
+    assert supervisor.get_metrics()["alive"] == 0
+
+def test_scheduler_requires_a_single_process(monkeypatch):
+    monkeypatch.setattr("src.supervisor.config.SCHEDULER_ENABLED", True)
+
+    with pytest.raises(ValueError):
+        Supervisor(idle_worker, workers=2, rest_port=0)
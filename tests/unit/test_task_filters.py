@@ -0,0 +1,83 @@
+
+import pytest
+from datetime import datetime, timedelta
+from src.application.commands_queries import CreateTaskCommand, CompleteTaskCommand, DeleteTaskCommand, GetAllTasksQuery
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+
+START = datetime(2030, 1, 1)
+
+@pytest.fixture
+def mediator():
+    return AppMediator(MockTaskRepository(), MockDomainEventSender(), CircuitBreakerMonitor())
+
+async def create_tasks(mediator, count):
+    # Due dates run backwards so due_date order differs from creation order
+    tasks = []
+    for i in range(count):
+        tasks.append(await mediator.handle_command(CreateTaskCommand(
+            configuration_id=f"config{i % 2}",
+            location_id=f"loc{i % 3}",
+            due_date=START - timedelta(days=i),
+        )))
+    return tasks
+
+async def fetch_all(mediator, **filters):
+    tasks, cursor = [], None
+    while True:
+        page = await mediator.handle_query(GetAllTasksQuery(limit=2, cursor=cursor, **filters))
+        tasks.extend(page.tasks)
+        cursor = page.next_cursor
+        if not cursor:
+            return tasks
+
+@pytest.mark.asyncio
+async def test_equality_filters_are_combined(mediator):
+    tasks = await create_tasks(mediator, 12)
+    await mediator.handle_command(CompleteTaskCommand(task_id=tasks[0].id))
+
+    found = await fetch_all(mediator, configuration_id="config0", location_id="loc0")
+    assert [task.id for task in found] == [tasks[0].id, tasks[6].id]
+
+    found = await fetch_all(mediator, status="created", configuration_id="config0", location_id="loc0")
+    assert [task.id for task in found] == [tasks[6].id]
+
+@pytest.mark.asyncio
+async def test_due_date_range_and_sort(mediator):
+    tasks = await create_tasks(mediator, 10)
+
+    found = await fetch_all(
+        mediator,
+        due_after=START - timedelta(days=6),
+        due_before=START - timedelta(days=1),
+        sort_by="due_date",
+    )
+    assert [task.id for task in found] == [tasks[i].id for i in (6, 5, 4, 3, 2)]
+
+    found = await fetch_all(mediator, location_id="loc1", sort_by="due_date", sort_order="desc")
+    assert [task.id for task in found] == [tasks[i].id for i in (1, 4, 7)]
+
+@pytest.mark.asyncio
+async def test_offset_pages_follow_the_sort(mediator):
+    tasks = await create_tasks(mediator, 5)
+    page = await mediator.handle_query(GetAllTasksQuery(page=2, limit=2, sort_by="id", sort_order="desc"))
+    assert [task.id for task in page.tasks] == [tasks[2].id, tasks[1].id]
+
+@pytest.mark.asyncio
+async def test_indexes_follow_updates_and_deletes(mediator):
+    tasks = await create_tasks(mediator, 6)
+    await mediator.handle_command(CompleteTaskCommand(task_id=tasks[1].id))
+    await mediator.handle_command(DeleteTaskCommand(task_id=tasks[3].id))
+
+    assert [task.id for task in await fetch_all(mediator, status="completed")] == [tasks[1].id]
+    created = await fetch_all(mediator, status="created", sort_by="due_date")
+    assert [task.id for task in created] == [tasks[i].id for i in (5, 4, 2, 0)]
+
+@pytest.mark.asyncio
+async def test_cursor_from_another_sort_is_rejected(mediator):
+    await create_tasks(mediator, 3)
+    page = await mediator.handle_query(GetAllTasksQuery(limit=1))
+    with pytest.raises(ValueError):
+        await mediator.handle_query(GetAllTasksQuery(limit=1, cursor=page.next_cursor, sort_by="due_date"))
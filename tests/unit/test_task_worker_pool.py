@@ -0,0 +1,176 @@
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from src.application.commands_queries import CreateTaskCommand, CreateTasksCommand, GetAllTasksQuery
+from src.infrastructure.app_mediator import AppMediator
+from src.infrastructure.mocks.mock_event_sender import MockDomainEventSender
+from src.infrastructure.mocks.mock_repository import MockTaskRepository
+from src.infrastructure.monitoring.circuit_breaker_monitor import CircuitBreakerMonitor
+from src.infrastructure.workers.task_worker_pool import TaskWorkerPool
+
+@pytest.fixture
+def repository():
+    return MockTaskRepository()
+
+@pytest.fixture
+def mediator(repository):
+    return AppMediator(repository, MockDomainEventSender(), CircuitBreakerMonitor())
+
+async def create_due_tasks(mediator, count, location_id="loc1"):
+    command = CreateTasksCommand(tasks=[
+        CreateTaskCommand(
+            configuration_id="config", location_id=location_id, due_date=datetime.now() - timedelta(minutes=1)
+        )
+        for _ in range(count)
+    ])
+    return await mediator.handle_command(command)
+
+async def count_created(mediator):
+    page = await mediator.handle_query(GetAllTasksQuery(status="created", limit=100))
+    return len(page.tasks)
+
+async def drain(*pools):
+    for _ in range(1000):
+        if not any(pool.get_metrics()["running"] for pool in pools):
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("tasks still running")
+
+@pytest.mark.asyncio
+async def test_replicas_share_tasks_without_double_execution(repository, mediator):
+    tasks = await create_due_tasks(mediator, 20)
+    calls = []
+
+    async def handler(task):
+        calls.append(task["id"])
+        await asyncio.sleep(0)
+
+    pools = [TaskWorkerPool(repository, mediator, handler=handler, concurrency=3) for _ in range(2)]
+    while len(calls) < 20:
+        for pool in pools:
+            await pool.claim_once()
+        await asyncio.sleep(0)
+    await drain(*pools)
+
+    assert sorted(calls) == sorted(task.id for task in tasks)
+    assert all(task.status == "completed" and task.lease_owner is None for task in tasks)
+    assert sum(pool.get_metrics()["completed_total"] for pool in pools) == 20
+
+@pytest.mark.asyncio
+async def test_location_concurrency_limit(mediator, repository):
+    await create_due_tasks(mediator, 3, location_id="busy")
+    await create_due_tasks(mediator, 1, location_id="quiet")
+    release = asyncio.Event()
+
+    async def handler(task):
+        await release.wait()
+
+    pool = TaskWorkerPool(repository, mediator, handler=handler, location_concurrency=1)
+    assert await pool.claim_once() == 2
+    assert await pool.claim_once() == 0
+    assert await count_created(mediator) == 2
+
+    release.set()
+    await drain(pool)
+    assert await pool.claim_once() == 1
+    await drain(pool)
+
+@pytest.mark.asyncio
+async def test_failed_task_is_retried_after_its_lease_expires(mediator, repository):
+    [task] = await create_due_tasks(mediator, 1)
+    attempts = []
+
+    def handler(payload):
+        attempts.append(payload["id"])
+        if len(attempts) == 1:
+            raise RuntimeError("handler failure")
+
+    pool = TaskWorkerPool(repository, mediator, handler=handler, lease_seconds=0.05)
+    await pool.claim_once()
+    await drain(pool)
+    assert task.status == "running"
+    assert await pool.claim_once() == 0
+
+    await asyncio.sleep(0.06)
+    assert await pool.claim_once() == 1
+    await drain(pool)
+    assert attempts == [task.id, task.id]
+    assert task.status == "completed"
+    assert pool.get_metrics()["failed_total"] == 1
+
+class FailingCompletionMediator:
+    async def handle_command(self, command):
+        raise ConnectionError("repository unavailable")
+
+@pytest.mark.asyncio
+async def test_completion_failures_are_logged_and_counted(mediator, repository, caplog):
+    [task] = await create_due_tasks(mediator, 1)
+    pool = TaskWorkerPool(repository, FailingCompletionMediator())
+    assert await pool.claim_once() == 1
+    await drain(pool)
+
+    assert pool.get_metrics()["completion_failures_total"] == 1
+    assert pool.get_metrics()["completed_total"] == 0
+    assert task.status == "running"
+    assert f"Task {task.id} ran but could not be completed" in caplog.text
+
+@pytest.mark.asyncio
+async def test_tasks_fail_for_good_after_their_last_attempt(mediator, repository):
+    orphaned, failing = await create_due_tasks(mediator, 2)
+    # A worker that died holding the other task on its last attempt
+    now = datetime.now()
+    assert [task.id for task in await repository.claim_tasks("dead", now, now, 1)] == [orphaned.id]
+    orphaned.attempts = 2
+
+    def handler(payload):
+        if payload["id"] == failing.id:
+            raise RuntimeError("handler failure")
+
+    pool = TaskWorkerPool(repository, mediator, handler=handler, lease_seconds=0.05, max_attempts=2)
+    for _ in range(2):
+        await asyncio.sleep(0.06)
+        await pool.claim_once()
+        await drain(pool)
+
+    assert (failing.status, failing.attempts, failing.lease_owner) == ("failed", 2, None)
+    assert (orphaned.status, orphaned.attempts) == ("failed", 3)
+    assert pool.get_metrics()["failed_total"] == 2
+    assert pool.get_metrics()["abandoned_total"] == 2
+    await asyncio.sleep(0.06)
+    assert await pool.claim_once() == 0
+
+@pytest.mark.asyncio
+async def test_stop_hands_unfinished_tasks_back(mediator, repository):
+    await create_due_tasks(mediator, 2)
+
+    async def handler(task):
+        await asyncio.Event().wait()
+
+    pool = TaskWorkerPool(repository, mediator, handler=handler, poll_interval=0.01)
+    pool.start()
+    for _ in range(100):
+        if pool.get_metrics()["running"] == 2:
+            break
+        await asyncio.sleep(0.01)
+    await pool.stop()
+
+    assert await count_created(mediator) == 2
+    assert pool.get_metrics()["released_total"] == 2
+    page = await mediator.handle_query(GetAllTasksQuery(status="created", limit=100))
+    assert [task.attempts for task in page.tasks] == [0, 0]
+
+@pytest.mark.asyncio
+async def test_thread_executor_runs_sync_handlers(mediator, repository):
+    tasks = await create_due_tasks(mediator, 4)
+    calls = []
+
+    pool = TaskWorkerPool(repository, mediator, handler=lambda task: calls.append(task["id"]), executor="thread")
+    pool.start()
+    for _ in range(100):
+        if pool.get_metrics()["completed_total"] == 4:
+            break
+        await asyncio.sleep(0.01)
+    await pool.stop()
+
+    assert sorted(calls) == sorted(task.id for task in tasks)
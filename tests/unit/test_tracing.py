@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from src.infrastructure.api.rest_api import app
+from src.infrastructure.di_factories import Container
+from src.infrastructure.monitoring.tracing import InMemorySpanExporter, SpanContext, tracer
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    yield exporter
+    tracer.shutdown()
+
+def spans_by_name(exporter):
+    # Shutting down flushes the spans still queued for export
+    tracer.shutdown()
+    return {span["name"]: span for span in exporter.spans}
+
+def test_traceparent_round_trip():
+    context = SpanContext.parse("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01")
+
+    assert (context.trace_id, context.span_id, context.sampled) == (0x0af7651916cd43dd8448eb211c80319c, 0xb7ad6b7169203331, True)
+    assert context.traceparent() == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    for invalid in (None, "", "00-abc-def-01", "00-00000000000000000000000000000000-b7ad6b7169203331-01", "ff-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"):
+        assert SpanContext.parse(invalid) is None
+
+def test_request_trace_spans_the_api_mediator_repository_and_outbox_relay(exporter):
+    tracer.configure(exporter, sample_rate=0)
+    container = Container()
+    container.wire(modules=["src.infrastructure.api.rest_api"])
+    try:
+        caller = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        response = TestClient(app).post(
+            "/tasks/",
+            json={"configuration_id": "config", "location_id": "loc", "due_date": "2030-01-01T00:00:00"},
+            headers={"traceparent": caller},
+        )
+        assert response.status_code == 201
+        asyncio.run(container.outbox_relay().relay_once())
+    finally:
+        container.unwire()
+
+    spans = spans_by_name(exporter)
+    request, command = spans["POST /tasks/"], spans["CreateTaskCommand"]
+    assert request["trace_id"] == "0af7651916cd43dd8448eb211c80319c"
+    assert request["parent_span_id"] == "b7ad6b7169203331"
+    assert request["attributes"]["http.status_code"] == 201
+    assert command["parent_span_id"] == request["span_id"]
+    assert spans["repository.create"]["parent_span_id"] == command["span_id"]
+    assert spans["repository.create"]["attributes"]["db.backend"] == "MockTaskRepository"
+    assert spans["repository.add_outbox_messages"]["parent_span_id"] == command["span_id"]
+    # Relayed later, the event is still delivered within the request's trace
+    relay = spans["outbox.relay"]
+    assert (relay["trace_id"], relay["parent_span_id"]) == (request["trace_id"], command["span_id"])
+    assert spans["event_sender.send_batch"]["parent_span_id"] == relay["span_id"]
+
+@pytest.mark.asyncio
+async def test_unsampled_traces_are_kept_when_slow_or_failed(exporter):
+    tracer.configure(exporter, sample_rate=0, tail_latency=0.05)
+
+    async def request(name, delay=0.0, fail=False):
+        with tracer.start_span(name):
+            with tracer.start_span(f"{name}.child") as child:
+                await asyncio.sleep(delay)
+                if fail:
+                    child.record_error("failed")
+
+    await request("fast")
+    await request("slow", delay=0.06)
+    await request("failed", fail=True)
+    with tracer.start_span("sampled", parent=SpanContext(1, 1, True)):
+        pass
+
+    assert set(spans_by_name(exporter)) == {"slow", "slow.child", "failed", "failed.child", "sampled"}
+
+def test_disabled_tracer_hands_out_a_noop_span():
+    with tracer.start_span("ignored") as span:
+        span.set_attribute("key", "value")
+        assert tracer.current_traceparent() is None